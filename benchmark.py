@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# Benchmark the migration script against local stand-in Overseerr, Jellyseerr and TMDB servers
+# https://github.com/Quack6765/seerr-migration-script
+
+import os
+import re
+import sys
+import gzip
+import zlib
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import importlib.util
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import List, Dict, Any, Optional, Tuple
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "overseerr-migration-script.py")
+
+# Default dataset size
+USERS = 100
+REQUESTS = 300
+
+# Smallest response body (bytes) gzipped by the stand-in servers with --compress
+COMPRESS_MIN_SIZE = 1024
+
+# Share of generated requests that are 4K, and of TV requests among the rest
+FOURK_RATIO = 0.1
+TV_RATIO = 0.5
+
+# Number of distinct TMDB titles requests are drawn from
+TMDB_TITLES = 5000
+
+# Retry-After sent with injected 429 responses (seconds)
+INJECTED_RETRY_AFTER = 0.2
+
+# Permissions Jellyseerr gives created and imported users, whatever the request asks for (REQUEST)
+DEFAULT_PERMISSIONS = 32
+
+# Share of generated users with a Jellyfin account of the same username Jellyseerr can import
+MEDIA_SERVER_RATIO = 0.5
+
+class Store:
+    """In-memory users, requests and notification settings of one stand-in server.
+
+    Lists are kept alongside the dictionaries so that pages are sliced
+    without rebuilding them, even with tens of thousands of records.
+    """
+
+    def __init__(self, users: List[Dict[str, Any]], requests_list: List[Dict[str, Any]],
+                 media_server_accounts: Optional[List[Dict[str, Any]]] = None):
+        self.lock = threading.Lock()
+        self.media_server_accounts = media_server_accounts
+        self.users = {}
+        self.user_list = []
+        self.requests = {}
+        self.requests_by_user: Dict[int, List[Dict[str, Any]]] = {}
+        self.requests_by_modified: Optional[List[Dict[str, Any]]] = None
+        self.notifications: Dict[int, Dict[str, Any]] = {}
+        for user in users:
+            self.add_user(user)
+        for request in requests_list:
+            self.add_request(request)
+        self.next_user_id = max(self.users, default=0) + 1
+        self.next_request_id = max(self.requests, default=0) + 1
+
+    def add_user(self, user: Dict[str, Any]) -> None:
+        self.users[user["id"]] = user
+        self.user_list.append(user)
+
+    def add_request(self, request: Dict[str, Any]) -> None:
+        self.requests[request["id"]] = request
+        self.requests_by_user.setdefault(request["requestedBy"]["id"], []).append(request)
+        self.requests_by_modified = None
+
+    def sorted_requests(self) -> List[Dict[str, Any]]:
+        """Requests most recently modified first, sorted again only after a change."""
+        if self.requests_by_modified is None:
+            self.requests_by_modified = sorted(self.requests.values(), key=lambda r: r["updatedAt"], reverse=True)
+        return self.requests_by_modified
+
+def timestamp(seconds: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(seconds))
+
+def generate_dataset(users: int, requests_count: int, seed: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Generate Overseerr users and requests spread randomly among them.
+
+    Args:
+        users: Number of users
+        requests_count: Number of requests
+        seed: Random seed, so runs can be compared
+
+    Returns:
+        Tuple: Users and requests, as returned by the Overseerr API
+    """
+    rnd = random.Random(seed)
+    user_list = [{"id": i, "email": f"user{i}@example.com", "username": f"user{i}", "permissions": 32, "userType": 1} for i in range(1, users + 1)]
+    start = time.time() - 365 * 86400
+    request_list = []
+    for i in range(1, requests_count + 1):
+        requester = user_list[rnd.randrange(users)]
+        media_type = "tv" if rnd.random() < TV_RATIO else "movie"
+        created = start + i
+        request_list.append({
+            "id": i,
+            "status": 2,
+            "is4k": rnd.random() < FOURK_RATIO,
+            "createdAt": timestamp(created),
+            "updatedAt": timestamp(created + rnd.randrange(86400)),
+            "media": {"mediaType": media_type, "tmdbId": rnd.randint(1, TMDB_TITLES), "status": 2},
+            "seasons": [{"seasonNumber": s} for s in range(1, rnd.randint(2, 5))] if media_type == "tv" else [],
+            "requestedBy": dict(requester),
+            "modifiedBy": None,
+        })
+    return user_list, request_list
+
+def generate_media_server_accounts(users: List[Dict[str, Any]], seed: int) -> List[Dict[str, Any]]:
+    """Generate the Jellyfin accounts Jellyseerr can import, for a share of the Overseerr users.
+
+    Returns:
+        List[Dict[str, Any]]: Accounts, as listed by Jellyseerr's /settings/jellyfin/users
+    """
+    rnd = random.Random(seed)
+    return [{"id": f"{user['id']:032x}", "username": user["username"], "email": user["email"]}
+            for user in users if rnd.random() < MEDIA_SERVER_RATIO]
+
+def endpoint_template(path: str) -> str:
+    """Replace IDs in a path, e.g. /api/v1/user/12 -> /api/v1/user/{id}."""
+    return re.sub(r"(?<=[a-z])/\d+(?=/|$)", "/{id}", path)
+
+class StandInServer:
+    """Local HTTP server implementing the Overseerr/Jellyseerr or TMDB endpoints used by the script.
+
+    Every call is counted per endpoint template. Calls are delayed by the
+    configured latency. A share of the idempotent calls fail with a 502 to
+    exercise the script's retries (POST calls aren't retried on errors),
+    and a share of all calls is throttled with a 429 and a Retry-After
+    header. With compress, responses are gzipped for clients accepting it,
+    like a reverse proxy would. GET responses carry a weak ETag and
+    If-None-Match is answered with a 304, as Express does.
+    """
+
+    def __init__(self, name: str, store: Store, latency: float = 0.0, error_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 0,
+                 compress: bool = False):
+        self.name = name
+        self.compress = compress
+        self.bytes_sent = 0
+        self.store = store
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.injected_errors = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name=f"{name}-server", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def inject_error(self, method: str, path: str) -> Optional[int]:
+        """Pick the error status to fail a call with, None to serve it normally."""
+        # The connection test isn't retried, keep it reliable
+        if not (self.error_rate or self.throttle_rate) or path.endswith("/settings/main"):
+            return None
+        with self.store.lock:
+            draw = self.random.random()
+            if draw < self.throttle_rate:
+                status = 429
+            elif draw < self.throttle_rate + self.error_rate and method != "POST":
+                status = 502
+            else:
+                return None
+            self.injected_errors += 1
+            return status
+
+    def handler(self) -> type:
+        server = self
+        store = self.store
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this, delayed ACKs add ~40ms per call
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+                body = json.dumps(data).encode()
+                headers = dict(headers or {})
+                if self.command == "GET" and status == 200:
+                    headers["ETag"] = f'W/"{len(body):x}-{zlib.crc32(body):08x}"'
+                    if self.headers.get("If-None-Match") == headers["ETag"]:
+                        status, body = 304, b""
+                if server.compress and len(body) >= COMPRESS_MIN_SIZE and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=6)
+                    headers["Content-Encoding"] = "gzip"
+                with store.lock:
+                    server.bytes_sent += len(body)
+                self.send_response(status)
+                if status != 304:
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_body(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def route(self, method: str) -> None:
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                with store.lock:
+                    server.calls[(method, endpoint_template(url.path))] += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                body = self.read_body() if method in ("POST", "PUT") else {}
+                error = server.inject_error(method, url.path)
+                if error == 429:
+                    return self.send_json(429, {"message": "Too Many Requests"}, {"Retry-After": f"{INJECTED_RETRY_AFTER:g}"})
+                if error:
+                    return self.send_json(error, {"message": "Bad Gateway"})
+
+                with store.lock:
+                    status, data = (tmdb_route if server.name == "tmdb" else seerr_route)(store, method, url.path, query, body)
+                self.send_json(status, data)
+
+            def do_GET(self) -> None:
+                self.route("GET")
+
+            def do_POST(self) -> None:
+                self.route("POST")
+
+            def do_PUT(self) -> None:
+                self.route("PUT")
+
+        return Handler
+
+def page(items: List[Dict[str, Any]], query: Dict[str, List[str]]) -> Dict[str, Any]:
+    take = int(query.get("take", ["10"])[0])
+    skip = int(query.get("skip", ["0"])[0])
+    return {
+        "pageInfo": {"pages": -(-len(items) // max(1, take)), "pageSize": take, "results": len(items), "page": skip // max(1, take) + 1},
+        "results": items[skip:skip + take],
+    }
+
+def seerr_route(store: Store, method: str, path: str, query: Dict[str, List[str]], body: Dict[str, Any]) -> Tuple[int, Any]:
+    """Serve an Overseerr/Jellyseerr API call from the store.
+
+    Returns:
+        Tuple[int, Any]: Status code and JSON response
+    """
+    path = path[len("/api/v1"):] if path.startswith("/api/v1") else path
+
+    if path == "/settings/main":
+        return 200, {"applicationTitle": "Stand-in"}
+
+    if path == "/settings/jellyfin/users" and store.media_server_accounts is not None:
+        return 200, store.media_server_accounts
+
+    if path == "/user/import-from-jellyfin" and method == "POST" and store.media_server_accounts is not None:
+        imported = {user.get("jellyfinUserId") for user in store.user_list}
+        accounts = {account["id"]: account for account in store.media_server_accounts}
+        created = []
+        for account_id in body.get("jellyfinUserIds", []):
+            account = accounts.get(account_id)
+            if not account or account_id in imported:
+                continue
+            user = {"id": store.next_user_id, "email": account["email"], "username": account["username"], "jellyfinUserId": account_id,
+                    "jellyfinUsername": account["username"], "permissions": DEFAULT_PERMISSIONS, "userType": 3}
+            store.next_user_id += 1
+            store.add_user(user)
+            created.append(user)
+        return 201, created
+
+    if path == "/user":
+        if method == "GET":
+            return 200, page(store.user_list, query)
+        if method == "POST":
+            user = {"id": store.next_user_id, "email": body["email"], "username": body.get("username"), "permissions": DEFAULT_PERMISSIONS, "userType": 2}
+            store.next_user_id += 1
+            store.add_user(user)
+            return 201, user
+        if method == "PUT":
+            for user_id in body.get("ids", []):
+                store.users[user_id]["permissions"] = body["permissions"]
+            return 200, [store.users[user_id] for user_id in body.get("ids", [])]
+
+    match = re.fullmatch(r"/user/(\d+)", path)
+    if match:
+        user = store.users.get(int(match.group(1)))
+        if not user:
+            return 404, {"message": "User not found"}
+        if method == "PUT":
+            user["permissions"] = body.get("permissions", user["permissions"])
+        return 200, user
+
+    match = re.fullmatch(r"/user/(\d+)/settings/notifications", path)
+    if match:
+        user_id = int(match.group(1))
+        if method == "POST":
+            store.notifications[user_id] = body
+        return 200, store.notifications.get(user_id, {"emailEnabled": True, "notificationTypes": {"email": 3661, "discord": 3661}})
+
+    if path == "/request":
+        if method == "GET":
+            if "requestedBy" in query:
+                items = store.requests_by_user.get(int(query["requestedBy"][0]), [])
+            elif query.get("sort") == ["modified"]:
+                items = store.sorted_requests()
+            else:
+                items = list(store.requests.values())
+            return 200, page(items, query)
+        if method == "POST":
+            now = timestamp(time.time())
+            request = {
+                "id": store.next_request_id,
+                "status": 1,
+                "is4k": body.get("is4k", False),
+                "createdAt": now,
+                "updatedAt": now,
+                "media": {"mediaType": body["mediaType"], "tmdbId": body["mediaId"], "status": 2},
+                "seasons": [{"seasonNumber": s} for s in body.get("seasons", [])],
+                "requestedBy": dict(store.users.get(body.get("userId"), {"id": body.get("userId")})),
+                "modifiedBy": None,
+            }
+            store.next_request_id += 1
+            store.add_request(request)
+            return 201, request
+
+    match = re.fullmatch(r"/request/(\d+)", path)
+    if match:
+        request = store.requests.get(int(match.group(1)))
+        return (200, request) if request else (404, {"message": "Request not found"})
+
+    return 404, {"message": f"No route for {method} {path}"}
+
+def tmdb_route(store: Store, method: str, path: str, query: Dict[str, List[str]], body: Dict[str, Any]) -> Tuple[int, Any]:
+    """Serve a TMDB movie or TV details call with a generated title."""
+    match = re.fullmatch(r"/3/(movie|tv)/(\d+)", path)
+    if not match:
+        return 404, {"status_message": "The resource you requested could not be found."}
+    tmdb_id = int(match.group(2))
+    if match.group(1) == "movie":
+        return 200, {"id": tmdb_id, "title": f"Movie {tmdb_id}"}
+    return 200, {"id": tmdb_id, "name": f"Show {tmdb_id}"}
+
+def load_script(tmdb_url: str) -> Any:
+    """Load a fresh copy of the migration script, so no state leaks between runs.
+
+    Args:
+        tmdb_url: Base URL of the stand-in TMDB server
+
+    Returns:
+        The loaded module
+    """
+    spec = importlib.util.spec_from_file_location("overseerr_migration_script", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.TMDB_URL = tmdb_url
+    return module
+
+def run_benchmark(args: argparse.Namespace, script_args: List[str]) -> Dict[str, Any]:
+    """Run one migration against fresh stand-in servers and measure it.
+
+    With args.rerun the migration is run twice in the same working
+    directory and only the second, back-to-back run is measured.
+
+    Args:
+        args: Benchmark arguments
+        script_args: Extra arguments passed to the migration script
+
+    Returns:
+        Dict[str, Any]: Measurements of the run
+    """
+    users, requests_list = generate_dataset(args.users, args.requests, args.seed)
+    admin = {"id": 1, "email": "admin@example.com", "username": "admin", "permissions": 2, "userType": 3}
+    servers = {
+        "overseerr": StandInServer("overseerr", Store(users, requests_list), args.latency / 1000, args.error_rate, args.throttle_rate, args.seed, args.compress),
+        "jellyseerr": StandInServer("jellyseerr", Store([admin], [], generate_media_server_accounts(users, args.seed)), args.latency / 1000, args.error_rate, args.throttle_rate, args.seed + 1, args.compress),
+        "tmdb": StandInServer("tmdb", Store([], []), args.latency / 1000, args.error_rate, args.throttle_rate, args.seed + 2, args.compress),
+    }
+    for server in servers.values():
+        server.start()
+
+    cwd = os.getcwd()
+    argv = sys.argv
+    try:
+        # Run in a scratch directory so the journal, state and cache files start empty
+        with tempfile.TemporaryDirectory(prefix="seerr-benchmark-") as workdir:
+            os.chdir(workdir)
+            module = load_script(f"{servers['tmdb'].url}/3")
+            module.logger.setLevel(logging.INFO if args.verbose else logging.WARNING)
+            sys.argv = [SCRIPT_PATH,
+                        "-s", servers["overseerr"].url, "-k", "benchmark",
+                        "-t", servers["jellyseerr"].url, "-a", "benchmark",
+                        "-m", "benchmark", *script_args]
+
+            if args.rerun:
+                module.main()
+                for server in servers.values():
+                    server.calls.clear()
+                    server.bytes_sent = 0
+                    server.injected_errors = 0
+                module = load_script(f"{servers['tmdb'].url}/3")
+                module.logger.setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+            start = time.perf_counter()
+            exit_code = module.main()
+            wall_time = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+        for server in servers.values():
+            server.stop()
+
+    calls = {name: sum(server.calls.values()) for name, server in servers.items()}
+    total_calls = sum(calls.values())
+    target = servers["jellyseerr"].store
+    return {
+        "users": args.users,
+        "requests": args.requests,
+        "latency_ms": args.latency,
+        "error_rate": args.error_rate,
+        "throttle_rate": args.throttle_rate,
+        "script_args": script_args,
+        "exit_code": exit_code,
+        "wall_time": round(wall_time, 3),
+        "http_calls": total_calls,
+        "calls_per_second": round(total_calls / wall_time, 1) if wall_time else 0.0,
+        "calls_per_user": round(total_calls / args.users, 2) if args.users else 0.0,
+        "users_created": len(target.users) - 1,
+        "requests_created": len(target.requests),
+        "injected_errors": sum(server.injected_errors for server in servers.values()),
+        "calls_by_server": calls,
+        "response_bytes": sum(server.bytes_sent for server in servers.values()),
+        "calls_by_endpoint": {f"{name} {method} {endpoint}": count
+                              for name, server in servers.items()
+                              for (method, endpoint), count in sorted(server.calls.items(), key=lambda item: -item[1])},
+    }
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """Print the measurements of each run and their median."""
+    for i, result in enumerate(results, 1):
+        print(f"Run {i}: {result['wall_time']:.2f}s, {result['http_calls']} HTTP calls, "
+              f"{result['calls_per_second']:.1f} calls/s, {result['calls_per_user']:.2f} calls/user, "
+              f"{result['requests_created']} requests created, exit code {result['exit_code']}")
+
+    last = results[-1]
+    wall_times = sorted(result["wall_time"] for result in results)
+    median = wall_times[len(wall_times) // 2]
+    print()
+    print(f"Dataset:           {last['users']} users, {last['requests']} requests, {last['latency_ms']:g}ms latency, {last['error_rate']:.0%} errors, {last['throttle_rate']:.0%} throttled")
+    print(f"Script arguments:  {' '.join(last['script_args']) or '(defaults)'}")
+    print(f"Wall time:         {median:.2f}s (median of {len(results)})")
+    print(f"HTTP calls:        {last['http_calls']} ({last['calls_per_user']:.2f} per user, {last['injected_errors']} injected errors)")
+    print(f"Throughput:        {last['http_calls'] / median:.1f} calls/s, {last['requests_created'] / median:.1f} requests created/s")
+    print(f"Response bytes:    {last['response_bytes'] / 1e6:.2f} MB sent by the servers")
+    print()
+    print("Calls by endpoint:")
+    for endpoint, count in last["calls_by_endpoint"].items():
+        print(f"  {count:>8}  {endpoint}")
+
+def parse_args() -> Tuple[argparse.Namespace, List[str]]:
+    parser = argparse.ArgumentParser(description="Benchmark the migration against local stand-in servers. Unknown arguments (e.g. -e async -w 8) are passed to the migration script.")
+
+    # Add dataset arguments
+    parser.add_argument('--users', type=int, default=USERS, help=f'Number of generated Overseerr users (default: {USERS})')
+    parser.add_argument('--requests', type=int, default=REQUESTS, help=f'Number of generated Overseerr requests (default: {REQUESTS})')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed of the dataset and error injection (default: 1)')
+
+    # Add server behaviour arguments
+    parser.add_argument('--latency', type=float, default=0.0, help='Latency added to every call, in milliseconds (default: 0)')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='Share of GET/PUT calls failing with a 502, e.g. 0.05 (default: 0)')
+    parser.add_argument('--throttle_rate', type=float, default=0.0, help='Share of calls throttled with a 429 and a Retry-After header (default: 0)')
+    parser.add_argument('--compress', action='store_true', help=f'Gzip responses of at least {COMPRESS_MIN_SIZE} bytes for clients accepting it')
+
+    # Add run arguments
+    parser.add_argument('--rerun', action='store_true', help='Migrate twice in the same working directory and measure the second run')
+    parser.add_argument('--runs', type=int, default=1, help='Number of runs, the median wall time is reported (default: 1)')
+    parser.add_argument('--json', metavar='PATH', help='Also write the measurements of every run to this JSON file')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Show the migration script logs')
+
+    return parser.parse_known_args()
+
+def main() -> int:
+    args, script_args = parse_args()
+    # For records of the libraries the script uses; the script installs its own handlers, logging to the
+    # console and to a migration.log file in the scratch directory
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.users < 1 or args.requests < 0:
+        print("--users must be at least 1 and --requests can't be negative", file=sys.stderr)
+        return 1
+
+    results = [run_benchmark(args, script_args) for _ in range(max(1, args.runs))]
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(result["exit_code"] == 0 for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
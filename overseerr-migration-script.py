@@ -2,578 +2,4458 @@
 # Python script to migrate Overseerr to Jellyseerr
 # https://github.com/Quack6765/seerr-migration-script
 
+import os
+import re
 import sys
+import gzip
+import zlib
 import time
+import heapq
+import random
+import asyncio
+import threading
 import argparse
 import requests
 import json
+import queue
 import logging
-from typing import List, Dict, Any, Optional
+import logging.handlers
+import importlib.util
+import sqlite3
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple, Set, AsyncIterator, Callable, Awaitable
+from urllib.parse import urlparse, urlencode
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,  # Default to INFO level
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('migration.log'),
-        logging.StreamHandler()
-    ]
-)
+try:
+    import aiohttp
+except ImportError:  # Only needed by the asyncio engine
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:  # Optional, speeds up decoding large pages
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional, lets servers send brotli compressed responses
+    brotli = None
+
+try:
+    import httpx
+except ImportError:  # Only needed for HTTP/2 (--http2)
+    httpx = None
+
+# Setup logging, handlers are attached by start_logging()
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # Default to INFO level
+# httpx logs every request at INFO, the metrics already cover them
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Default log file and its format: text, or json for one JSON object per line
+LOG_PATH = "migration.log"
+LOG_FORMAT = "text"
+TEXT_LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Background thread writing the queued log records, set up by start_logging()
+LOG_LISTENER = None
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Queue a record for the log thread, with only its message rendered.
+    
+    Records below the logger's level are dropped before reaching the handler,
+    so their arguments are never formatted. Timestamps, layout and the writes
+    are left to the log thread.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments are rendered now since they may be changed after the call
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonLogFormatter(logging.Formatter):
+    """Format records as JSON lines."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry)
+
+class LazyJson:
+    """JSON encoding of a value, only done if the log record using it is emitted."""
+    
+    __slots__ = ("value",)
+    
+    def __init__(self, value: Any):
+        self.value = value
+    
+    def __str__(self) -> str:
+        return json.dumps(self.value)
+
+def start_logging(path: Optional[str], log_format: str = "text") -> None:
+    """Send the script's log records through a queue to a background thread writing them.
+    
+    Args:
+        path: Log file, None or empty to log to stderr only
+        log_format: Format of the log file, text or json (stderr is always text)
+    """
+    global LOG_LISTENER
+    
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(TEXT_LOG_FORMAT))
+    handlers = [console]
+    if path:
+        log_file = logging.FileHandler(path, encoding="utf-8")
+        log_file.setFormatter(JsonLogFormatter() if log_format == "json" else logging.Formatter(TEXT_LOG_FORMAT))
+        handlers.append(log_file)
+    
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(LogQueueHandler(log_queue))
+    logger.propagate = False
+    LOG_LISTENER = logging.handlers.QueueListener(log_queue, *handlers)
+    LOG_LISTENER.start()
+
+def stop_logging() -> None:
+    """Write the queued log records, then close the log handlers."""
+    global LOG_LISTENER
+    
+    if LOG_LISTENER is None:
+        return
+    LOG_LISTENER.stop()
+    for handler in LOG_LISTENER.handlers:
+        handler.close()
+    for handler in [h for h in logger.handlers if isinstance(h, LogQueueHandler)]:
+        logger.removeHandler(handler)
+    logger.propagate = True
+    LOG_LISTENER = None
+
+# Number of records requested per page when walking paginated endpoints
+PAGE_SIZE = 100
+
+# Number of keep-alive connections kept open per host
+POOL_SIZE = 10
+
+# Default connect and read timeouts (seconds) applied to every API call
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+# Number of times a failed call is retried, with exponential backoff from RETRY_BACKOFF up to RETRY_BACKOFF_MAX seconds
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 30
+
+# Longest Retry-After (seconds) honored before retrying
+RETRY_AFTER_MAX = 300
+
+# Statuses retried for idempotent methods. POST is only retried on 429, which means the server didn't process it
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Default maximum requests per second per host, 0 to only slow down once the host throttles
+RATE_LIMIT = 0
+
+# Number of users migrated in parallel
+WORKERS = 1
+
+# Default per-host limit of concurrent requests for the asyncio engine
+ASYNC_MAX_IN_FLIGHT = 100
+
+# Response compressions accepted from every host; brotli only when a decoder is installed
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli else "gzip, deflate"
+
+# Notification channels silenced while requests are migrated, when a user's settings don't list them
+NOTIFICATION_CHANNELS = ["discord", "email", "pushbullet", "pushover", "slack", "telegram", "webhook", "webpush"]
+
+# Default path of the file saving users' notification settings until they are restored
+NOTIFICATION_BACKUP_PATH = "notification_backup.json"
+
+# Number of notification settings read or written in parallel by the sync engine
+NOTIFICATION_CONCURRENCY = 16
+
+TMDB_URL = "https://api.themoviedb.org/3"
+
+# Conditional GET cache of Overseerr/Jellyseerr responses: SQLite file and max entries
+HTTP_CACHE_PATH = "http_cache.sqlite3"
+HTTP_CACHE_SIZE = 20000
+
+# Response cache shared by the Overseerr and Jellyseerr clients, set up in main()
+RESPONSE_CACHE = None
+
+# TMDB cache defaults: SQLite file, time to live (days), max entries on disk and in memory
+TMDB_CACHE_PATH = "tmdb_cache.sqlite3"
+TMDB_CACHE_TTL_DAYS = 30
+TMDB_CACHE_SIZE = 50000
+TMDB_CACHE_MEMORY_SIZE = 5000
+
+# TMDB fields kept in the cache, the migration only needs the media name
+TMDB_CACHED_FIELDS = ("id", "title", "name")
+
+# TMDB metadata cache, set up in main()
+TMDB_CACHE = None
+
+# Number of TMDB titles resolved concurrently by the prefetch stage
+TMDB_CONCURRENCY = 8
+
+# Media titles resolved by the TMDB prefetch stage, keyed by (mediaType, tmdbId)
+MEDIA_TITLES: Dict[Tuple[str, int], str] = {}
+
+# Default path of the checkpoint journal used to resume interrupted migrations
+JOURNAL_PATH = "migration.journal"
+
+# Checkpoint journal of the current run, set up in main()
+JOURNAL = None
+
+# Default path of the file written by the snapshot command
+SNAPSHOT_PATH = "overseerr_snapshot.ndjson.gz"
+
+# Overseerr instances migrated from, set up in main(): the one given on the command line
+# or every source of a --config job
+SOURCES: List["Source"] = []
+
+# Users and requests the run is limited to (--user, --media_type, ...), None to migrate everything
+SCOPE: Optional["MigrationScope"] = None
+
+# How created requests are checked: fetched back one by one (inline), all at once after
+# the migration (deferred) or not at all (off)
+VERIFY = "deferred"
+
+# Requests created in Jellyseerr this run: request ID -> (Jellyseerr user ID, source request)
+CREATED_REQUESTS: Dict[int, Tuple[int, "SourceRequest"]] = {}
+
+# Default path of the file holding the delta sync watermarks and Jellyseerr request index
+STATE_PATH = "migration.state.json"
+
+# Delta sync state of the last successful run, loaded in main()
+SYNC_STATE: Dict[str, Any] = {}
+
+# Seconds a delta sync reuses the saved Jellyseerr request index before listing every request
+# again, which drops the requests deleted in Jellyseerr from it
+TARGET_INDEX_MAX_AGE = 86400.0
+
+# Query parameters used to list requests, newest modification first so delta syncs can stop early
+REQUEST_LIST_PARAMS = {"filter": "unavailable", "sort": "modified"}
+
+# Request statuses (pending 1, approved 2, declined 3, failed 4) and media statuses (unknown 1, pending 2,
+# processing 3, partially available 4, available 5) listed by each Overseerr request filter, None for any
+REQUEST_FILTERS: Dict[str, Tuple[Optional[Set[int]], Optional[Set[int]]]] = {
+    "all": (None, None),
+    "pending": ({1}, None),
+    "approved": ({2}, None),
+    "processing": ({2}, {1, 2, 3, 4}),
+    "unavailable": ({1, 2}, {1, 2, 3, 4}),
+    "available": ({2}, {5}),
+    "failed": ({4}, None),
+}
+
+# Fields of listed requests read by the migration, the asyncio engine trims each listed page to them as it's decoded
+REQUEST_FIELDS: Dict[str, Any] = {
+    "id": None,
+    "status": None,
+    "is4k": None,
+    "createdAt": None,
+    "updatedAt": None,
+    "media": {"mediaType": None, "tmdbId": None, "status": None, "title": None, "name": None},
+    "seasons": {"seasonNumber": None},
+    "requestedBy": {"id": None, "email": None, "username": None, "plexUsername": None, "permissions": None},
+}
+
+# Fields of Jellyseerr users kept in the lookup index
+TARGET_USER_FIELDS: Dict[str, Any] = dict.fromkeys(("id", "email", "username", "jellyfinUsername", "jellyfinUserId", "userType", "displayName", "permissions"))
+
+# Pages at least this large (bytes) are parsed incrementally when orjson isn't installed, see decode_page. A page
+# of the default PAGE_SIZE is well below it, so this only applies to large --page_size values
+INCREMENTAL_PARSE_SIZE = 1 << 20
+
+# Incremental JSON page parsing, see parse_page
+JSON_DECODER = json.JSONDecoder()
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Jellyseerr user types for accounts imported from Jellyfin/Emby
+MEDIA_SERVER_USER_TYPES = {3, 4, "jellyfin", "emby"}
+
+# Import new users from Jellyfin/Emby when Jellyseerr knows an account with the same name, instead of creating local users
+MEDIA_SERVER_IMPORT = True
+
+# Jellyfin/Emby user IDs Jellyseerr can import, by normalized username and email; listed once per migration
+MEDIA_SERVER_USERS: Optional[Dict[str, str]] = None
+
+# Jellyseerr users indexed by normalized email and username
+TARGET_USERS_BY_EMAIL: Dict[str, Dict[str, Any]] = {}
+TARGET_USERS_BY_USERNAME: Dict[str, Dict[str, Any]] = {}
+
+# Jellyseerr requests indexed by (mediaType, tmdbId, is4k), values are season bitmasks
+TARGET_REQUEST_INDEX: Dict[Tuple[str, int, bool], int] = {}
+
+# Requests created in Jellyseerr this run, indexed like TARGET_REQUEST_INDEX
+RUN_REQUEST_INDEX: Dict[Tuple[str, int, bool], int] = {}
+
+# Outcome of the source requests of this run: created, failed, existing (already in
+# Jellyseerr or journaled) and duplicate (created earlier this run for another source request)
+REQUEST_COUNTS: Counter = Counter()
+
+# Season bitmask stored for requests covering a whole media item (movies)
+ALL_SEASONS = -1
+
+class SourceUser:
+    """The fields of an Overseerr user read by the migration.
+    
+    Overseerr returns settings, avatars and request counts that are never
+    used; only these are kept, in slots rather than a dict per user.
+    """
+    
+    __slots__ = ("id", "uid", "email", "username", "permissions")
+    
+    def __init__(self, id: int, uid: Any, email: Optional[str], username: Optional[str], permissions: int = 0):
+        self.id = id
+        self.uid = uid
+        self.email = email
+        self.username = username
+        self.permissions = permissions
+    
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], source: Optional["Source"] = None) -> "SourceUser":
+        """Build a user from Overseerr user data, the username falling back to the Plex username."""
+        uid = source.uid(data["id"]) if source else data["id"]
+        return cls(data["id"], uid, data.get("email"), data.get("username") or data.get("plexUsername"), data.get("permissions", 0))
+
+class SourceRequest:
+    """The fields of an Overseerr request read by the migration.
+    
+    The nested media, requestedBy and modifiedBy objects are dropped:
+    seasons are kept as season numbers and the requesting user is shared
+    by all of their requests.
+    """
+    
+    __slots__ = ("id", "uid", "media_type", "tmdb_id", "is4k", "seasons", "title", "user")
+    
+    def __init__(self, id: int, uid: Any, media_type: str, tmdb_id: int, is4k: bool, seasons: Tuple[int, ...], title: Optional[str], user: SourceUser):
+        self.id = id
+        self.uid = uid
+        self.media_type = media_type
+        self.tmdb_id = tmdb_id
+        self.is4k = is4k
+        self.seasons = seasons
+        self.title = title
+        self.user = user
+    
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], users: Optional[Dict[int, SourceUser]] = None, source: Optional["Source"] = None) -> "SourceRequest":
+        """Build a request from Overseerr request data.
+        
+        Args:
+            data: Request data from Overseerr
+            users: Users of the same source already built, keyed by ID, reused and extended so each user is kept once
+            source: Overseerr instance the request comes from, None for a single source
+            
+        Returns:
+            SourceRequest: The compact request
+        """
+        media = data["media"]
+        requested_by = data["requestedBy"]
+        user = users.get(requested_by["id"]) if users is not None else None
+        if user is None:
+            user = SourceUser.from_json(requested_by, source)
+            if users is not None:
+                users[user.id] = user
+        seasons = tuple(season["seasonNumber"] for season in data.get("seasons") or ())
+        return cls(data["id"], source.uid(data["id"]) if source else data["id"], sys.intern(media["mediaType"]), media["tmdbId"],
+                   bool(data["is4k"]), seasons, media.get("title") or media.get("name"), user)
+    
+    @property
+    def key(self) -> Tuple[str, int, bool]:
+        """Duplicate detection key: (mediaType, tmdbId, is4k)."""
+        return (self.media_type, self.tmdb_id, self.is4k)
+    
+    @property
+    def mask(self) -> int:
+        """Season bitmask of the request, ALL_SEASONS for movies."""
+        return season_mask(self.seasons) if self.media_type == "tv" else ALL_SEASONS
+
+# Overseerr requests grouped by the requesting user's uid
+SOURCE_REQUESTS_BY_USER: Dict[int, List[SourceRequest]] = {}
+
+# Overseerr user uids keyed by normalized email
+SOURCE_USER_IDS: Dict[str, Any] = {}
+
+# Guards read-modify-write updates of the shared Jellyseerr indexes
+INDEX_LOCK = threading.RLock()
+
+# Striped locks serializing duplicate check + creation of requests for the same media
+REQUEST_LOCKS = [threading.Lock() for _ in range(64)]
+
+# asyncio counterpart of REQUEST_LOCKS, created inside the running event loop
+ASYNC_REQUEST_LOCKS: List[asyncio.Lock] = []
+
+# Users provisioned in Jellyseerr this run, whose requests are migrated next: (source user, Overseerr ID, Jellyseerr ID)
+PROVISIONED_USERS: List[Tuple[SourceUser, int, int]] = []
+
+# Default path of the JSON summary of the run's metrics
+METRICS_PATH = "migration_metrics.json"
+
+# Prometheus textfile written with the run's metrics, None to skip it
+PROMETHEUS_PATH = None
+
+# Upper bounds (seconds) of the call latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metrics of the outbound calls and phases of the current run, set up in main()
+METRICS = None
+
+class Metrics:
+    """Counts, status codes, bytes and latencies of outbound calls, and time spent per phase.
+    
+    Every attempt of a call is recorded, retries included, keyed by host,
+    method and endpoint template (IDs replaced by {id}). Phases follow each
+    other: starting one ends the previous one.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.endpoints: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.phase = None
+        self.phase_started = 0.0
+    
+    def start_phase(self, name: str) -> None:
+        """End the current phase, if any, and start timing a new one.
+        
+        Args:
+            name: Phase name, time spent in phases started more than once adds up
+        """
+        with self.lock:
+            self._end_phase()
+            self.phase = name
+            self.phase_started = time.monotonic()
+            self.phases.setdefault(name, {"seconds": 0.0, "calls": 0, "call_seconds": 0.0})
+    
+    def end_phase(self) -> None:
+        with self.lock:
+            self._end_phase()
+    
+    def _end_phase(self) -> None:
+        if self.phase:
+            self.phases[self.phase]["seconds"] += time.monotonic() - self.phase_started
+            self.phase = None
+    
+    def record(self, host: str, method: str, endpoint: str, status: Optional[int], sent: int, received: int, seconds: float,
+               wire: Optional[int] = None) -> None:
+        """Record one attempt of an outbound call.
+        
+        Args:
+            host: Host the call was sent to
+            method: HTTP method
+            endpoint: API endpoint, templated before being recorded
+            status: HTTP status of the response, None if the call failed without one
+            sent: Bytes of the request body
+            received: Bytes of the response body, decompressed
+            seconds: Time until the response was read
+            wire: Bytes of the response body as transferred (compressed), defaults to received
+        """
+        key = (host, method, endpoint_template(endpoint))
+        with self.lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = {
+                    "calls": 0, "statuses": Counter(), "bytes_sent": 0, "bytes_received": 0, "wire_bytes_received": 0, "seconds": 0.0,
+                    "latencies": array("d"), "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                }
+            stats["calls"] += 1
+            stats["statuses"][str(status) if status else "error"] += 1
+            stats["bytes_sent"] += sent
+            stats["bytes_received"] += received
+            stats["wire_bytes_received"] += received if wire is None else wire
+            stats["seconds"] += seconds
+            stats["latencies"].append(seconds)
+            stats["buckets"][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            if self.phase:
+                self.phases[self.phase]["calls"] += 1
+                self.phases[self.phase]["call_seconds"] += seconds
+    
+    def summary(self) -> Dict[str, Any]:
+        """Build the JSON summary of the run.
+        
+        Returns:
+            Dict[str, Any]: Phases, per host totals and per endpoint figures with latency percentiles
+        """
+        with self.lock:
+            phases = {name: dict(phase) for name, phase in self.phases.items()}
+            if self.phase:
+                phases[self.phase]["seconds"] += time.monotonic() - self.phase_started
+            
+            hosts: Dict[str, Dict[str, Any]] = {}
+            endpoints = []
+            for (host, method, endpoint), stats in sorted(self.endpoints.items(), key=lambda item: -item[1]["seconds"]):
+                latencies = sorted(stats["latencies"])
+                endpoints.append({
+                    "host": host,
+                    "method": method,
+                    "endpoint": endpoint,
+                    "calls": stats["calls"],
+                    "statuses": dict(stats["statuses"]),
+                    "bytes_sent": stats["bytes_sent"],
+                    "bytes_received": stats["bytes_received"],
+                    "wire_bytes_received": stats["wire_bytes_received"],
+                    "seconds": round(stats["seconds"], 3),
+                    "latency_ms": {
+                        "mean": round(stats["seconds"] / stats["calls"] * 1000, 1),
+                        **{f"p{p}": round(percentile(latencies, p) * 1000, 1) for p in (50, 90, 99)},
+                        "max": round(latencies[-1] * 1000, 1),
+                    },
+                })
+                totals = hosts.setdefault(host, {"calls": 0, "errors": 0, "bytes_sent": 0, "bytes_received": 0, "wire_bytes_received": 0, "seconds": 0.0})
+                totals["calls"] += stats["calls"]
+                totals["errors"] += sum(count for status, count in stats["statuses"].items() if status == "error" or int(status) >= 400)
+                totals["bytes_sent"] += stats["bytes_sent"]
+                totals["bytes_received"] += stats["bytes_received"]
+                totals["wire_bytes_received"] += stats["wire_bytes_received"]
+                totals["seconds"] += stats["seconds"]
+        
+        return {
+            "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+            "duration": round(time.time() - self.started, 3),
+            "phases": {name: {key: round(value, 3) for key, value in phase.items()} for name, phase in phases.items()},
+            "hosts": {host: {**totals, "seconds": round(totals["seconds"], 3)} for host, totals in hosts.items()},
+            "endpoints": endpoints,
+        }
+    
+    def prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format.
+        
+        Returns:
+            str: Content of a textfile for the node_exporter textfile collector
+        """
+        lines = [
+            "# HELP seerr_migration_http_requests_total Outbound HTTP calls, retries included.",
+            "# TYPE seerr_migration_http_requests_total counter",
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            for (host, method, endpoint), stats in endpoints:
+                for status, count in sorted(stats["statuses"].items()):
+                    lines.append(f'seerr_migration_http_requests_total{{{prometheus_labels(host, method, endpoint)},status="{status}"}} {count}')
+            
+            for metric, key, help_text in (("http_request_bytes_total", "bytes_sent", "Bytes of request bodies sent."),
+                                           ("http_response_bytes_total", "bytes_received", "Bytes of response bodies received, decompressed."),
+                                           ("http_response_wire_bytes_total", "wire_bytes_received", "Bytes of response bodies received, as transferred.")):
+                lines += [f"# HELP seerr_migration_{metric} {help_text}", f"# TYPE seerr_migration_{metric} counter"]
+                for (host, method, endpoint), stats in endpoints:
+                    lines.append(f"seerr_migration_{metric}{{{prometheus_labels(host, method, endpoint)}}} {stats[key]}")
+            
+            lines += ["# HELP seerr_migration_http_request_duration_seconds Latency of outbound HTTP calls.",
+                      "# TYPE seerr_migration_http_request_duration_seconds histogram"]
+            for (host, method, endpoint), stats in endpoints:
+                labels = prometheus_labels(host, method, endpoint)
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+                    cumulative += count
+                    lines.append(f'seerr_migration_http_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'seerr_migration_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats["calls"]}')
+                lines.append(f"seerr_migration_http_request_duration_seconds_sum{{{labels}}} {stats['seconds']:.6f}")
+                lines.append(f"seerr_migration_http_request_duration_seconds_count{{{labels}}} {stats['calls']}")
+        
+        lines += ["# HELP seerr_migration_phase_duration_seconds Wall time spent in each phase of the migration.",
+                  "# TYPE seerr_migration_phase_duration_seconds gauge"]
+        for name, phase in self.summary()["phases"].items():
+            lines.append(f'seerr_migration_phase_duration_seconds{{phase="{name}"}} {phase["seconds"]}')
+        return "\n".join(lines) + "\n"
+
+def endpoint_template(endpoint: str) -> str:
+    """Replace the IDs in an endpoint, e.g. /user/12/settings/notifications -> /user/{id}/settings/notifications."""
+    return re.sub(r"/\d+(?=/|$)", "/{id}", endpoint)
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+def prometheus_labels(host: str, method: str, endpoint: str) -> str:
+    return f'host="{host}",method="{method}",endpoint="{endpoint}"'
+
+def start_phase(name: str) -> None:
+    """Start timing a phase of the migration in the run's metrics."""
+    if METRICS:
+        METRICS.start_phase(name)
+
+def report_metrics(log: bool = True) -> None:
+    """Write the run's metrics to METRICS_PATH and PROMETHEUS_PATH, and log where time went.
+    
+    Args:
+        log: Also log a per phase and slowest endpoints summary
+    """
+    if not METRICS or not METRICS.endpoints:
+        return
+    
+    summary = METRICS.summary()
+    if log:
+        for name, phase in summary["phases"].items():
+            logger.info(f"Phase {name}: {phase['seconds']:.1f}s, {phase['calls']} HTTP calls")
+        for host, totals in summary["hosts"].items():
+            received, wire = totals["bytes_received"], totals["wire_bytes_received"]
+            saved = f", {1 - wire / received:.0%} saved by compression" if received and wire < received else ""
+            logger.info(f"{host}: {totals['bytes_sent'] / 1e6:.2f} MB sent, {wire / 1e6:.2f} MB received ({received / 1e6:.2f} MB decompressed{saved})")
+        for stats in summary["endpoints"][:5]:
+            latency = stats["latency_ms"]
+            logger.info(f"{stats['method']} {stats['endpoint']} on {stats['host']}: {stats['calls']} calls, {stats['seconds']:.1f}s total, "
+                        f"p50 {latency['p50']:.0f}ms, p99 {latency['p99']:.0f}ms")
+    
+    # Files are swapped in whole so readers (e.g. the textfile collector) never see a partial one
+    for path, content in ((METRICS_PATH, json.dumps(summary, indent=2)), (PROMETHEUS_PATH, METRICS.prometheus() if PROMETHEUS_PATH else None)):
+        if not path or content is None:
+            continue
+        try:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to '{path}': {str(e)}")
+
+class RateLimiter:
+    """Adaptive token bucket limiting the request rate to a single host.
+    
+    The rate starts at the configured limit, or unlimited. When the host
+    throttles (429) the host is paused for its Retry-After and the rate is
+    halved, at most once per DECREASE_INTERVAL (or Retry-After) so a burst
+    of 429s counts as one. While calls succeed the rate then doubles every
+    INCREASE_INTERVAL back to the rate it was throttled at, and keeps
+    growing more slowly past it, up to the configured limit. A 503 means
+    the host is down rather than overloaded: it is only retried with
+    backoff and leaves the rate alone.
+    """
+    
+    # Lowest rate (requests per second) the limiter backs off to
+    MIN_RATE = 0.5
+    
+    # Window (seconds) the request rate is measured over, to start from it when throttled while unlimited
+    WINDOW = 1.0
+    
+    # Shortest time (seconds) between two rate decreases
+    DECREASE_INTERVAL = 5.0
+    
+    # Time (seconds) between two rate increases while calls succeed
+    INCREASE_INTERVAL = 0.5
+    
+    # Rate growth per increase, up to the rate last throttled at and past it
+    RECOVERY_FACTOR = 2.0
+    PROBE_FACTOR = 1.5
+    
+    def __init__(self, name: str, max_rate: Optional[float] = None):
+        """Create a limiter.
+        
+        Args:
+            name: Host name, for logging
+            max_rate: Maximum requests per second, None or 0 for no limit
+        """
+        self.name = name
+        self.max_rate = max_rate or None
+        self.rate = self.max_rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.window_start = self.updated
+        self.window_count = 0
+        self.window_rate = 0.0
+        # Rate the host last throttled at, and when the rate may next change
+        self.ceiling = 0.0
+        self.decrease_after = 0.0
+        self.increase_after = 0.0
+        self.lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """Take a token for one request.
+        
+        Returns:
+            float: Seconds the caller has to wait before sending the request
+        """
+        with self.lock:
+            now = time.monotonic()
+            # Count requests over a rolling window
+            if now - self.window_start > self.WINDOW:
+                self.window_rate = self.window_count / (now - self.window_start)
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            
+            pause = max(0.0, self.paused_until - now)
+            if self.rate is None:
+                return pause
+            
+            self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(pause, -self.tokens / self.rate)
+    
+    def feedback(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        """Adjust the rate to the host's answer.
+        
+        Args:
+            status_code: HTTP status of the response
+            retry_after: Seconds the host asked to wait, if any
+        """
+        with self.lock:
+            now = time.monotonic()
+            if status_code == 429:
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+                if now < self.decrease_after:
+                    return
+                # A window that just restarted holds few calls, the previous one is a floor
+                current = self.rate or max(self.window_rate, self.window_count / max(0.1, now - self.window_start))
+                self.ceiling = current
+                self.rate = max(self.MIN_RATE, current / 2)
+                self.tokens = min(self.tokens, 0.0)
+                self.decrease_after = now + max(self.DECREASE_INTERVAL, retry_after or 0.0)
+                self.increase_after = max(now, self.paused_until) + self.INCREASE_INTERVAL
+                logger.warning(f"{self.name} is throttling requests, lowering the rate to {self.rate:.1f} requests/s")
+            elif status_code < 500 and self.rate is not None and now >= self.increase_after:
+                if self.rate < self.ceiling:
+                    self.rate = min(self.ceiling, self.rate * self.RECOVERY_FACTOR)
+                else:
+                    self.rate *= self.PROBE_FACTOR
+                self.increase_after = now + self.INCREASE_INTERVAL
+                if self.max_rate:
+                    self.rate = min(self.rate, self.max_rate)
+                elif self.rate >= 2 * self.ceiling:
+                    # Well past the throttled rate without being throttled again: unlimited again
+                    self.rate = None
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header, given in seconds or as an HTTP date.
+    
+    Args:
+        value: Header value, if any
+        
+    Returns:
+        Optional[float]: Seconds to wait, capped to RETRY_AFTER_MAX, None if absent or invalid
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(RETRY_AFTER_MAX, max(0.0, seconds))
+
+def should_retry(method: str, attempt: int, retries: int, status_code: Optional[int] = None) -> bool:
+    """Decide whether a failed call is retried.
+    
+    Args:
+        method: HTTP method
+        attempt: Number of retries already made
+        retries: Maximum number of retries
+        status_code: HTTP status of the response, None if the call failed without one
+        
+    Returns:
+        bool: True if the call should be sent again
+    """
+    if attempt >= retries:
+        return False
+    if status_code is None:
+        return method in IDEMPOTENT_METHODS
+    if status_code not in RETRY_STATUSES:
+        return False
+    return method in IDEMPOTENT_METHODS or status_code == 429
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Seconds to wait before the next attempt.
+    
+    Args:
+        attempt: Number of retries already made
+        retry_after: Delay requested by the server, used when given
+        
+    Returns:
+        float: Retry-After if given, otherwise exponential backoff with full jitter
+    """
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** attempt))
+
+class BufferedResponse:
+    """Buffered response returned by the aiohttp and httpx based clients.
+    
+    Mirrors the parts of requests.Response the migration relies on, so
+    status handling is the same for every client.
+    """
+    
+    def __init__(self, method: str, url: str, status_code: int, reason: Optional[str], content: bytes, headers: Any = None):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.content = content
+        self.headers = headers or {}
+    
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+    
+    def json(self) -> Any:
+        return decode_json(self.content)
+    
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error: {self.reason} for url: {self.url}", response=self)
+    
+    def close(self) -> None:
+        """Nothing to release, the body is already read."""
+
+def decompress(content: bytes, encoding: Optional[str]) -> bytes:
+    """Decode a response body sent with a Content-Encoding.
+    
+    Args:
+        content: Body as transferred
+        encoding: Content-Encoding header, codings applied in order
+        
+    Returns:
+        bytes: The decoded body
+        
+    Raises:
+        ValueError: If a coding is not supported or the body is corrupt
+    """
+    for coding in reversed([coding.strip().lower() for coding in (encoding or "").split(",") if coding.strip()]):
+        try:
+            if coding in ("gzip", "x-gzip"):
+                content = gzip.decompress(content)
+            elif coding == "deflate":
+                # Servers send zlib wrapped or raw deflate data under this name
+                try:
+                    content = zlib.decompress(content)
+                except zlib.error:
+                    content = zlib.decompress(content, -zlib.MAX_WBITS)
+            elif coding == "br" and brotli:
+                content = brotli.decompress(content)
+            elif coding != "identity":
+                raise ValueError(f"Unsupported Content-Encoding '{coding}'")
+        except (OSError, EOFError, zlib.error) as e:
+            raise ValueError(f"Invalid {coding} response body: {str(e)}") from e
+    return content
+
+class ResponseCache:
+    """Conditional GET cache of API listings, kept in a SQLite file between runs.
+    
+    Pages of paginated listings (GETs with a take parameter) are stored with
+    their ETag / Last-Modified validators, and the next GET of the same page
+    sends them back (If-None-Match / If-Modified-Since): on a 304 the stored
+    body is reused instead of being downloaded again. Every use is validated
+    by the server. A POST, PUT or DELETE sent through a client drops the
+    stored listings it changes: /user listings for a write to a user, the
+    /request listings of the user a request is created for, and nothing for
+    per-user settings. The least recently used pages are pruned past
+    max_entries.
+    """
+    
+    # Number of writes between commits / size checks of the SQLite file
+    FLUSH_INTERVAL = 200
+    
+    def __init__(self, path: str, max_entries: int = HTTP_CACHE_SIZE):
+        """Open the cache.
+        
+        Args:
+            path: SQLite file path
+            max_entries: Maximum number of pages kept in the file
+        """
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.pending_writes = 0
+        self.reused = 0
+        self.bytes_reused = 0
+        self.db = None
+        
+        try:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS http_responses ("
+                "url TEXT PRIMARY KEY, base_url TEXT NOT NULL, path TEXT NOT NULL, owner TEXT, etag TEXT, last_modified TEXT, "
+                "body BLOB NOT NULL, used_at REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS http_responses_path ON http_responses (base_url, path)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS http_responses_used_at ON http_responses (used_at)")
+            self.prune()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open HTTP cache '{path}', responses won't be cached: {str(e)}")
+            self.db = None
+    
+    def prepare(self, base_url: str, method: str, endpoint: str, params: Optional[Dict[str, Any]],
+                body: Any = None) -> Tuple[Optional[Tuple[str, str, str, Optional[str]]], Optional[Tuple[Dict[str, str], bytes]]]:
+        """Look up the stored page of a listing GET, or invalidate the listings a write changes.
+        
+        Args:
+            base_url: Base URL of the client sending the request
+            method: HTTP method
+            endpoint: API endpoint
+            params: Query parameters of the request
+            body: JSON body of a write
+            
+        Returns:
+            Tuple: The cache key (url, base_url, endpoint, requestedBy), None if
+            the request isn't cached, and the stored (validator headers, body),
+            None when nothing is stored. The body is read here, so a later
+            invalidation can't lose it.
+        """
+        if self.db is None:
+            return None, None
+        if method != "GET":
+            self.invalidate(base_url, endpoint, body)
+            return None, None
+        if not params or "take" not in params:
+            return None, None
+        
+        url = f"{base_url}{endpoint}?{urlencode(sorted((key, str(value)) for key, value in params.items()))}"
+        owner = params.get("requestedBy")
+        key = (url, base_url, endpoint, None if owner is None else str(owner))
+        with self.lock:
+            row = self.db.execute("SELECT etag, last_modified, body FROM http_responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return key, None
+        validators = {}
+        if row[0]:
+            validators["If-None-Match"] = row[0]
+        if row[1]:
+            validators["If-Modified-Since"] = row[1]
+        return key, (validators, row[2])
+    
+    def complete(self, key: Tuple[str, str, str, Optional[str]], cached: Optional[Tuple[Dict[str, str], bytes]], response: Any) -> Any:
+        """Store a listing page, or answer a 304 with the stored body.
+        
+        Args:
+            key: Cache key returned by prepare()
+            cached: Stored page returned by prepare()
+            response: Response of the request
+            
+        Returns:
+            The response, or a 200 BufferedResponse with the stored body when it
+            was still valid. A 304 with nothing stored is returned as is.
+        """
+        url = key[0]
+        if response.status_code == 304 and cached:
+            body = cached[1]
+            with self.lock:
+                self.reused += 1
+                self.bytes_reused += len(body)
+                self.db.execute("UPDATE http_responses SET used_at = ? WHERE url = ?", (time.time(), url))
+                self._written()
+            logger.debug("Reused the cached response of %s", url)
+            return BufferedResponse("GET", str(response.url), 200, "OK", body, response.headers)
+        
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            with self.lock:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO http_responses (url, base_url, path, owner, etag, last_modified, body, used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*key, etag, last_modified, response.content, time.time())
+                )
+                self._written()
+        return response
+    
+    def invalidate(self, base_url: str, endpoint: str, body: Any = None) -> None:
+        """Drop the stored listings a write to an endpoint changes.
+        
+        Args:
+            base_url: Base URL of the client sending the write
+            endpoint: API endpoint written to, e.g. /user or /user/12
+            body: JSON body of the write; a userId limits /request invalidation to that user's listings
+        """
+        parts = endpoint.strip("/").split("/")
+        # Per-user settings (e.g. /user/12/settings/notifications) aren't part of any listing
+        if len(parts) > 2 and parts[2] == "settings":
+            return
+        path = f"/{parts[0]}"
+        owner = body.get("userId") if isinstance(body, dict) else None
+        with self.lock:
+            if owner is None:
+                cursor = self.db.execute("DELETE FROM http_responses WHERE base_url = ? AND path = ?", (base_url, path))
+            else:
+                cursor = self.db.execute("DELETE FROM http_responses WHERE base_url = ? AND path = ? AND (owner IS NULL OR owner = ?)",
+                                         (base_url, path, str(owner)))
+            if cursor.rowcount:
+                logger.debug("Dropped %s cached %s pages of %s", cursor.rowcount, path, base_url)
+                self._written()
+    
+    def _written(self) -> None:
+        self.pending_writes += 1
+        if self.pending_writes >= self.FLUSH_INTERVAL:
+            self.prune()
+    
+    def prune(self) -> None:
+        """Trim the file to max_entries, least recently used first, and commit. Caller holds the lock."""
+        count = self.db.execute("SELECT COUNT(*) FROM http_responses").fetchone()[0]
+        if count > self.max_entries:
+            self.db.execute(
+                "DELETE FROM http_responses WHERE rowid IN (SELECT rowid FROM http_responses ORDER BY used_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        self.db.commit()
+        self.pending_writes = 0
+    
+    def close(self) -> None:
+        with self.lock:
+            if self.db is not None:
+                self.prune()
+                self.db.close()
+                self.db = None
+        if self.reused:
+            logger.info(f"HTTP cache: {self.reused} unchanged pages reused, {self.bytes_reused / 1e6:.2f} MB not downloaded again")
+
+class ApiClient:
+    """Pooled HTTP client for a single API host.
+    
+    Connections are kept alive between calls, the API key is injected into
+    every request and default timeouts are applied. Calls are paced by a
+    RateLimiter and retried with backoff on transient failures.
+    """
+    
+    def __init__(self, base_url: str, api_key: Optional[str] = None, params: Optional[Dict[str, Any]] = None,
+                 timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT), pool_size: int = POOL_SIZE,
+                 max_in_flight: Optional[int] = None, retries: int = RETRIES, rate_limit: Optional[float] = RATE_LIMIT,
+                 response_cache: Optional[ResponseCache] = None):
+        """Create a client for one host.
+        
+        Args:
+            base_url: Base URL that endpoints are appended to
+            api_key: Value sent in the X-Api-Key header, if any
+            params: Query parameters sent with every request (e.g. TMDB api_key)
+            timeout: Default (connect, read) timeouts in seconds
+            pool_size: Maximum number of pooled connections to the host
+            max_in_flight: Maximum number of concurrent requests to the host, defaults to pool_size
+            retries: Number of times a failed call is retried
+            rate_limit: Maximum requests per second, None or 0 for no limit until the host throttles
+            response_cache: Conditional GET cache of the host's responses, if any
+        """
+        self.base_url = base_url.rstrip('/')
+        self.host = urlparse(self.base_url).netloc
+        self.timeout = timeout
+        self.params = params or {}
+        self.retries = retries
+        self.limiter = RateLimiter(self.base_url, rate_limit)
+        self.response_cache = response_cache
+        
+        self.headers = {"Accept-Encoding": ACCEPT_ENCODING, **({"X-Api-Key": api_key} if api_key else {})}
+        self.session = self.open_session(pool_size)
+        self.in_flight = threading.BoundedSemaphore(max_in_flight or pool_size)
+    
+    def open_session(self, pool_size: int) -> Any:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.headers)
+        return session
+    
+    def request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Send a request to the host using the pooled session.
+        
+        Transient failures are retried (see should_retry), waiting for the
+        server's Retry-After or a jittered exponential backoff in between.
+        With a response cache, GETs are sent conditionally (see ResponseCache).
+        
+        Args:
+            method: HTTP method
+            endpoint: API endpoint, appended to the base URL
+            **kwargs: Extra arguments passed to requests (json, params, timeout...)
+            
+        Returns:
+            requests.Response: The raw response of the last attempt, status is not checked
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self.params:
+            kwargs["params"] = {**self.params, **(kwargs.get("params") or {})}
+        cache_key, cached = self.response_cache.prepare(self.base_url, method, endpoint, kwargs.get("params"), kwargs.get("json")) if self.response_cache else (None, None)
+        if cached:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **cached[0]}
+        
+        attempt = 0
+        while True:
+            wait_time = self.limiter.reserve()
+            if wait_time > 0:
+                time.sleep(wait_time)
+            
+            try:
+                with self.in_flight:
+                    r = self.send(method, endpoint, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not should_retry(method, attempt, self.retries):
+                    raise
+                delay = retry_delay(attempt)
+                logger.warning(f"{method} {endpoint} failed: {str(e)}, retrying in {delay:.1f}s ({attempt + 1}/{self.retries})")
+            else:
+                retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                self.limiter.feedback(r.status_code, retry_after)
+                if r.status_code == 304 and not cached:
+                    # A 304 to a GET sent without validators (e.g. by a caching proxy) has no body to reuse
+                    if attempt >= self.retries:
+                        raise RequestException(f"{method} {endpoint} returned 304 Not Modified without a cached response")
+                    kwargs["headers"] = {**(kwargs.get("headers") or {}), "Cache-Control": "no-cache"}
+                    delay = retry_delay(attempt)
+                elif not should_retry(method, attempt, self.retries, r.status_code):
+                    return self.response_cache.complete(cache_key, cached, r) if cache_key else r
+                else:
+                    delay = retry_delay(attempt, retry_after)
+                logger.warning(f"{method} {endpoint} returned {r.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{self.retries})")
+                r.close()
+            
+            time.sleep(delay)
+            attempt += 1
+    
+    def send(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Send a single attempt of a request. See request()."""
+        start = time.perf_counter()
+        try:
+            r = self.session.request(method, f"{self.base_url}{endpoint}", **kwargs)
+        except RequestException:
+            if METRICS:
+                METRICS.record(self.host, method, endpoint, None, 0, 0, time.perf_counter() - start)
+            raise
+        if METRICS:
+            body = r.request.body or b""
+            # Bytes read from the connection, before decompression
+            wire = r.raw.tell() if hasattr(r.raw, "tell") else None
+            METRICS.record(self.host, method, endpoint, r.status_code, len(body), len(r.content), time.perf_counter() - start, wire)
+        return r
+    
+    def get(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request("GET", endpoint, **kwargs)
+    
+    def post(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request("POST", endpoint, **kwargs)
+    
+    def put(self, endpoint: str, **kwargs) -> requests.Response:
+        return self.request("PUT", endpoint, **kwargs)
+    
+    def close(self) -> None:
+        self.session.close()
+
+def note_http_version(client: Any, version: str) -> None:
+    """Log the HTTP version an httpx based client talks to its host, when it changes."""
+    if client.http_version != version:
+        client.http_version = version
+        logger.info(f"Talking {version} to {client.host}")
+
+class Http2ApiClient(ApiClient):
+    """ApiClient sending its calls with httpx, over HTTP/2 when the host supports it.
+    
+    Concurrent calls are multiplexed over a single connection instead of a
+    pool of HTTP/1.1 connections. HTTP/2 is negotiated with TLS (ALPN), so
+    plain http:// hosts are still reached over HTTP/1.1. httpx errors are
+    raised as the matching requests exceptions.
+    """
+    
+    def open_session(self, pool_size: int) -> Any:
+        self.http_version = None
+        return httpx.Client(http2=True, headers=self.headers, limits=httpx.Limits(max_connections=pool_size))
+    
+    def send(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, json: Any = None,
+             timeout: Any = None, headers: Optional[Dict[str, str]] = None) -> BufferedResponse:
+        """Send a single attempt of a request. See request()."""
+        url = f"{self.base_url}{endpoint}"
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        body = encode_json(json) if json is not None else None
+        if body is not None:
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+        start = time.perf_counter()
+        try:
+            r = self.session.request(method, url, params=params, content=body, headers=headers, timeout=httpx.Timeout(read, connect=connect))
+        except httpx.DecodingError as e:
+            if METRICS:
+                METRICS.record(self.host, method, endpoint, None, 0, 0, time.perf_counter() - start)
+            raise requests.exceptions.ContentDecodingError(f"{method} {url}: {str(e)}") from e
+        except httpx.TransportError as e:
+            if METRICS:
+                METRICS.record(self.host, method, endpoint, None, 0, 0, time.perf_counter() - start)
+            if isinstance(e, httpx.TimeoutException):
+                raise requests.exceptions.Timeout(f"{method} {url} timed out") from e
+            raise requests.exceptions.ConnectionError(f"{method} {url} failed: {str(e)}") from e
+        if METRICS:
+            METRICS.record(self.host, method, endpoint, r.status_code, len(body or b""), len(r.content), time.perf_counter() - start, r.num_bytes_downloaded)
+        note_http_version(self, r.http_version)
+        return BufferedResponse(method, str(r.url), r.status_code, r.reason_phrase, r.content, r.headers)
+
+class TmdbCache:
+    """Cache of TMDB media details keyed by (media_type, tmdb_id).
+    
+    An in-process LRU sits in front of an optional SQLite file, so titles
+    are reused across users and across runs. Entries expire after a TTL and
+    the file is pruned to a maximum number of entries (oldest first).
+    """
+    
+    # Number of writes between commits / size checks of the SQLite file
+    FLUSH_INTERVAL = 200
+    
+    def __init__(self, path: Optional[str], ttl_days: float = TMDB_CACHE_TTL_DAYS, max_entries: int = TMDB_CACHE_SIZE,
+                 memory_entries: int = TMDB_CACHE_MEMORY_SIZE):
+        """Open the cache.
+        
+        Args:
+            path: SQLite file path, None or empty to keep the cache in memory only
+            ttl_days: Days after which an entry is refetched
+            max_entries: Maximum number of entries kept in the SQLite file
+            memory_entries: Maximum number of entries kept in memory
+        """
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.pending_writes = 0
+        self.db = None
+        
+        if path:
+            try:
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS tmdb_cache ("
+                    "media_type TEXT NOT NULL, tmdb_id INTEGER NOT NULL, data TEXT NOT NULL, fetched_at REAL NOT NULL, "
+                    "PRIMARY KEY (media_type, tmdb_id))"
+                )
+                self.db.execute("CREATE INDEX IF NOT EXISTS tmdb_cache_fetched_at ON tmdb_cache (fetched_at)")
+                self.prune()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not open TMDB cache '{path}', using memory only: {str(e)}")
+                self.db = None
+    
+    def get(self, media_type: str, tmdb_id: int) -> Optional[Dict[str, Any]]:
+        """Get cached media details.
+        
+        Args:
+            media_type: Type of media ('movie' or 'tv')
+            tmdb_id: TMDB ID of the media
+            
+        Returns:
+            Optional[Dict[str, Any]]: Cached details, None on a miss or expired entry
+        """
+        key = (media_type, tmdb_id)
+        oldest = time.time() - self.ttl
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[1] >= oldest:
+                    self.memory.move_to_end(key)
+                    return entry[0]
+                del self.memory[key]
+            
+            if self.db is None:
+                return None
+            row = self.db.execute(
+                "SELECT data, fetched_at FROM tmdb_cache WHERE media_type = ? AND tmdb_id = ? AND fetched_at >= ?",
+                (media_type, tmdb_id, oldest)
+            ).fetchone()
+            if row is None:
+                return None
+            details = json.loads(row[0])
+            self._remember(key, details, row[1])
+            return details
+    
+    def put(self, media_type: str, tmdb_id: int, details: Dict[str, Any]) -> None:
+        """Store media details.
+        
+        Args:
+            media_type: Type of media ('movie' or 'tv')
+            tmdb_id: TMDB ID of the media
+            details: Media details to cache
+        """
+        now = time.time()
+        with self.lock:
+            self._remember((media_type, tmdb_id), details, now)
+            if self.db is None:
+                return
+            self.db.execute(
+                "INSERT OR REPLACE INTO tmdb_cache (media_type, tmdb_id, data, fetched_at) VALUES (?, ?, ?, ?)",
+                (media_type, tmdb_id, json.dumps(details), now)
+            )
+            self.pending_writes += 1
+            if self.pending_writes >= self.FLUSH_INTERVAL:
+                self.prune()
+    
+    def _remember(self, key: Tuple[str, int], details: Dict[str, Any], fetched_at: float) -> None:
+        self.memory[key] = (details, fetched_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+    
+    def prune(self) -> None:
+        """Drop expired entries, trim the file to max_entries and commit. Caller holds the lock."""
+        self.db.execute("DELETE FROM tmdb_cache WHERE fetched_at < ?", (time.time() - self.ttl,))
+        count = self.db.execute("SELECT COUNT(*) FROM tmdb_cache").fetchone()[0]
+        if count > self.max_entries:
+            self.db.execute(
+                "DELETE FROM tmdb_cache WHERE rowid IN (SELECT rowid FROM tmdb_cache ORDER BY fetched_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        self.db.commit()
+        self.pending_writes = 0
+    
+    def close(self) -> None:
+        with self.lock:
+            if self.db is not None:
+                self.prune()
+                self.db.close()
+                self.db = None
+
+class MigrationJournal:
+    """Append-only checkpoint journal of an in-progress migration.
+    
+    One JSON object is written per line for every user whose migration
+    completed and every request created in Jellyseerr (Overseerr request ID
+    -> Jellyseerr request ID). Lines are flushed and synced to disk as they
+    are written, so a crash loses at most the line being written. A resumed
+    run loads the journal and skips everything already recorded.
+    """
+    
+    def __init__(self, path: str, resume: bool = False):
+        """Open the journal.
+        
+        Args:
+            path: Journal file path
+            resume: Load the existing journal and append to it, instead of starting a new one
+        """
+        self.path = path
+        self.completed_users: Dict[int, int] = {}
+        self.created_requests: Dict[int, int] = {}
+        self.lock = threading.Lock()
+        
+        if resume and os.path.exists(path):
+            self.load()
+            logger.info(f"Resuming from journal '{path}': {len(self.completed_users)} users and {len(self.created_requests)} requests already migrated")
+        
+        self.file = open(path, "a" if resume else "w", encoding="utf-8")
+    
+    def load(self) -> None:
+        """Read the records of a previous run, ignoring a truncated last line."""
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring unreadable line {line_number} of journal '{self.path}'")
+                    continue
+                if entry.get("type") == "user":
+                    self.completed_users[entry["source_id"]] = entry["target_id"]
+                elif entry.get("type") == "request":
+                    self.created_requests[entry["source_id"]] = entry["target_id"]
+    
+    def write(self, entry: Dict[str, Any]) -> None:
+        with self.lock:
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+    
+    def user_done(self, source_id: int) -> bool:
+        return source_id in self.completed_users
+    
+    def request_done(self, source_id: int) -> bool:
+        return source_id in self.created_requests
+    
+    def record_user(self, source_id: int, target_id: int, email: str) -> None:
+        """Record a user whose migration completed.
+        
+        Args:
+            source_id: Overseerr user ID
+            target_id: Jellyseerr user ID
+            email: Email of the user, for readability of the journal
+        """
+        self.completed_users[source_id] = target_id
+        self.write({"type": "user", "source_id": source_id, "target_id": target_id, "email": email})
+    
+    def record_request(self, source_id: int, target_id: int) -> None:
+        """Record a request created in Jellyseerr.
+        
+        Args:
+            source_id: Overseerr request ID
+            target_id: Jellyseerr request ID
+        """
+        self.created_requests[source_id] = target_id
+        self.write({"type": "request", "source_id": source_id, "target_id": target_id})
+    
+    def reset(self) -> None:
+        """Forget every record and truncate the journal file."""
+        with self.lock:
+            self.completed_users.clear()
+            self.created_requests.clear()
+            self.file.seek(0)
+            self.file.truncate()
+    
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+class SourceSnapshot:
+    """Overseerr users and requests saved to a gzip-compressed NDJSON file.
+    
+    The file holds one JSON object per line: a header, then every user and
+    every request as {"type": "user" | "request", "data": {...}}. Requests
+    are stored in the order of REQUEST_LIST_PARAMS, so delta syncs work the
+    same as against the API.
+    """
+    
+    def __init__(self, path: str):
+        """Open a snapshot.
+        
+        Args:
+            path: Snapshot file path
+            
+        Raises:
+            ValueError: If the file is not a snapshot
+            OSError: If the file can't be read
+        """
+        self.path = path
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            self.header = json.loads(f.readline() or "{}")
+        if self.header.get("type") != "snapshot":
+            raise ValueError(f"'{path}' is not an Overseerr snapshot")
+    
+    def records(self, record_type: str) -> Iterator[Dict[str, Any]]:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["type"] == record_type:
+                    yield entry["data"]
+    
+    def users(self) -> Iterator[Dict[str, Any]]:
+        return self.records("user")
+    
+    def requests(self) -> Iterator[Dict[str, Any]]:
+        return self.records("request")
+    
+    def user_pages(self, page_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the users in lists of page_size, like fetch_pages."""
+        page = []
+        for user in self.users():
+            page.append(user)
+            if len(page) >= page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+class Source:
+    """An Overseerr instance migrated from, read through its API or from a snapshot.
+    
+    Users and requests of named sources get uids prefixed with the name, so
+    IDs from several instances don't collide in the journal and indexes.
+    The source given on the command line has no name and keeps plain IDs.
+    """
+    
+    def __init__(self, name: str = "", client: Any = None, snapshot: Optional[SourceSnapshot] = None):
+        """Set up a source.
+        
+        Args:
+            name: Name of the source in the job config, empty for the command line source
+            client: ApiClient or AsyncApiClient of the Overseerr API, None when read from a snapshot
+            snapshot: Snapshot read instead of the API
+        """
+        self.name = name
+        self.client = client
+        self.snapshot = snapshot
+        # Requests modified before this date are skipped (delta sync), set for each run
+        self.since: Optional[datetime] = None
+        # Users of the --user scope, looked up once
+        self.scope_users: Optional[List[Dict[str, Any]]] = None
+    
+    @property
+    def label(self) -> str:
+        return f"Overseerr '{self.name}'" if self.name else "Overseerr"
+    
+    @property
+    def watermark_key(self) -> str:
+        return f"source:{self.name}" if self.name else "source"
+    
+    def uid(self, record_id: int) -> Any:
+        return f"{self.name}:{record_id}" if self.name else record_id
+    
+    def requests(self) -> Iterator[Dict[str, Any]]:
+        """Stream the requests in SCOPE, newest modification first."""
+        if not SCOPE:
+            if self.snapshot:
+                # Snapshots hold requests of every status
+                return (request for request in self.snapshot.requests() if matches_request_filter(request, REQUEST_LIST_PARAMS["filter"]))
+            return fetch_data(self.client, "/request", REQUEST_LIST_PARAMS)
+        if self.snapshot:
+            requests_list = self.snapshot.requests()
+        elif SCOPE.users:
+            # One listing per user, merged back into a single newest-first stream
+            requests_list = heapq.merge(*(fetch_data(self.client, "/request", {**SCOPE.request_params(), "requestedBy": user["id"]}) for user in self.users_in_scope()),
+                                        key=modified_at, reverse=True)
+        else:
+            requests_list = fetch_data(self.client, "/request", SCOPE.request_params())
+        return SCOPE.requests(requests_list, self)
+    
+    def user_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        if SCOPE and SCOPE.users:
+            return iter([self.users_in_scope()])
+        if self.snapshot:
+            return self.snapshot.user_pages(PAGE_SIZE)
+        return fetch_pages(self.client, "/user", {})
+    
+    def users_in_scope(self) -> List[Dict[str, Any]]:
+        """Look up the users of the --user scope.
+        
+        Users listed by ID are fetched directly; users listed by email are
+        found by walking the user list, which stops once all are found.
+        
+        Returns:
+            List[Dict[str, Any]]: The users found in this source
+            
+        Raises:
+            RequestException: If the API request fails
+        """
+        if self.scope_users is not None:
+            return self.scope_users
+        if self.snapshot:
+            self.scope_users = [user for user in self.snapshot.users() if SCOPE.matches_user(user, self)]
+            return self.scope_users
+        
+        users = {}
+        for user_id in SCOPE.user_ids(self):
+            r = self.client.get(f"/user/{user_id}")
+            if r.status_code == 404:
+                logger.warning(f"User ID {user_id} not found in {self.label}")
+                continue
+            r.raise_for_status()
+            users[user_id] = r.json()
+        emails = set(SCOPE.emails)
+        if emails:
+            for page in fetch_pages(self.client, "/user", {}):
+                for user in page:
+                    email = normalize_user_key(user.get("email"))
+                    if email in emails:
+                        users[user["id"]] = user
+                        emails.discard(email)
+                if not emails:
+                    break
+        for email in emails:
+            logger.info(f"No user with email '{email}' in {self.label}")
+        self.scope_users = list(users.values())
+        logger.info(f"Found {len(self.scope_users)} users in scope in {self.label}")
+        return self.scope_users
+
+def matches_request_filter(request: Dict[str, Any], request_filter: str) -> bool:
+    """Check if an Overseerr request filter (e.g. 'unavailable') lists a request, as the API does.
+    
+    Args:
+        request: Request data including status and media.status
+        request_filter: Key of REQUEST_FILTERS
+        
+    Returns:
+        bool: True if the filter lists the request, False otherwise
+    """
+    statuses, media_statuses = REQUEST_FILTERS[request_filter]
+    if statuses is not None and request.get("status") not in statuses:
+        return False
+    return media_statuses is None or (request.get("media") or {}).get("status") in media_statuses
+
+def request_filter_within(request_filter: str, other: str) -> bool:
+    """Check if every request listed by an Overseerr request filter is also listed by another one."""
+    statuses, media_statuses = REQUEST_FILTERS[request_filter]
+    other_statuses, other_media_statuses = REQUEST_FILTERS[other]
+    return ((other_statuses is None or (statuses is not None and statuses <= other_statuses)) and
+            (other_media_statuses is None or (media_statuses is not None and media_statuses <= other_media_statuses)))
+
+class MigrationScope:
+    """Users and requests a targeted run is limited to, from the command line.
+    
+    Filters the Overseerr API supports are sent as query parameters: the
+    request status (filter), the media type (mediaType) and, when users are
+    listed, one requestedBy listing per user. The others (4K, creation date
+    range, user emails in snapshots) are applied while streaming, and so
+    are all of them for snapshots.
+    """
+    
+    def __init__(self, users: Optional[List[str]] = None, media_type: Optional[str] = None, is4k: Optional[bool] = None,
+                 status: Optional[str] = None, created_after: Optional[datetime] = None, created_before: Optional[datetime] = None):
+        """Set up a scope.
+        
+        Args:
+            users: Emails, Overseerr user IDs or named source uids (e.g. 'main:12') of the users to migrate
+            media_type: 'movie' or 'tv', None for both
+            is4k: True for 4K requests only, False for non-4K requests only, None for both
+            status: Overseerr request filter (e.g. 'pending'), None for REQUEST_LIST_PARAMS
+            created_after: Only requests created at or after this date
+            created_before: Only requests created before this date
+        """
+        self.emails = {normalize_user_key(user) for user in users or [] if "@" in user}
+        self.ids = {user.strip() for user in users or [] if "@" not in user}
+        self.media_type = media_type
+        self.is4k = is4k
+        self.status = status
+        self.created_after = created_after
+        self.created_before = created_before
+    
+    @property
+    def users(self) -> bool:
+        return bool(self.emails or self.ids)
+    
+    def request_params(self) -> Dict[str, Any]:
+        """Query parameters listing the requests in scope, newest modification first."""
+        params = dict(REQUEST_LIST_PARAMS)
+        if self.status:
+            params["filter"] = self.status
+        if self.media_type:
+            params["mediaType"] = self.media_type
+        return params
+    
+    def user_ids(self, source: Source) -> List[int]:
+        """IDs of a source's users listed by ID, plain or as uids of that source."""
+        ids = []
+        for value in self.ids:
+            name, _, record_id = value.rpartition(":")
+            if name in ("", source.name) and record_id.isdigit():
+                ids.append(int(record_id))
+        return ids
+    
+    def matches_user(self, user: Dict[str, Any], source: Source) -> bool:
+        if not self.users:
+            return True
+        return normalize_user_key(user.get("email")) in self.emails or str(source.uid(user.get("id"))) in self.ids or str(user.get("id")) in self.ids
+    
+    def matches_request(self, request: Dict[str, Any], source: Source) -> bool:
+        if not matches_request_filter(request, self.status or REQUEST_LIST_PARAMS["filter"]):
+            return False
+        media = request.get("media", {})
+        if self.media_type and media.get("mediaType") != self.media_type:
+            return False
+        if self.is4k is not None and bool(request.get("is4k")) != self.is4k:
+            return False
+        if self.created_after or self.created_before:
+            created = parse_timestamp(request["createdAt"])
+            if (self.created_after and created < self.created_after) or (self.created_before and created >= self.created_before):
+                return False
+        return self.matches_user(request.get("requestedBy") or {}, source)
+    
+    def requests(self, requests_list: Iterable[Dict[str, Any]], source: Source) -> Iterator[Dict[str, Any]]:
+        """Stream the requests in scope from requests listed newest modification first.
+        
+        A request is modified after it is created, so the stream stops at the
+        first request modified before created_after.
+        
+        Args:
+            requests_list: Requests sorted by modification date, newest first
+            source: Overseerr instance the requests come from
+            
+        Yields:
+            Requests in scope
+        """
+        for request in requests_list:
+            if self.created_after and modified_at(request) < self.created_after:
+                return
+            if self.matches_request(request, source):
+                yield request
+
+def load_job_config(path: str) -> Dict[str, Any]:
+    """Read a job config listing several Overseerr sources for one Jellyseerr target.
+    
+    The file is JSON: {"target": {"url", "api_key"}, "sources": [{"name",
+    "url", "api_key"} or {"name", "snapshot"}, ...]}. Any entry may also set
+    its own "rate_limit" in requests per second.
+    
+    Args:
+        path: Job config file path
+        
+    Returns:
+        Dict[str, Any]: The validated config
+        
+    Raises:
+        ValueError: If the file is not a valid job config
+        OSError: If the file can't be read
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    
+    target = config.get("target") if isinstance(config, dict) else None
+    if not isinstance(target, dict) or not target.get("url") or not target.get("api_key"):
+        raise ValueError("'target' must have a 'url' and an 'api_key'")
+    sources = config.get("sources")
+    if not isinstance(sources, list) or not sources:
+        raise ValueError("'sources' must list at least one Overseerr instance")
+    
+    names = set()
+    for index, source in enumerate(sources, 1):
+        if not isinstance(source, dict):
+            raise ValueError(f"Source {index} must be an object")
+        name = source.get("name") or ""
+        if len(sources) > 1 and not name:
+            raise ValueError(f"Source {index} needs a 'name' when several sources are listed")
+        if name in names:
+            raise ValueError(f"Source name '{name}' is used twice")
+        names.add(name)
+        if not source.get("snapshot") and not (source.get("url") and source.get("api_key")):
+            raise ValueError(f"Source '{name or index}' needs a 'url' and an 'api_key', or a 'snapshot'")
+    return config
+
+def create_snapshot(path: str) -> bool:
+    """Save every Overseerr user and request to a snapshot file.
+    
+    Requests of every status are saved, so any --status can be migrated
+    from the snapshot. The file is written next to its destination and renamed once complete,
+    so an interrupted snapshot never replaces a good one.
+    
+    Args:
+        path: Snapshot file path
+        
+    Returns:
+        bool: True if the snapshot was written, False otherwise
+    """
+    counts = {"user": 0, "request": 0}
+    
+    def write(f, record_type: str, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            f.write(json.dumps({"type": record_type, "data": record}) + "\n")
+            counts[record_type] += 1
+    
+    try:
+        with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "snapshot", "source": SOURCE_CLIENT.base_url, "created_at": datetime.now(timezone.utc).isoformat()}) + "\n")
+            write(f, "user", fetch_data(SOURCE_CLIENT, "/user", {}))
+            write(f, "request", fetch_data(SOURCE_CLIENT, "/request", {**REQUEST_LIST_PARAMS, "filter": "all"}))
+        os.replace(f"{path}.tmp", path)
+    except (RequestException, OSError) as e:
+        logger.error(f"Failed to create snapshot '{path}': {str(e)}")
+        return False
+    
+    logger.info(f"Saved {counts['user']} users and {counts['request']} requests from Overseerr to '{path}'")
+    return True
+
+# Add command-line arguments
+def parse_args():
+    parser = argparse.ArgumentParser()
+    
+    # Add command argument
+    parser.add_argument('command', nargs='?', choices=['migrate', 'snapshot', 'restore-notifications'], default='migrate',
+                        help='migrate (default), snapshot to save the Overseerr users and requests to a file, or restore-notifications to restore the notification settings saved by an interrupted run')
+
+    # Add source argument
+    parser.add_argument('-s', '--source', help='The URL source from which to retrieve data (Overseerr)')
+
+    # Add source API key argument
+    parser.add_argument('-k', '--source_api_key', help='The API Key for the source (Overseerr)')
+
+    # Add target argument
+    parser.add_argument('-t', '--target', help='The URL target where to send data (Jellyseerr)')
+    
+    # Add target API key argument
+    parser.add_argument('-a', '--target_api_key', help='The API Key for the target (Jellyseerr)')
+
+    # Add TMDB API key argument (optional)
+    parser.add_argument('-m', '--tmdb_api_key', help='The API Key for TMDB (optional)', required=False)
+    
+    # Add debug flag
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
+
+    # Add connection pool size argument
+    parser.add_argument('--pool_size', type=int, default=POOL_SIZE, help=f'Number of keep-alive connections per host (default: {POOL_SIZE})')
+
+    # Add per-host in-flight limit argument
+    parser.add_argument('--max_in_flight', type=int, help='Maximum concurrent requests per host (default: pool size)')
+
+    # Add rate limit, retry and timeout arguments
+    parser.add_argument('--rate_limit', type=float, default=RATE_LIMIT, help='Maximum requests per second per host, lowered automatically when a host throttles (default: no limit)')
+    parser.add_argument('--retries', type=int, default=RETRIES, help=f'Number of times a failed call is retried with backoff (default: {RETRIES})')
+    parser.add_argument('--connect_timeout', type=float, default=CONNECT_TIMEOUT, help=f'Seconds to wait for a connection to a host (default: {CONNECT_TIMEOUT})')
+    parser.add_argument('--read_timeout', type=float, default=READ_TIMEOUT, help=f'Seconds to wait for a response from a host (default: {READ_TIMEOUT})')
+
+    # Add workers argument
+    parser.add_argument('-w', '--workers', type=int, default=WORKERS, help=f'Number of users migrated in parallel (default: {WORKERS})')
+
+    # Add engine argument
+    parser.add_argument('-e', '--engine', choices=['sync', 'async'], default='sync', help='Migration engine: threaded requests (sync) or asyncio/aiohttp (async) (default: sync)')
+
+    # Add HTTP/2 argument
+    parser.add_argument('--http2', action='store_true', help="Talk HTTP/2 to hosts that support it, multiplexing calls over one connection per host (needs the 'httpx' and 'h2' packages)")
+
+    # Add media server import argument
+    parser.add_argument('--skip_media_server_import', action='store_true', help='Always create local Jellyseerr users instead of importing Jellyfin/Emby accounts with the same name')
+
+    # Add TMDB cache arguments
+    parser.add_argument('--http_cache', default=HTTP_CACHE_PATH, help=f'SQLite file keeping Overseerr/Jellyseerr responses between runs, revalidated with conditional GETs, empty to disable (default: {HTTP_CACHE_PATH})')
+    parser.add_argument('--tmdb_cache', default=TMDB_CACHE_PATH, help=f'SQLite file caching TMDB titles between runs, empty to cache in memory only (default: {TMDB_CACHE_PATH})')
+    parser.add_argument('--tmdb_cache_ttl', type=float, default=TMDB_CACHE_TTL_DAYS, help=f'Days before a cached TMDB title is refetched (default: {TMDB_CACHE_TTL_DAYS})')
+    parser.add_argument('--tmdb_cache_size', type=int, default=TMDB_CACHE_SIZE, help=f'Maximum number of titles kept in the TMDB cache file (default: {TMDB_CACHE_SIZE})')
+
+    # Add TMDB prefetch concurrency argument
+    parser.add_argument('--tmdb_concurrency', type=int, default=TMDB_CONCURRENCY, help=f'Number of TMDB titles fetched in parallel before migrating requests (default: {TMDB_CONCURRENCY})')
+
+    # Add verification argument
+    parser.add_argument('--verify', choices=['inline', 'deferred', 'off'], default=VERIFY, help=f'Check created requests one by one (inline), in a single pass after the migration (deferred) or not at all (off) (default: {VERIFY})')
+
+    # Add checkpoint journal arguments
+    parser.add_argument('--journal', default=JOURNAL_PATH, help=f'File recording migrated users and requests, used by --resume (default: {JOURNAL_PATH})')
+    parser.add_argument('--resume', action='store_true', help='Skip users and requests recorded in the journal by an interrupted run')
+
+    # Add scoping arguments
+    parser.add_argument('-u', '--user', action='append', metavar='EMAIL_OR_ID', help='Only migrate this Overseerr user, by email or ID (name:ID for a source of a job config); can be repeated')
+    parser.add_argument('--media_type', choices=['movie', 'tv'], help='Only migrate requests for movies or for TV shows')
+    four_k = parser.add_mutually_exclusive_group()
+    four_k.add_argument('--only_4k', action='store_true', help='Only migrate 4K requests')
+    four_k.add_argument('--skip_4k', action='store_true', help='Only migrate non-4K requests')
+    parser.add_argument('--status', choices=['pending', 'approved', 'processing', 'unavailable', 'available', 'failed', 'all'],
+                        help=f'Only migrate requests with this Overseerr status (default: {REQUEST_LIST_PARAMS["filter"]})')
+    parser.add_argument('--created_after', metavar='DATE', help='Only migrate requests created at or after this ISO 8601 date')
+    parser.add_argument('--created_before', metavar='DATE', help='Only migrate requests created before this ISO 8601 date')
+
+    # Add delta sync arguments
+    parser.add_argument('--since', nargs='?', const='last', help='Only migrate requests created or updated since this ISO 8601 date, or since the last successful run when no date is given')
+    parser.add_argument('--watch', type=float, metavar='INTERVAL', help='Keep running, syncing requests changed since the previous run every INTERVAL seconds')
+    parser.add_argument('--state', default=STATE_PATH, help=f'File storing the delta sync watermarks and the Jellyseerr request index (default: {STATE_PATH})')
+    parser.add_argument('--reindex_interval', type=float, default=TARGET_INDEX_MAX_AGE, metavar='SECONDS',
+                        help=f'Seconds after which a delta sync lists every Jellyseerr request again instead of reusing the saved index, so deleted requests are dropped from it (default: {TARGET_INDEX_MAX_AGE:g})')
+
+    # Add job config argument
+    parser.add_argument('-c', '--config', metavar='PATH', help='JSON job config listing several Overseerr sources migrated in parallel into one Jellyseerr target, instead of -s/-k/-t/-a')
+
+    # Add snapshot arguments
+    parser.add_argument('-o', '--output', default=SNAPSHOT_PATH, help=f'File written by the snapshot command (default: {SNAPSHOT_PATH})')
+    parser.add_argument('--from_snapshot', '--from-snapshot', metavar='PATH', help='Read Overseerr users and requests from a snapshot file instead of the Overseerr API')
+
+    # Add notification backup argument
+    parser.add_argument('--notification_backup', default=NOTIFICATION_BACKUP_PATH, help=f'File saving the notification settings of the users silenced during the migration (default: {NOTIFICATION_BACKUP_PATH})')
+
+    # Add metrics arguments
+    parser.add_argument('--metrics', default=METRICS_PATH, help=f'JSON file summarizing the HTTP calls and time spent per phase, empty to skip it (default: {METRICS_PATH})')
+    parser.add_argument('--prometheus', metavar='PATH', help='Also write the metrics to a Prometheus textfile (e.g. for the node_exporter textfile collector)')
+
+    # Add log arguments
+    parser.add_argument('--log_file', default=LOG_PATH, help=f'File the logs are written to, empty to only log to stderr (default: {LOG_PATH})')
+    parser.add_argument('--log_format', choices=['text', 'json'], default=LOG_FORMAT, help=f'Format of the log file, json for one JSON object per line (default: {LOG_FORMAT})')
+
+    # Add page size argument
+    parser.add_argument('-p', '--page_size', type=int, default=PAGE_SIZE, help=f'Number of records fetched per page (default: {PAGE_SIZE})')
+
+    args = parser.parse_args()
+    
+    # Set logging level based on debug flag
+    if args.debug:
+        logger.setLevel(logging.DEBUG)
+    
+    return args
+
+def main() -> int:
+    """Main entry point for the migration script.
+    
+    Returns:
+        int: Exit code (0 for success, 1 for failure)
+    """
+    try:
+        args = parse_args()
+        start_logging(args.log_file, args.log_format)
+        if args.debug:
+            logger.debug("Debug logging enabled")
+
+        config = None
+        if args.config and args.command != "snapshot":
+            try:
+                config = load_job_config(args.config)
+            except (OSError, ValueError) as e:
+                logger.error(f"Invalid job config '{args.config}': {str(e)}")
+                return 1
+            args.target = config["target"]["url"]
+            args.target_api_key = config["target"]["api_key"]
+
+        if args.command == "snapshot":
+            required = [args.source, args.source_api_key]
+        elif config or args.from_snapshot or args.command == "restore-notifications":
+            required = [args.target, args.target_api_key]
+        else:
+            required = [args.source, args.source_api_key, args.target, args.target_api_key]
+        if not all(required):
+            logger.error("All arguments must be provided and cannot be empty.")
+            return 1
+
+        global SOURCE_CLIENT
+        global TARGET_CLIENT
+        global TMDB_CLIENT
+        global TMDB_APIKEY
+        global TMDB_CACHE
+        global RESPONSE_CACHE
+        global PAGE_SIZE
+        global WORKERS
+        global MEDIA_SERVER_IMPORT
+        global TMDB_CONCURRENCY
+        global JOURNAL
+        global STATE_PATH
+        global SYNC_STATE
+        global TARGET_INDEX_MAX_AGE
+        global VERIFY
+        global SOURCES
+        global SCOPE
+        global NOTIFICATION_BACKUP_PATH
+        global METRICS
+        global METRICS_PATH
+        global PROMETHEUS_PATH
+
+        METRICS = Metrics()
+        METRICS_PATH = args.metrics
+        PROMETHEUS_PATH = args.prometheus
+        PAGE_SIZE = max(1, args.page_size)
+        client_options = {
+            "timeout": (args.connect_timeout, args.read_timeout),
+            "retries": max(0, args.retries),
+            "rate_limit": args.rate_limit
+        }
+        if args.http_cache and args.command != "restore-notifications":
+            RESPONSE_CACHE = ResponseCache(args.http_cache)
+        
+        if args.command == "snapshot":
+            SOURCE_CLIENT = ApiClient(f"{args.source.rstrip('/')}/api/v1", api_key=args.source_api_key, pool_size=max(1, args.pool_size),
+                                      response_cache=RESPONSE_CACHE, **client_options)
+            start_phase("snapshot")
+            return 0 if create_snapshot(args.output) else 1
+        
+        NOTIFICATION_BACKUP_PATH = args.notification_backup
+        if args.command == "restore-notifications":
+            TARGET_CLIENT = ApiClient(f"{args.target.rstrip('/')}/api/v1", api_key=args.target_api_key, pool_size=max(1, args.pool_size), **client_options)
+            saved = load_notification_backup()
+            if not saved:
+                logger.info(f"No notification settings to restore in '{NOTIFICATION_BACKUP_PATH}'")
+                return 0
+            start_phase("notification_restore")
+            return 0 if restore_notifications(saved) else 1
+        
+        if config:
+            source_configs = config["sources"]
+        else:
+            source_configs = [{"url": args.source, "api_key": args.source_api_key, "snapshot": args.from_snapshot}]
+        snapshots = {}
+        for source_config in source_configs:
+            if not source_config.get("snapshot"):
+                continue
+            try:
+                snapshot = snapshots[source_config.get("name") or ""] = SourceSnapshot(source_config["snapshot"])
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not read snapshot: {str(e)}")
+                return 1
+            logger.info(f"Reading Overseerr data from snapshot '{source_config['snapshot']}' taken {snapshot.header.get('created_at')}")
+        
+        WORKERS = max(1, args.workers)
+        MEDIA_SERVER_IMPORT = not args.skip_media_server_import
+        TMDB_APIKEY = args.tmdb_api_key or ''
+        if TMDB_APIKEY:
+            TMDB_CACHE = TmdbCache(args.tmdb_cache, ttl_days=args.tmdb_cache_ttl, max_entries=args.tmdb_cache_size)
+        TMDB_CONCURRENCY = max(1, args.tmdb_concurrency)
+        VERIFY = args.verify
+        JOURNAL = MigrationJournal(args.journal, resume=args.resume)
+        STATE_PATH = args.state
+        SYNC_STATE = load_sync_state(STATE_PATH)
+        TARGET_INDEX_MAX_AGE = args.reindex_interval
+        dates = {"--since": None if args.since == 'last' else args.since, "--created_after": args.created_after, "--created_before": args.created_before}
+        for flag, value in dates.items():
+            try:
+                dates[flag] = parse_timestamp(value) if value else None
+            except ValueError:
+                logger.error(f"Invalid {flag} date '{value}', expected ISO 8601 (e.g. 2024-01-31T12:00:00Z)")
+                return 1
+        if args.user or args.media_type or args.only_4k or args.skip_4k or args.status or args.created_after or args.created_before:
+            SCOPE = MigrationScope(args.user, args.media_type, True if args.only_4k else False if args.skip_4k else None,
+                                   args.status, dates["--created_after"], dates["--created_before"])
+        
+        if args.http2 and (httpx is None or importlib.util.find_spec("h2") is None):
+            logger.error("--http2 requires the 'httpx' and 'h2' packages (pip install 'httpx[http2]')")
+            return 1
+        if args.engine == "async":
+            if aiohttp is None:
+                logger.error("The async engine requires the 'aiohttp' package (pip install aiohttp)")
+                return 1
+            
+            max_in_flight = args.max_in_flight or ASYNC_MAX_IN_FLIGHT
+            client_class = AsyncHttp2ApiClient if args.http2 else AsyncApiClient
+            def make_client(url: str, rate_limit: Optional[float] = None, **kwargs) -> AsyncApiClient:
+                return client_class(url, max_in_flight=max_in_flight, **{**client_options, **kwargs, "rate_limit": rate_limit or args.rate_limit})
+        else:
+            pool_size = max(1, args.pool_size)
+            max_in_flight = args.max_in_flight
+            client_class = Http2ApiClient if args.http2 else ApiClient
+            def make_client(url: str, rate_limit: Optional[float] = None, **kwargs) -> ApiClient:
+                return client_class(url, pool_size=pool_size, max_in_flight=max_in_flight, **{**client_options, **kwargs, "rate_limit": rate_limit or args.rate_limit})
+        
+        # All sources share one target client, and so its rate limit
+        SOURCES = [Source(source_config.get("name") or "",
+                          client=None if source_config.get("snapshot") else make_client(f"{source_config['url'].rstrip('/')}/api/v1", source_config.get("rate_limit"), api_key=source_config["api_key"], response_cache=RESPONSE_CACHE),
+                          snapshot=snapshots.get(source_config.get("name") or ""))
+                   for source_config in source_configs]
+        TARGET_CLIENT = make_client(f"{args.target.rstrip('/')}/api/v1", config["target"].get("rate_limit") if config else None, api_key=args.target_api_key,
+                                    response_cache=RESPONSE_CACHE)
+        TMDB_CLIENT = make_client(TMDB_URL, params={"api_key": TMDB_APIKEY})
+        
+        since_arg = args.since
+        while True:
+            for source in SOURCES:
+                source.since = resolve_since(since_arg, source)
+            # Users without requests are only left out when every source has a delta to sync
+            delta = all(source.since for source in SOURCES)
+            logger.info(f"Starting {'delta sync' if delta else 'migration'} process from {len(SOURCES)} Overseerr instance{'s' if len(SOURCES) > 1 else ''} ({args.engine} engine)...")
+            if args.engine == "async":
+                success = asyncio.run(async_migration(delta))
+            else:
+                success = migration(delta)
+            
+            if not args.watch:
+                break
+            
+            # Refreshed every cycle so a long-running sync can be monitored
+            METRICS.end_phase()
+            report_metrics(log=False)
+            
+            logger.info(f"Next sync in {args.watch:g} seconds (Ctrl-C to stop)")
+            time.sleep(args.watch)
+            # Later cycles pick up from the stored watermark; the journal only covers a single cycle
+            since_arg = 'last'
+            JOURNAL.reset()
+        
+        if success:
+            logger.info("Migration completed successfully!")
+            return 0
+        else:
+            logger.warning("Migration completed with errors. Check the logs for details.")
+            return 1
+        
+    except KeyboardInterrupt:
+        logger.info("\nMigration interrupted by user")
+        return 1
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}", exc_info=True)
+        return 1
+    finally:
+        if METRICS:
+            METRICS.end_phase()
+            report_metrics()
+        if TMDB_CACHE:
+            TMDB_CACHE.close()
+        if RESPONSE_CACHE:
+            RESPONSE_CACHE.close()
+        if JOURNAL:
+            JOURNAL.close()
+        stop_logging()
+
+def decode_json(content: bytes) -> Any:
+    """Decode a JSON response body, with orjson when it is installed."""
+    return orjson.loads(content) if orjson else json.loads(content)
+
+def encode_json(data: Any) -> bytes:
+    return orjson.dumps(data) if orjson else json.dumps(data).encode("utf-8")
+
+def project(value: Any, fields: Optional[Dict[str, Any]]) -> Any:
+    """Keep only the given fields of a decoded JSON value.
+    
+    Args:
+        value: Decoded JSON object, or list of objects
+        fields: Field names mapped to the fields kept in them, None to keep a field whole
+        
+    Returns:
+        Any: The value with only these fields
+    """
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, fields) for item in value]
+    if not isinstance(value, dict):
+        return value
+    # Leaf fields are copied without a call, most fields are leaves
+    return {name: value[name] if subfields is None else project(value[name], subfields)
+            for name, subfields in fields.items() if name in value}
+
+def skip_whitespace(text: str, pos: int) -> int:
+    return JSON_WHITESPACE.match(text, pos).end()
+
+def parse_page(text: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Incrementally parse a page of results, keeping only some fields of each result.
+    
+    The page object is walked key by key and its 'results' array item by
+    item, so only one full result is decoded at a time; other keys (e.g.
+    pageInfo) are decoded whole.
+    
+    Args:
+        text: Response body
+        fields: Fields kept in each result, as for project()
+        
+    Returns:
+        Dict[str, Any]: The page, with projected results
+        
+    Raises:
+        ValueError: If the body is not a JSON object
+    """
+    page = {}
+    pos = skip_whitespace(text, 0)
+    if text[pos:pos + 1] != "{":
+        raise ValueError(f"Expected a JSON object at position {pos}")
+    pos = skip_whitespace(text, pos + 1)
+    if text[pos:pos + 1] == "}":
+        return page
+    
+    while True:
+        key, pos = JSON_DECODER.raw_decode(text, pos)
+        pos = skip_whitespace(text, pos)
+        if text[pos:pos + 1] != ":":
+            raise ValueError(f"Expected ':' at position {pos}")
+        pos = skip_whitespace(text, pos + 1)
+        
+        if key == "results" and text[pos:pos + 1] == "[":
+            results = page[key] = []
+            pos = skip_whitespace(text, pos + 1)
+            while text[pos:pos + 1] != "]":
+                item, pos = JSON_DECODER.raw_decode(text, pos)
+                results.append(project(item, fields))
+                pos = skip_whitespace(text, pos)
+                if text[pos:pos + 1] == ",":
+                    pos = skip_whitespace(text, pos + 1)
+                elif text[pos:pos + 1] != "]":
+                    raise ValueError(f"Expected ',' or ']' at position {pos}")
+            pos += 1
+        else:
+            page[key], pos = JSON_DECODER.raw_decode(text, pos)
+        
+        pos = skip_whitespace(text, pos)
+        if text[pos:pos + 1] == "}":
+            return page
+        if text[pos:pos + 1] != ",":
+            raise ValueError(f"Expected ',' or '}}' at position {pos}")
+        pos = skip_whitespace(text, pos + 1)
+
+def decode_page(content: bytes, fields: Optional[Dict[str, Any]] = None) -> Any:
+    """Decode a page of results, keeping only the given fields of each result.
+    
+    Whole pages are decoded then projected: with orjson, or with json when
+    the page is small. Large pages (INCREMENTAL_PARSE_SIZE, reached with a
+    large --page_size) are parsed incrementally without orjson, so a single
+    full result is in memory besides the projected ones; this costs more
+    CPU than json.loads, but the whole page is never decoded at once.
+    
+    Args:
+        content: Response body
+        fields: Fields kept in each result, as for project(), None to keep them whole
+        
+    Returns:
+        Any: The decoded page
+        
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    if fields is None:
+        return decode_json(content)
+    if not orjson and len(content) >= INCREMENTAL_PARSE_SIZE:
+        return parse_page(content.decode("utf-8"), fields)
+    page = decode_json(content)
+    if isinstance(page, dict) and isinstance(page.get("results"), list):
+        page["results"] = project(page["results"], fields)
+    return page
+
+def fetch_pages(client: ApiClient, endpoint: str, params: Dict[str, Any], page_size: Optional[int] = None,
+                fields: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Walk a paginated API endpoint and yield its results one page at a time.
+    
+    Pages are requested with take/skip until the total reported in the
+    response's 'pageInfo' field is reached or a short page is returned.
+    
+    Args:
+        client: API client for the host to fetch from
+        endpoint: API endpoint to fetch from
+        params: Query parameters (take/skip are managed by this function)
+        page_size: Number of records per page, defaults to PAGE_SIZE
+        fields: Fields kept in each result, as for project(), None to keep them whole
+        
+    Yields:
+        List of results for each page
+        
+    Raises:
+        RequestException: If the API request fails
+    """
+    take = page_size or PAGE_SIZE
+    skip = 0
+    
+    while True:
+        # Initialize response variable before try block
+        r = None
+        try:
+            r = client.get(endpoint, params={**params, "take": take, "skip": skip})
+            r.raise_for_status()
+            response_data = decode_page(r.content, fields)
+        except (RequestException, ValueError) as e:
+            # Get the response content if available
+            response_text = ""
+            if r and hasattr(r, 'text'):
+                try:
+                    response_text = f" Response: {r.text}"
+                except:
+                    pass
+                    
+            logger.error(f"Failed to fetch data from {endpoint} (skip={skip}): {str(e)}{response_text}")
+            if isinstance(e, RequestException):
+                raise
+            raise RequestException(f"Invalid JSON from {endpoint}: {str(e)}") from e
+        
+        # Check if the response has a 'results' field
+        if not isinstance(response_data, dict) or 'results' not in response_data:
+            logger.error(f"Response from {endpoint} does not contain 'results' field. Response: {json.dumps(response_data)}")
+            return
+        
+        results = response_data["results"]
+        if not results:
+            return
+        
+        logger.debug("Fetched %s records from %s (skip=%s)", len(results), endpoint, skip)
+        yield results
+        
+        skip += len(results)
+        total = response_data.get("pageInfo", {}).get("results")
+        if len(results) < take or (total is not None and skip >= total):
+            return
+
+def fetch_data(client: ApiClient, endpoint: str, params: Dict[str, Any], fields: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Fetch every record from a paginated API endpoint as a stream.
+    
+    Args:
+        client: API client for the host to fetch from
+        endpoint: API endpoint to fetch from
+        params: Query parameters
+        fields: Fields kept in each record, as for project(), None to keep them whole
+        
+    Yields:
+        Individual results from the API
+        
+    Raises:
+        RequestException: If the API request fails
+    """
+    for page in fetch_pages(client, endpoint, params, fields=fields):
+        yield from page
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 date as returned by the API (e.g. 2024-01-31T12:00:00.000Z).
+    
+    Args:
+        value: Date string, assumed to be UTC when it has no offset
+        
+    Returns:
+        datetime: Timezone-aware date
+        
+    Raises:
+        ValueError: If the string is not a valid ISO 8601 date
+    """
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def resolve_since(since: Optional[str], source: Source) -> Optional[datetime]:
+    """Resolve the --since argument to the date a source's requests must be modified after.
+    
+    Args:
+        since: None for a full migration, 'last' for the stored watermark or an ISO 8601 date
+        source: Overseerr instance whose watermark is used
+        
+    Returns:
+        Optional[datetime]: Cutoff date, None for a full migration
+    """
+    if since is None:
+        return None
+    if since != 'last':
+        return parse_timestamp(since)
+    
+    watermark = SYNC_STATE.get(f"{source.watermark_key}_watermark")
+    if not watermark:
+        logger.info(f"No watermark stored in '{STATE_PATH}' for {source.label}, migrating all of its requests")
+        return None
+    logger.info(f"Syncing {source.label} requests modified since {watermark}")
+    return parse_timestamp(watermark)
+
+def modified_at(request: Dict[str, Any]) -> datetime:
+    """Last modification date of a request."""
+    return parse_timestamp(request.get("updatedAt") or request["createdAt"])
+
+def modified_since(requests_list: Iterable[Dict[str, Any]], since: Optional[datetime], watermarks: Dict[str, str], key: str) -> Iterator[Dict[str, Any]]:
+    """Stream requests listed newest modification first, stopping at the first one older than since.
+    
+    Args:
+        requests_list: Requests sorted by modification date, newest first
+        since: Cutoff date, None to stream every request
+        watermarks: Receives the most recent modification date seen, under key
+        key: Name of the watermark (a source's watermark_key or 'target')
+        
+    Yields:
+        Requests modified at or after since
+    """
+    latest = None
+    for request in requests_list:
+        updated_at = request.get("updatedAt") or request["createdAt"]
+        updated = parse_timestamp(updated_at)
+        if since is not None and updated < since:
+            return
+        if latest is None or updated > latest:
+            latest = updated
+            watermarks[key] = updated_at
+        yield request
+
+def load_sync_state(path: str) -> Dict[str, Any]:
+    """Load the delta sync state saved by the last successful run.
+    
+    Args:
+        path: State file path
+        
+    Returns:
+        Dict[str, Any]: Saved state, empty if there is none
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read state file '{path}', running without it: {str(e)}")
+        return {}
+
+def save_sync_state(watermarks: Dict[str, str], listed_at: Optional[str] = None) -> None:
+    """Advance the stored watermarks and save the Jellyseerr request index after a successful run.
+    
+    Args:
+        watermarks: Most recent modification dates seen this run, keyed by source watermark_key / 'target'
+        listed_at: When the run started listing every Jellyseerr request, None if it reused the saved index
+    """
+    if SCOPE:
+        # Requests out of scope weren't migrated, so the watermarks can't move past them
+        logger.info(f"Scoped run, '{STATE_PATH}' is left unchanged")
+        return
+    for key, value in watermarks.items():
+        name = f"{key}_watermark"
+        if not SYNC_STATE.get(name) or parse_timestamp(value) > parse_timestamp(SYNC_STATE[name]):
+            SYNC_STATE[name] = value
+    with INDEX_LOCK:
+        SYNC_STATE["target_requests"] = [[*key, mask] for key, mask in TARGET_REQUEST_INDEX.items()]
+    if listed_at:
+        SYNC_STATE["target_listed_at"] = listed_at
+    
+    try:
+        # Write a new file and swap it in, so an interrupted save keeps the previous state
+        with open(f"{STATE_PATH}.tmp", "w", encoding="utf-8") as f:
+            json.dump(SYNC_STATE, f)
+        os.replace(f"{STATE_PATH}.tmp", STATE_PATH)
+    except OSError as e:
+        logger.warning(f"Could not save state file '{STATE_PATH}': {str(e)}")
+
+def target_request_params() -> Dict[str, Any]:
+    """Query parameters listing the Jellyseerr requests a new request could duplicate.
+    
+    Only requests for the media type in SCOPE can clash with the ones created.
+    A --status listing requests the default filter doesn't (e.g. available)
+    is checked against Jellyseerr requests of every status.
+    """
+    params = dict(REQUEST_LIST_PARAMS)
+    if SCOPE and SCOPE.status and not request_filter_within(SCOPE.status, REQUEST_LIST_PARAMS["filter"]):
+        params["filter"] = "all"
+    if SCOPE and SCOPE.media_type:
+        params["mediaType"] = SCOPE.media_type
+    return params
+
+def saved_target_requests() -> Tuple[Optional[datetime], Dict[Tuple[str, int, bool], int]]:
+    """Get the Jellyseerr request index saved by the last run, for delta syncs.
+    
+    Listing the requests modified since the watermark can't show the ones
+    deleted in Jellyseerr, so the saved index is only reused for
+    TARGET_INDEX_MAX_AGE seconds after the last full listing.
+    
+    Returns:
+        Tuple: Date the saved index is up to date to and the index itself, (None, {}) if there is none or it is too old
+    """
+    watermark = SYNC_STATE.get("target_watermark")
+    listed_at = SYNC_STATE.get("target_listed_at")
+    if not watermark or not listed_at or "target_requests" not in SYNC_STATE:
+        return None, {}
+    if (datetime.now(timezone.utc) - parse_timestamp(listed_at)).total_seconds() > TARGET_INDEX_MAX_AGE:
+        logger.info(f"Jellyseerr requests were last listed in full at {listed_at}, listing them all again to drop deleted ones")
+        return None, {}
+    return parse_timestamp(watermark), {(media_type, tmdb_id, bool(is4k)): mask for media_type, tmdb_id, is4k, mask in SYNC_STATE["target_requests"]}
+
+def delta_source_users() -> List[SourceUser]:
+    """Get the Overseerr users who made the requests of a delta sync.
+    
+    Requests embed the requesting user, so the user list doesn't have to be
+    fetched. Users whose changed requests all exist in Jellyseerr are left out.
+    
+    Returns:
+        List[SourceUser]: One user per requesting user
+    """
+    users = register_source_users([user_requests[0].user for user_requests in list(SOURCE_REQUESTS_BY_USER.values())
+                                   if not all(is_request_migrated(request) for request in user_requests)])
+    logger.info(f"Starting migration of {len(users)} users with new or updated requests...")
+    return users
+
+def register_source_users(users: List[SourceUser]) -> List[SourceUser]:
+    """Record the uids of source users by email, merging users found in several sources.
+    
+    A user whose email was already seen in another source is left out, and
+    their requests are moved to the first user, so both are migrated to one
+    Jellyseerr user.
+    
+    Args:
+        users: Users from Overseerr
+        
+    Returns:
+        List[SourceUser]: The users to migrate
+    """
+    registered = []
+    for user in users:
+        email = normalize_user_key(user.email)
+        first_uid = SOURCE_USER_IDS.get(email) if email else None
+        if first_uid is None or first_uid == user.uid:
+            SOURCE_USER_IDS[email] = user.uid
+            registered.append(user)
+        elif user.uid in SOURCE_REQUESTS_BY_USER:
+            logger.info(f"User '{user.email}' exists in several Overseerr instances, merging their requests")
+            SOURCE_REQUESTS_BY_USER.setdefault(first_uid, []).extend(SOURCE_REQUESTS_BY_USER.pop(user.uid))
+            if JOURNAL and JOURNAL.user_done(first_uid):
+                # The first user may already have been skipped by plan_users
+                requeue_journaled_user(user, first_uid)
+    return registered
+
+def requeue_journaled_user(user: SourceUser, uid: int) -> bool:
+    """Queue a user migrated by a previous run again if some of their requests aren't.
+    
+    Requests merged from a user with the same email in another Overseerr
+    instance aren't in the journal yet, so they are migrated to the Jellyseerr
+    user the journal recorded.
+    
+    Args:
+        user: User from Overseerr
+        uid: Overseerr ID the user's requests are grouped under
+        
+    Returns:
+        bool: True if the user is queued for request migration, False otherwise
+    """
+    with INDEX_LOCK:
+        if any(userOldID == uid for _, userOldID, _ in PROVISIONED_USERS):
+            return True
+        pending = sum(1 for request in SOURCE_REQUESTS_BY_USER.get(uid, ()) if not JOURNAL.request_done(request.uid))
+        if not pending:
+            return False
+        logger.info(f"User '{user.email}' was migrated by a previous run, migrating their {pending} remaining requests")
+        PROVISIONED_USERS.append((user, uid, JOURNAL.completed_users[uid]))
+        return True
+
+def migration(delta: bool = False) -> bool:
+    """Main migration function to transfer users and requests.
+    
+    Requests are read from every source in parallel; users are then migrated
+    by one worker pool against the shared Jellyseerr indexes, so a request
+    created for one source is skipped for the others.
+    
+    Args:
+        delta: Only migrate the users with requests modified since each source's since date (delta sync)
+        
+    Returns:
+        bool: True if migration was successful, False if there were any errors
+    """
+    try:
+        start_phase("connection_test")
+        if not testConnections():
+            logger.error("Connection test failed")
+            return False
+
+        # Get list of current users and requests
+        global SOURCE_REQUESTS_BY_USER, SOURCE_USER_IDS, MEDIA_SERVER_USERS
+        
+        start_phase("initial_fetch")
+        logger.info("Fetching users and requests from both systems...")
+        watermarks: Dict[str, str] = {}
+        # Delta syncs and runs scoped to some requests only migrate the users who made them
+        requests_only = delta or (SCOPE is not None and not SCOPE.users)
+        try:
+            SOURCE_REQUESTS_BY_USER = group_source_requests(watermarks)
+            if requests_only and not SOURCE_REQUESTS_BY_USER:
+                logger.info("No requests created or updated in Overseerr since the last sync" if delta else "No Overseerr requests in scope")
+                return True
+            
+            build_target_user_index(fetch_data(TARGET_CLIENT, "/user", {}, TARGET_USER_FIELDS))
+            target_since, base_index = saved_target_requests() if delta else (None, {})
+            listed_at = datetime.now(timezone.utc).isoformat() if target_since is None else None
+            build_target_request_index(modified_since(fetch_data(TARGET_CLIENT, "/request", target_request_params()), target_since, watermarks, "target"), base_index)
+        except Exception as e:
+            logger.error(f"Failed to fetch initial data: {str(e)}")
+            return False
+        
+        start_phase("tmdb_prefetch")
+        prefetch_tmdb_titles(TMDB_CONCURRENCY)
+
+        # Migrate users, streaming source users one page at a time
+        SOURCE_USER_IDS = {}
+        CREATED_REQUESTS.clear()
+        RUN_REQUEST_INDEX.clear()
+        REQUEST_COUNTS.clear()
+        PROVISIONED_USERS.clear()
+        MEDIA_SERVER_USERS = None
+        success_count = 0
+        failure_count = 0
+        
+        start_phase("user_migration")
+        try:
+            users = delta_source_users() if requests_only else iter_source_users()
+            success_count, failure_count = provision_users(users, WORKERS)
+        except RequestException as e:
+            logger.error(f"Failed to fetch source users: {str(e)}")
+            failure_count += 1
+        
+        # Silence the users getting new requests while they are created, then restore their exact settings
+        start_phase("request_migration")
+        saved_notifications = silence_notifications(users_with_new_requests())
+        try:
+            logger.info(f"Migrating the requests of {len(PROVISIONED_USERS)} users...")
+            _, request_failures = migrate_users(PROVISIONED_USERS, WORKERS, migrate_user_requests)
+            success_count, failure_count = tally_users(success_count, failure_count, request_failures)
+        finally:
+            restore_notifications(saved_notifications)
+        
+        verified = True
+        if VERIFY == "deferred" and CREATED_REQUESTS:
+            start_phase("verification")
+            try:
+                verified = reconcile_requests(fetch_data(TARGET_CLIENT, "/request", {"sort": "modified"}))
+            except RequestException as e:
+                logger.error(f"Failed to verify created requests: {str(e)}")
+                verified = False
+        
+        if failure_count == 0 and verified:
+            save_sync_state(watermarks, listed_at)
+                
+        log_migration_summary(success_count, failure_count)
+        return failure_count == 0 and verified
+            
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}", exc_info=True)
+        return False
+
+def group_source_requests(watermarks: Dict[str, str]) -> Dict[Any, List[SourceRequest]]:
+    """Read the requests of every source, in parallel, grouped by requesting user.
+    
+    Args:
+        watermarks: Receives the most recent modification date seen in each source
+        
+    Returns:
+        Dict[Any, List[SourceRequest]]: Requests keyed by requesting user uid
+    """
+    def group(source: Source) -> Dict[Any, List[SourceRequest]]:
+        return group_requests_by_user(modified_since(source.requests(), source.since, watermarks, source.watermark_key), source)
+    
+    if len(SOURCES) == 1:
+        return group(SOURCES[0])
+    
+    requests_by_user: Dict[Any, List[SourceRequest]] = {}
+    with ThreadPoolExecutor(max_workers=len(SOURCES), thread_name_prefix="source") as executor:
+        for source_requests in executor.map(group, SOURCES):
+            requests_by_user.update(source_requests)
+    return requests_by_user
+
+def iter_source_users() -> Iterator[SourceUser]:
+    """Stream the users of every source page by page, recording their uids by email.
+    
+    Yields:
+        Users from Overseerr, once per email across sources
+    """
+    global SOURCE_USERS
+    
+    for source in SOURCES:
+        for page in source.user_pages():
+            SOURCE_USERS = register_source_users([SourceUser.from_json(user, source) for user in page])
+            logger.info(f"Starting migration of {len(SOURCE_USERS)} users from {source.label}...")
+            yield from SOURCE_USERS
+
+def migrate_users(users: Iterable[Any], workers: int, migrate: Callable[[Any], bool]) -> Tuple[int, int]:
+    """Migrate a stream of users, in parallel when more than one worker is used.
+    
+    At most twice the number of workers are queued at once.
+    
+    Args:
+        users: Stream of users to migrate
+        workers: Number of users migrated concurrently
+        migrate: Function migrating one user
+        
+    Returns:
+        Tuple[int, int]: Number of successful and failed users
+    """
+    success_count = 0
+    failure_count = 0
+    
+    if workers <= 1:
+        for user in users:
+            if migrate(user):
+                success_count += 1
+            else:
+                failure_count += 1
+        return success_count, failure_count
+    
+    logger.info(f"Migrating users with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="migrate") as executor:
+        pending = set()
+        
+        def collect(done) -> None:
+            nonlocal success_count, failure_count
+            for future in done:
+                if future.result():
+                    success_count += 1
+                else:
+                    failure_count += 1
+        
+        try:
+            for user in users:
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(migrate, user))
+        finally:
+            # Let users already handed to a worker finish so their tallies are counted
+            done, pending = wait(pending)
+            collect(done)
+    
+    return success_count, failure_count
+
+def testConnections() -> bool:
+    """Test connections to both Overseerr and Jellyseerr servers.
+    
+    Returns:
+        bool: True if both connections succeed, False otherwise
+    """
+    # Test Overseerr connections, except for sources read from a snapshot
+    for source in SOURCES:
+        if source.client is None:
+            continue
+        status = f"Testing {source.label} connection ... "
+        print(status, end="", flush=True)
+        r = None
+        try:
+            r = source.client.get(
+                "/settings/main",
+                timeout=10
+            )
+            r.raise_for_status()
+            print("OK")
+        except requests.exceptions.RequestException as e:
+            # Get the response content if available
+            response_text = ""
+            if r and hasattr(r, 'text'):
+                try:
+                    response_text = f" Response: {r.text}"
+                except:
+                    pass
+                
+            logger.error(f"Couldn't connect to {source.label}! {str(e)}{response_text}")
+            return False
+
+    # Test Jellyseerr connection
+    status = "Testing Jellyseerr connection ... "
+    print(status, end="", flush=True)
+    r = None
+    try:
+        r = TARGET_CLIENT.get(
+            "/settings/main",
+            timeout=10
+        )
+        r.raise_for_status()
+        print("OK")
+    except requests.exceptions.RequestException as e:
+        # Get the response content if available
+        response_text = ""
+        if r and hasattr(r, 'text'):
+            try:
+                response_text = f" Response: {r.text}"
+            except:
+                pass
+                
+        logger.error(f"Couldn't connect to Jellyseerr! {str(e)}{response_text}")
+        return False
+        
+    return True
+        
+def chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split a stream into lists of at most size items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def plan_users(users: List[SourceUser]) -> Tuple[List[Tuple[SourceUser, Dict[str, Any], int]], List[SourceUser], int, int]:
+    """Match a batch of Overseerr users with Jellyseerr users and compute their final permissions.
+    
+    A user is matched by email, then with a Jellyfin/Emby account of the same
+    username. Every provisioned user needs the request permission (bit 1).
+    
+    Args:
+        users: Users from Overseerr
+        
+    Returns:
+        Tuple: (source user, Jellyseerr user, final permissions) of matched users, users to create,
+        number of users skipped as migrated by a previous run and number of invalid users
+    """
+    matched = []
+    to_create = []
+    skipped = 0
+    invalid = 0
+    for user in users:
+        email = user.email
+        if not email:
+            logger.error("User data missing email field")
+            invalid += 1
+            continue
+        
+        if JOURNAL and JOURNAL.user_done(user.uid):
+            if not requeue_journaled_user(user, user.uid):
+                logger.info(f"User '{email}' was migrated by a previous run, skipping")
+            skipped += 1
+            continue
+        
+        logger.info(f"Processing user: {email}")
+        existing_user = find_target_user(email)
+        if existing_user:
+            logger.info(f"User '{email}' already exists in Jellyseerr with ID {existing_user['id']}, source: {existing_user.get('userType', 'unknown')}, display name: {existing_user.get('displayName', 'unknown')}")
+            logger.debug("Existing user details: %s", LazyJson(existing_user))
+            matched.append((user, existing_user, existing_user.get("permissions", 0) | 1))
+            continue
+        
+        # Before creating a new user, check if there's a Jellyfin/Emby user with the same username
+        jellyfin_user = find_target_user(username=user.username)
+        if jellyfin_user and jellyfin_user.get("userType") in MEDIA_SERVER_USER_TYPES:
+            logger.info(f"Found Jellyfin user '{jellyfin_user.get('username') or jellyfin_user.get('jellyfinUsername')}' for '{email}', ID: {jellyfin_user['id']}. Using this user instead of creating a new one.")
+            matched.append((user, jellyfin_user, jellyfin_user.get("permissions", 0) | 1))
+            continue
+        
+        if not user.username:
+            logger.error(f"User '{email}' missing both username and plexUsername")
+            invalid += 1
+            continue
+        to_create.append(user)
+    return matched, to_create, skipped, invalid
+
+def media_server_user_ids(accounts: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Index Jellyfin/Emby accounts by normalized username and email.
+    
+    Args:
+        accounts: Accounts listed by Jellyseerr's media server settings
+        
+    Returns:
+        Dict[str, str]: Jellyfin/Emby user ID by username and email
+    """
+    ids = {}
+    for account in accounts:
+        for name in (account.get("username"), account.get("email")):
+            key = normalize_user_key(name)
+            if key:
+                ids.setdefault(key, str(account["id"]))
+    return ids
+
+def load_media_server_users() -> Dict[str, str]:
+    """List the Jellyfin/Emby accounts Jellyseerr can import, once per run.
+    
+    Returns:
+        Dict[str, str]: Jellyfin/Emby user ID by normalized username and email, empty if they can't be listed
+    """
+    global MEDIA_SERVER_USERS
+    
+    with INDEX_LOCK:
+        if MEDIA_SERVER_USERS is None:
+            try:
+                r = TARGET_CLIENT.get("/settings/jellyfin/users")
+                r.raise_for_status()
+                MEDIA_SERVER_USERS = media_server_user_ids(r.json())
+                logger.info(f"Found {len(MEDIA_SERVER_USERS)} Jellyfin/Emby account names Jellyseerr can import")
+            except (RequestException, ValueError) as e:
+                logger.info(f"Jellyfin/Emby accounts can't be listed, creating local users instead: {str(e)}")
+                MEDIA_SERVER_USERS = {}
+        return MEDIA_SERVER_USERS
+
+def match_media_server_users(users: List[SourceUser], accounts: Dict[str, str]) -> Dict[str, SourceUser]:
+    """Match Overseerr users with Jellyfin/Emby accounts by username, then email.
+    
+    Args:
+        users: Users to create in Jellyseerr
+        accounts: Jellyfin/Emby user ID by normalized username and email
+        
+    Returns:
+        Dict[str, SourceUser]: Source user by Jellyfin/Emby user ID
+    """
+    matches = {}
+    for user in users:
+        account_id = accounts.get(normalize_user_key(user.username)) or accounts.get(normalize_user_key(user.email))
+        if account_id and account_id not in matches:
+            matches[account_id] = user
+    return matches
+
+def imported_media_server_users(created: List[Dict[str, Any]], matches: Dict[str, SourceUser]) -> Dict[Any, Dict[str, Any]]:
+    """Map the users returned by a Jellyfin/Emby import back to the Overseerr users they were imported for.
+    
+    Args:
+        created: Jellyseerr users returned by the import
+        matches: Source user by Jellyfin/Emby user ID
+        
+    Returns:
+        Dict[Any, Dict[str, Any]]: Jellyseerr user by source user uid
+    """
+    by_name = {normalize_user_key(user.username): user for user in matches.values()}
+    imported = {}
+    for target_user in created:
+        user = matches.get(str(target_user.get("jellyfinUserId"))) or by_name.get(normalize_user_key(target_user.get("jellyfinUsername") or target_user.get("username")))
+        if user:
+            index_target_user(target_user)
+            imported[user.uid] = target_user
+            logger.info(f"Imported Jellyfin/Emby user '{target_user.get('jellyfinUsername') or target_user.get('username')}' for '{user.email}', ID: {target_user['id']}")
+    return imported
+
+def import_media_server_users(users: List[SourceUser]) -> Dict[Any, Dict[str, Any]]:
+    """Import the Jellyfin/Emby accounts matching users to create, in a single call.
+    
+    Args:
+        users: Users to create in Jellyseerr
+        
+    Returns:
+        Dict[Any, Dict[str, Any]]: Imported Jellyseerr user by source user uid
+    """
+    if not MEDIA_SERVER_IMPORT:
+        return {}
+    matches = match_media_server_users(users, load_media_server_users())
+    if not matches:
+        return {}
+    
+    try:
+        r = TARGET_CLIENT.post("/user/import-from-jellyfin", json={"jellyfinUserIds": list(matches)})
+        r.raise_for_status()
+        return imported_media_server_users(r.json(), matches)
+    except (RequestException, ValueError) as e:
+        logger.warning(f"Failed to import {len(matches)} Jellyfin/Emby users, creating local users instead: {str(e)}")
+        return {}
+
+def create_target_user(user: SourceUser) -> Optional[Dict[str, Any]]:
+    """Create a local Jellyseerr user.
+    
+    Jellyseerr gives new users its default permissions whatever the request
+    asks for, so the final permissions are set by the bulk update that
+    follows (see provision_batch).
+    
+    Args:
+        user: User from Overseerr
+        
+    Returns:
+        Optional[Dict[str, Any]]: The new Jellyseerr user, None if it couldn't be created
+    """
+    r = None
+    try:
+        r = TARGET_CLIENT.post(
+            "/user",
+            json={"email": user.email, "username": user.username}
+        )
+        r.raise_for_status()
+        new_user = {**r.json(), "email": user.email}
+        index_target_user(new_user)
+        logger.info(f"User '{user.email}' created in Jellyseerr with ID {new_user['id']}")
+        return new_user
+    except RequestException as e:
+        logger.error(f"Failed to create user '{user.email}': {str(e)} - Response: {r.text if r is not None else 'No response text'}")
+        return None
+
+def permission_updates(matched: List[Tuple[SourceUser, Dict[str, Any], int]], created: Set[Any]) -> Dict[int, List[Tuple[SourceUser, Dict[str, Any]]]]:
+    """Group the users whose Jellyseerr permissions must change by their final permissions.
+    
+    Args:
+        matched: (source user, Jellyseerr user, final permissions) of provisioned users
+        created: uids of the users created or imported in this batch, always updated
+            since Jellyseerr gives them its default permissions
+        
+    Returns:
+        Dict[int, List[Tuple[SourceUser, Dict[str, Any]]]]: Users to update by permissions, existing users already set left out
+    """
+    updates = {}
+    for user, target_user, permissions in matched:
+        if user.uid in created or target_user.get("permissions", 0) != permissions:
+            updates.setdefault(permissions, []).append((user, target_user))
+    return updates
+
+def update_permissions(permissions: int, users: List[Tuple[SourceUser, Dict[str, Any]]]) -> bool:
+    """Set the permissions of several Jellyseerr users with one bulk update.
+    
+    Args:
+        permissions: Permissions given to every user
+        users: Source users and their Jellyseerr users
+        
+    Returns:
+        bool: True if the users were updated, False otherwise
+    """
+    try:
+        r = TARGET_CLIENT.put("/user", json={"ids": [target_user["id"] for _, target_user in users], "permissions": permissions})
+        r.raise_for_status()
+    except RequestException as e:
+        logger.error(f"Failed to update permissions of {', '.join(user.email for user, _ in users)} to {permissions}: {str(e)}")
+        return False
+    
+    with INDEX_LOCK:
+        for user, target_user in users:
+            target_user["permissions"] = permissions
+    logger.info(f"Updated permissions of {len(users)} users to {permissions}")
+    return True
+
+def provision_user(user: SourceUser, userNewID: int) -> bool:
+    """Queue a provisioned user for request migration.
+    
+    Args:
+        user: User from Overseerr
+        userNewID: ID of the user in Jellyseerr
+        
+    Returns:
+        bool: True if the user's Overseerr ID is known, False otherwise
+    """
+    userOldID = SOURCE_USER_IDS.get(normalize_user_key(user.email))
+    if not userOldID:
+        logger.error(f"Could not find source user ID for email: {user.email}")
+        return False
+    
+    # Requests are migrated once every user is provisioned and notifications are silenced
+    with INDEX_LOCK:
+        PROVISIONED_USERS.append((user, userOldID, userNewID))
+    return True
+
+def provision_batch(users: List[SourceUser], executor: ThreadPoolExecutor) -> Tuple[int, int]:
+    """Provision a page of Overseerr users in Jellyseerr.
+    
+    Matched users are reused. Users with a Jellyfin/Emby account Jellyseerr
+    hasn't imported yet are imported in one call; the others are created
+    concurrently. Jellyseerr gives both its default permissions, so the
+    permissions of new users, and the upgrades of existing ones, are then
+    sent as one bulk update per permission value.
+    
+    Args:
+        users: Page of users from Overseerr
+        executor: Pool creating the users and updating their permissions
+        
+    Returns:
+        Tuple[int, int]: Number of successful and failed users
+    """
+    matched, to_create, success_count, failure_count = plan_users(users)
+    matched_count = len(matched)
+    
+    imported = import_media_server_users(to_create) if to_create else {}
+    matched.extend((user, imported[user.uid], user.permissions | 1) for user in to_create if user.uid in imported)
+    to_create = [user for user in to_create if user.uid not in imported]
+    for user, new_user in zip(to_create, executor.map(create_target_user, to_create)):
+        if new_user is None:
+            failure_count += 1
+        else:
+            matched.append((user, new_user, user.permissions | 1))
+    
+    updates = permission_updates(matched, {user.uid for user, _, _ in matched[matched_count:]})
+    failed_uids = set()
+    for (permissions, update), updated in zip(updates.items(), executor.map(update_permissions, updates, updates.values())):
+        if not updated:
+            failed_uids.update(user.uid for user, _ in update)
+    
+    for user, target_user, _ in matched:
+        if user.uid not in failed_uids and provision_user(user, target_user["id"]):
+            success_count += 1
+        else:
+            failure_count += 1
+    return success_count, failure_count
+
+def tally_users(provisioned: int, failed: int, request_failures: int) -> Tuple[int, int]:
+    """Count the successful and failed users of a run, the same way for both engines.
+    
+    Users provisioned, or skipped as migrated by a previous run, succeed
+    unless their requests then fail to migrate.
+    
+    Args:
+        provisioned: Users provisioned or skipped by plan_users
+        failed: Users that couldn't be provisioned, and failed user listings
+        request_failures: Provisioned users whose requests failed to migrate
+        
+    Returns:
+        Tuple[int, int]: Number of successful and failed users
+    """
+    return provisioned - request_failures, failed + request_failures
+
+def log_migration_summary(success_count: int, failure_count: int) -> None:
+    """Log the user and request counts of a finished run."""
+    total = success_count + failure_count
+    if total == 0:
+        logger.info("Migration completed. No users found in Overseerr")
+        return
+    logger.info(f"Migration completed. Success: {success_count}/{total} ({success_count/total*100:.1f}%), Failures: {failure_count}/{total} ({failure_count/total*100:.1f}%)")
+    logger.info(f"Requests: {REQUEST_COUNTS['created']} created, {REQUEST_COUNTS['failed']} failed, {REQUEST_COUNTS['existing']} already in Jellyseerr, {REQUEST_COUNTS['duplicate']} duplicates of requests created this run")
+
+def provision_users(users: Iterable[SourceUser], workers: int) -> Tuple[int, int]:
+    """Provision a stream of Overseerr users in Jellyseerr, a page at a time.
+    
+    Args:
+        users: Stream of users from Overseerr
+        workers: Number of users created concurrently
+        
+    Returns:
+        Tuple[int, int]: Number of successful and failed users
+    """
+    success_count = 0
+    failure_count = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="provision") as executor:
+        for batch in chunks(users, PAGE_SIZE):
+            logger.info(f"Provisioning {len(batch)} users...")
+            succeeded, failed = provision_batch(batch, executor)
+            success_count += succeeded
+            failure_count += failed
+    return success_count, failure_count
+
+def migrate_user_requests(provisioned_user: Tuple[SourceUser, int, int]) -> bool:
+    """Migrate the requests of a user provisioned by provision_users.
+    
+    Args:
+        provisioned_user: Source user, Overseerr user ID and Jellyseerr user ID
+        
+    Returns:
+        bool: True if all requests were migrated successfully, False otherwise
+    """
+    user, userOldID, userNewID = provisioned_user
+    email = user.email
+    try:
+        requests_success = migrateRequests(userOldID, userNewID)
+        
+        # Verify all requests for this user after migration
+        if VERIFY == "inline":
+            logger.info(f"Verifying all requests for user '{email}' (ID: {userNewID}) in Jellyseerr after migration")
+            jellyseerr_requests = fetch_user_requests(userNewID)
+            if jellyseerr_requests:
+                logger.info(f"Found {len(jellyseerr_requests)} requests for user '{email}' in Jellyseerr")
+                for req in jellyseerr_requests:
+                    media_type = req["media"]["mediaType"]
+                    tmdb_id = req["media"]["tmdbId"]
+                    title = req["media"].get("title", req["media"].get("name", "Unknown"))
+                    logger.info(f"Request: {media_type} '{title}' (tmdbId:{tmdb_id})")
+            else:
+                logger.warning(f"No requests found for user '{email}' in Jellyseerr after migration")
+        
+        if requests_success and JOURNAL:
+            JOURNAL.record_user(user.uid, userNewID, email)
+        return requests_success
+        
+    except Exception as e:
+        logger.error(f"Failed to migrate requests for user '{email}': {str(e)}")
+        return False
+
+def users_with_new_requests() -> List[int]:
+    """Get the provisioned Jellyseerr users who have requests to be created.
+    
+    Returns:
+        List[int]: Unique Jellyseerr user IDs
+    """
+    user_ids = [userNewID for _, userOldID, userNewID in PROVISIONED_USERS
+                if not all(is_request_migrated(request) for request in SOURCE_REQUESTS_BY_USER.get(userOldID, []))]
+    return list(dict.fromkeys(user_ids))
+
+def notifications_enabled(settings: Dict[str, Any]) -> bool:
+    """Check if any notification type is turned on in a user's settings."""
+    return any(settings.get("notificationTypes", {}).values())
+
+def silenced_notification_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the notification settings of a user with every notification type turned off.
+    
+    Args:
+        settings: Current notification settings of the user
+        
+    Returns:
+        Dict[str, Any]: The same settings, other fields untouched, with all notification types set to 0
+    """
+    channels = settings.get("notificationTypes") or NOTIFICATION_CHANNELS
+    return {**settings, "notificationTypes": {channel: 0 for channel in channels}}
+
+def load_notification_backup() -> Dict[int, Dict[str, Any]]:
+    """Load the notification settings saved by this or an interrupted run.
+    
+    Returns:
+        Dict[int, Dict[str, Any]]: Saved settings keyed by Jellyseerr user ID
+    """
+    if not os.path.exists(NOTIFICATION_BACKUP_PATH):
+        return {}
+    with open(NOTIFICATION_BACKUP_PATH, encoding="utf-8") as f:
+        return {int(user_id): settings for user_id, settings in json.load(f).items()}
+
+def save_notification_backup(backup: Dict[int, Dict[str, Any]]) -> None:
+    """Save notification settings to restore, removing the file once there are none left.
+    
+    Args:
+        backup: Settings keyed by Jellyseerr user ID
+    """
+    if not backup:
+        if os.path.exists(NOTIFICATION_BACKUP_PATH):
+            os.remove(NOTIFICATION_BACKUP_PATH)
+        return
+    # Write a new file and swap it in, so a crash never leaves a partial backup
+    with open(f"{NOTIFICATION_BACKUP_PATH}.tmp", "w", encoding="utf-8") as f:
+        json.dump(backup, f)
+    os.replace(f"{NOTIFICATION_BACKUP_PATH}.tmp", NOTIFICATION_BACKUP_PATH)
+
+def settings_to_restore(current: Dict[int, Dict[str, Any]]) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+    """Save users' notification settings before silencing them.
+    
+    Settings saved by an interrupted run take precedence over the current
+    ones, which may still be silenced. Users it saved who aren't silenced
+    this run (e.g. skipped by --resume) are restored at the end too. The
+    backup is written before any user is silenced.
+    
+    Args:
+        current: Current notification settings keyed by Jellyseerr user ID
+        
+    Returns:
+        Tuple: Settings to restore at the end keyed by user ID, and the users to silence
+    """
+    backup = load_notification_backup()
+    saved = {}
+    to_silence = []
+    for user_id, settings in current.items():
+        original = backup.get(user_id, settings)
+        if notifications_enabled(settings):
+            to_silence.append(user_id)
+            saved[user_id] = original
+        elif original != settings:
+            saved[user_id] = original
+    
+    leftover = {user_id: settings for user_id, settings in backup.items() if user_id not in current}
+    if leftover:
+        logger.info(f"Restoring the notifications of {len(leftover)} users silenced by an interrupted run at the end")
+    save_notification_backup({**backup, **saved})
+    return {**leftover, **saved}, to_silence
+
+def forget_restored_notifications(saved: Dict[int, Dict[str, Any]], results: List[bool]) -> bool:
+    """Remove restored users from the notification backup.
+    
+    Args:
+        saved: Settings that were restored, keyed by Jellyseerr user ID
+        results: Whether each user's settings were restored, in the order of saved
+        
+    Returns:
+        bool: True if no user is left in the backup, False otherwise
+    """
+    backup = load_notification_backup()
+    for user_id, restored in zip(saved, results):
+        if restored:
+            backup.pop(user_id, None)
+    save_notification_backup(backup)
+    if backup:
+        logger.error(f"Failed to restore the notifications of {len(backup)} users, their settings are kept in '{NOTIFICATION_BACKUP_PATH}'. Run the restore-notifications command to retry")
+        return False
+    return True
+
+def get_notification_settings(user_id: int) -> Optional[Dict[str, Any]]:
+    """Fetch the notification settings of a Jellyseerr user.
+    
+    Args:
+        user_id: ID of the Jellyseerr user
+        
+    Returns:
+        Optional[Dict[str, Any]]: The settings, None if they couldn't be fetched
+    """
+    try:
+        r = TARGET_CLIENT.get(f"/user/{user_id}/settings/notifications")
+        r.raise_for_status()
+        return r.json()
+    except RequestException as e:
+        logger.warning(f"Failed to fetch notification settings of user {user_id}, notifications stay enabled: {str(e)}")
+        return None
+
+def set_notification_settings(user_id: int, settings: Dict[str, Any]) -> bool:
+    """Replace the notification settings of a Jellyseerr user.
+    
+    Args:
+        user_id: ID of the Jellyseerr user
+        settings: Complete notification settings to send
+        
+    Returns:
+        bool: True if the settings were saved, False otherwise
+    """
+    r = None
+    try:
+        logger.debug("Notification settings of user %s: %s", user_id, LazyJson(settings))
+        r = TARGET_CLIENT.post(f"/user/{user_id}/settings/notifications", json=settings)
+        r.raise_for_status()
+        return True
+    except RequestException as e:
+        logger.error(f"Failed to update notification settings of user {user_id}: {str(e)} - Response: {r.text if r is not None else 'No response text'}")
+        return False
+
+def silence_notifications(user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Turn off the notifications of every given user before their requests are created.
+    
+    Args:
+        user_ids: Jellyseerr user IDs
+        
+    Returns:
+        Dict[int, Dict[str, Any]]: Settings to restore with restore_notifications, keyed by user ID
+    """
+    if not user_ids:
+        return settings_to_restore({})[0]
+    
+    logger.info(f"Saving the notification settings of {len(user_ids)} Jellyseerr users...")
+    with ThreadPoolExecutor(max_workers=NOTIFICATION_CONCURRENCY, thread_name_prefix="notifications") as executor:
+        current = {user_id: settings for user_id, settings in zip(user_ids, executor.map(get_notification_settings, user_ids)) if settings is not None}
+        saved, to_silence = settings_to_restore(current)
+        
+        logger.info(f"Disabling notifications of {len(to_silence)} Jellyseerr users...")
+        list(executor.map(lambda user_id: set_notification_settings(user_id, silenced_notification_settings(current[user_id])), to_silence))
+    return saved
+
+def restore_notifications(saved: Dict[int, Dict[str, Any]]) -> bool:
+    """Restore the exact notification settings saved by silence_notifications.
+    
+    Args:
+        saved: Settings keyed by Jellyseerr user ID
+        
+    Returns:
+        bool: True if every user was restored, False otherwise
+    """
+    if not saved:
+        return True
+    
+    logger.info(f"Restoring the notification settings of {len(saved)} Jellyseerr users...")
+    with ThreadPoolExecutor(max_workers=NOTIFICATION_CONCURRENCY, thread_name_prefix="notifications") as executor:
+        results = list(executor.map(lambda item: set_notification_settings(*item), saved.items()))
+    return forget_restored_notifications(saved, results)
+
+def create_request_payload(request: SourceRequest, user_id: int) -> Dict[str, Any]:
+    """Create a request payload for Jellyseerr API.
+    
+    Args:
+        request: Source request from Overseerr
+        user_id: Target user ID in Jellyseerr
+        
+    Returns:
+        Dict[str, Any]: Request payload for Jellyseerr API
+    """
+    is4k = request.is4k
+    media_type = request.media_type
+    tmdb_id = request.tmdb_id
+    
+    logger.debug("Creating request payload for %s (tmdbId:%s) with user ID %s", media_type, tmdb_id, user_id)
+    
+    # Ensure user_id is an integer
+    if not isinstance(user_id, int):
+        logger.warning(f"User ID {user_id} is not an integer, converting to int")
+        try:
+            user_id = int(user_id)
+        except (ValueError, TypeError):
+            logger.error(f"Failed to convert user ID {user_id} to integer")
+            # Raise an exception instead of defaulting to admin user
+            raise ValueError(f"Invalid user ID: {user_id}")
+    
+    logger.debug("Using user ID %s for request", user_id)
+    
+    payload = {
+        "mediaType": media_type,
+        "mediaId": tmdb_id,
+        "tmdbId": tmdb_id,
+        "is4k": is4k,
+        "userId": user_id,
+        "sendNotification": False
+    }
+    
+    if media_type == "tv":
+        payload["seasons"] = list(request.seasons)
+        logger.debug("Adding seasons to request: %s", payload['seasons'])
+    
+    logger.debug("Final request payload: %s", LazyJson(payload))
+    return payload
+
+def fetch_tmdb_media_details(tmdb_id: int, media_type: str) -> Dict[str, Any]:
+    """Fetch media details from TMDB API, going through the TMDB cache.
+    
+    Args:
+        tmdb_id: TMDB ID of the media
+        media_type: Type of media ('movie' or 'tv')
+        
+    Returns:
+        Dict containing media details, empty if no TMDB API key is configured
+    """
+    if not TMDB_APIKEY:
+        return {}
+    
+    cached = TMDB_CACHE.get(media_type, tmdb_id)
+    if cached is not None:
+        return cached
+    
+    try:
+        endpoint = 'movie' if media_type == 'movie' else 'tv'
+        r = TMDB_CLIENT.get(f"/{endpoint}/{tmdb_id}")
+        r.raise_for_status()
+        return cache_tmdb_media_details(tmdb_id, media_type, r.json())
+    except RequestException as e:
+        logger.error(f"Failed to fetch TMDB details for {media_type} with ID {tmdb_id}: {str(e)}")
+        return {}
+
+def titles_to_prefetch() -> List[Tuple[str, int]]:
+    """Collect the unique media whose title has to be fetched from TMDB.
+    
+    Media already carrying a title in the Overseerr payload, or whose
+    requests all exist in Jellyseerr, are left out.
+    
+    Returns:
+        List[Tuple[str, int]]: Unique (mediaType, tmdbId) pairs
+    """
+    pairs = set()
+    for user_requests in SOURCE_REQUESTS_BY_USER.values():
+        for request in user_requests:
+            if request.title or is_request_migrated(request):
+                continue
+            pairs.add((request.media_type, request.tmdb_id))
+    return list(pairs)
+
+def prefetch_tmdb_titles(concurrency: int) -> None:
+    """Resolve the titles of all media to migrate from TMDB before migrating requests.
+    
+    Args:
+        concurrency: Number of TMDB lookups run in parallel
+    """
+    if not TMDB_APIKEY:
+        return
+    
+    pairs = titles_to_prefetch()
+    logger.info(f"Prefetching {len(pairs)} TMDB titles with {concurrency} workers...")
+    
+    def resolve(pair: Tuple[str, int]) -> Tuple[Tuple[str, int], Dict[str, Any]]:
+        return pair, fetch_tmdb_media_details(pair[1], pair[0])
+    
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tmdb") as executor:
+        for pair, details in executor.map(resolve, pairs):
+            title = details.get('title', details.get('name'))
+            if title:
+                MEDIA_TITLES[pair] = title
+    
+    logger.info(f"Resolved {len(MEDIA_TITLES)}/{len(pairs)} TMDB titles")
+
+def media_title(request: SourceRequest) -> str:
+    """Get the display name of a request's media without calling TMDB.
+    
+    Args:
+        request: Source request from Overseerr
+        
+    Returns:
+        str: Title from the Overseerr payload or the prefetch stage, 'Unknown' otherwise
+    """
+    return request.title or MEDIA_TITLES.get((request.media_type, request.tmdb_id), "Unknown")
+
+def cache_tmdb_media_details(tmdb_id: int, media_type: str, details: Dict[str, Any]) -> Dict[str, Any]:
+    """Store the fields the migration uses from a TMDB response in the cache.
+    
+    Args:
+        tmdb_id: TMDB ID of the media
+        media_type: Type of media ('movie' or 'tv')
+        details: Full TMDB response
+        
+    Returns:
+        Dict[str, Any]: The cached subset of the details
+    """
+    details = {field: details[field] for field in TMDB_CACHED_FIELDS if field in details}
+    TMDB_CACHE.put(media_type, tmdb_id, details)
+    return details
+
+def season_mask(seasons: Iterable[int]) -> int:
+    """Convert requested season numbers into a bitmask.
+    
+    Args:
+        seasons: Season numbers of a request
+        
+    Returns:
+        int: Bitmask with bit N set for season N
+    """
+    mask = 0
+    for season in seasons:
+        mask |= 1 << season
+    return mask
+
+def request_index_key(request: Dict[str, Any]) -> Tuple[str, int, bool]:
+    """Build the duplicate detection key for a Jellyseerr request.
+    
+    Args:
+        request: Request data from Jellyseerr
+        
+    Returns:
+        Tuple[str, int, bool]: (mediaType, tmdbId, is4k)
+    """
+    return (request["media"]["mediaType"], request["media"]["tmdbId"], bool(request["is4k"]))
+
+def index_request(key: Tuple[str, int, bool], mask: int) -> None:
+    """Add the seasons of a request to the index.
+    
+    Args:
+        key: (mediaType, tmdbId, is4k) of the request
+        mask: Season bitmask of the request, ALL_SEASONS for movies
+    """
+    with INDEX_LOCK:
+        TARGET_REQUEST_INDEX[key] = TARGET_REQUEST_INDEX.get(key, 0) | mask
+
+def index_created_request(request: SourceRequest) -> None:
+    """Add a request created this run to the index and to the run's own index.
+    
+    Args:
+        request: Source request from Overseerr
+    """
+    with INDEX_LOCK:
+        index_request(request.key, request.mask)
+        RUN_REQUEST_INDEX[request.key] = RUN_REQUEST_INDEX.get(request.key, 0) | request.mask
+
+def index_target_request(request: Dict[str, Any]) -> None:
+    """Add a Jellyseerr request to the index.
+    
+    Args:
+        request: Request data including media, is4k and seasons
+    """
+    key = request_index_key(request)
+    if key[0] == "tv":
+        mask = season_mask(season["seasonNumber"] for season in request.get("seasons", []))
+    else:
+        mask = ALL_SEASONS
+    index_request(key, mask)
+
+def request_lock(request: SourceRequest) -> threading.Lock:
+    """Get the lock serializing creation of requests for the same media.
+    
+    Args:
+        request: Source request from Overseerr
+        
+    Returns:
+        threading.Lock: Lock shared by all requests with the same index key
+    """
+    return REQUEST_LOCKS[hash(request.key) % len(REQUEST_LOCKS)]
+
+def build_target_request_index(target_requests: Iterable[Dict[str, Any]], base: Optional[Dict[Tuple[str, int, bool], int]] = None) -> None:
+    """Build the duplicate detection index from existing Jellyseerr requests.
+    
+    Args:
+        target_requests: Existing requests in Jellyseerr
+        base: Previously saved index the requests are added to, if any
+    """
+    global TARGET_REQUEST_INDEX
+    TARGET_REQUEST_INDEX = dict(base or {})
+    
+    count = 0
+    for target_request in target_requests:
+        index_target_request(target_request)
+        count += 1
+    
+    logger.debug("Indexed %s Jellyseerr requests into %s media entries", count, len(TARGET_REQUEST_INDEX))
+
+def group_requests_by_user(source_requests: Iterable[Dict[str, Any]], source: Optional[Source] = None) -> Dict[Any, List[SourceRequest]]:
+    """Parse Overseerr requests into SourceRequest records grouped by the user who made them.
+    
+    Args:
+        source_requests: Stream of request data from Overseerr
+        source: Overseerr instance the requests come from, None for a single source
+        
+    Returns:
+        Dict[Any, List[SourceRequest]]: Requests keyed by requestedBy user uid
+    """
+    requests_by_user: Dict[Any, List[SourceRequest]] = {}
+    users: Dict[int, SourceUser] = {}
+    count = 0
+    for data in source_requests:
+        request = SourceRequest.from_json(data, users, source)
+        requests_by_user.setdefault(request.user.uid, []).append(request)
+        count += 1
+    
+    logger.debug("Grouped %s Overseerr requests for %s users", count, len(requests_by_user))
+    return requests_by_user
+
+def is_request_exists(request: SourceRequest, request_index: Dict[Tuple[str, int, bool], int]) -> bool:
+    """Check if a request already exists in Jellyseerr.
+    
+    Args:
+        request: Source request from Overseerr
+        request_index: Index of existing Jellyseerr requests
+        
+    Returns:
+        bool: True if request exists, False otherwise
+    """
+    target_mask = request_index.get(request.key)
+    if target_mask is None:
+        return False
+    
+    if request.media_type == "tv":
+        # Check for any common seasons
+        return bool(target_mask & season_mask(request.seasons))
+    return True
+
+def is_request_migrated(request: SourceRequest) -> bool:
+    """Check if a request exists in Jellyseerr or was created by a previous run.
+
+    Args:
+        request: Source request from Overseerr
+
+    Returns:
+        bool: True if the request doesn't need to be migrated, False otherwise
+    """
+    if JOURNAL and JOURNAL.request_done(request.uid):
+        return True
+    return is_request_exists(request, TARGET_REQUEST_INDEX)
+
+def created_this_run(request: SourceRequest) -> bool:
+    """Check if a request is a duplicate of one created earlier in this run.
+
+    Args:
+        request: Source request from Overseerr
+
+    Returns:
+        bool: True if requests created this run cover it and it isn't journaled, False otherwise
+    """
+    if JOURNAL and JOURNAL.request_done(request.uid):
+        return False
+    return is_request_exists(request, RUN_REQUEST_INDEX)
+
+def count_requests(**counts: int) -> str:
+    """Add a user's request outcomes to the run's counts and describe them.
+
+    Only the requests sent to Jellyseerr count towards the success rate;
+    the existing ones and the duplicates are skipped.
+
+    Args:
+        counts: Number of created, failed, existing and duplicate requests
+
+    Returns:
+        str: Summary for the log
+    """
+    with INDEX_LOCK:
+        REQUEST_COUNTS.update(counts)
+    created, failed = counts.get("created", 0), counts.get("failed", 0)
+    sent = created + failed
+    summary = f"Created: {created}/{sent} ({created/sent*100:.1f}%), Failures: {failed}/{sent} ({failed/sent*100:.1f}%), " if sent else ""
+    return summary + f"Skipped: {counts.get('existing', 0)} already in Jellyseerr, {counts.get('duplicate', 0)} created earlier this run"
+
+def record_created_request(request_id: int, user_id: int, request: SourceRequest) -> None:
+    """Remember a request created in Jellyseerr for the deferred verification.
+    
+    Args:
+        request_id: ID of the new Jellyseerr request
+        user_id: ID of the Jellyseerr user it was created for
+        request: Source request from Overseerr
+    """
+    with INDEX_LOCK:
+        CREATED_REQUESTS[request_id] = (user_id, request)
+
+def reconcile_requests(target_requests: Iterable[Dict[str, Any]]) -> bool:
+    """Check in a single pass that every request created this run exists in Jellyseerr.
+    
+    The stream is consumed only until all created requests have been seen,
+    so listing it newest first usually stops after the first pages.
+    
+    Args:
+        target_requests: Jellyseerr requests, newest first
+        
+    Returns:
+        bool: True if every created request was found for the right user
+    """
+    logger.info(f"Verifying {len(CREATED_REQUESTS)} created requests in Jellyseerr...")
+    missing = dict(CREATED_REQUESTS)
+    misattributed = {}
+    for target_request in target_requests:
+        created = missing.pop(target_request["id"], None)
+        if created and target_request.get("requestedBy", {}).get("id") != created[0]:
+            misattributed[target_request["id"]] = target_request.get("requestedBy", {}).get("id")
+        if not missing:
+            break
+    return report_verification(missing, misattributed)
+
+def report_verification(missing: Dict[int, Any], misattributed: Dict[int, Any]) -> bool:
+    """Log the deferred verification results, one line per user.
+    
+    Args:
+        missing: Created request IDs not found in Jellyseerr
+        misattributed: Created request IDs found for another user, with that user's ID
+        
+    Returns:
+        bool: True if every created request was verified
+    """
+    users: Dict[int, Dict[str, Any]] = {}
+    for request_id, (user_id, request) in sorted(CREATED_REQUESTS.items()):
+        report = users.setdefault(user_id, {"email": request.user.email, "created": 0, "missing": [], "misattributed": []})
+        report["created"] += 1
+        if request_id in missing:
+            report["missing"].append(request_id)
+        elif request_id in misattributed:
+            report["misattributed"].append(request_id)
+    
+    for user_id, report in sorted(users.items()):
+        verified = report["created"] - len(report["missing"]) - len(report["misattributed"])
+        summary = f"User ID {user_id} ('{report['email']}'): {verified}/{report['created']} created requests verified"
+        if report["missing"] or report["misattributed"]:
+            logger.warning(f"{summary}, missing: {report['missing']}, assigned to another user: {report['misattributed']}")
+        else:
+            logger.info(summary)
+    
+    total = len(CREATED_REQUESTS)
+    failed = len(missing) + len(misattributed)
+    logger.info(f"Verification completed. Verified: {total - failed}/{total} requests, missing: {len(missing)}, assigned to another user: {len(misattributed)}")
+    return failed == 0
+
+def verify_request_created(request_id: int) -> bool:
+    """Verify that a request was actually created in Jellyseerr by fetching it.
+    
+    Args:
+        request_id: The ID of the request to verify
+        
+    Returns:
+        bool: True if the request exists, False otherwise
+    """
+    try:
+        logger.debug("Verifying request ID %s exists in Jellyseerr", request_id)
+        r = TARGET_CLIENT.get(f"/request/{request_id}")
+        
+        try:
+            r.raise_for_status()
+            
+            # Log details about the request
+            request_data = r.json()
+            media_type = request_data.get("media", {}).get("mediaType", "unknown")
+            tmdb_id = request_data.get("media", {}).get("tmdbId", "unknown")
+            title = request_data.get("media", {}).get("title", request_data.get("media", {}).get("name", "Unknown"))
+            user_id = request_data.get("requestedBy", {}).get("id", "unknown")
+            status = request_data.get("status", "unknown")
+            
+            logger.debug("Request details - ID: %s, Type: %s, Title: '%s', TMDB ID: %s, User ID: %s, Status: %s", request_id, media_type, title, tmdb_id, user_id, status)
+            return True
+        except requests.exceptions.HTTPError as e:
+            # Get the response content if available
+            response_text = ""
+            try:
+                response_text = f" Response: {r.text}"
+            except:
+                pass
+            
+            logger.error(f"Failed to verify request ID {request_id}: {str(e)}{response_text}")
+            return False
+    except Exception as e:
+        # Get the response content if available
+        response_text = ""
+        if hasattr(e, 'response') and e.response:
+            try:
+                response_text = f" Response: {e.response.text}"
+            except:
+                pass
+        
+        logger.error(f"Failed to verify request ID {request_id}: {str(e)}{response_text}")
+        return False
+
+def verify_user_exists(user_id: int) -> bool:
+    """Verify that a user exists in Jellyseerr by fetching their details.
+    
+    Args:
+        user_id: The ID of the user to verify
+        
+    Returns:
+        bool: True if the user exists, False otherwise
+    """
+    try:
+        logger.info(f"Verifying user ID {user_id} (type: {type(user_id).__name__}) exists in Jellyseerr")
+        
+        # Ensure user_id is an integer
+        if not isinstance(user_id, int):
+            logger.warning(f"User ID {user_id} is not an integer, attempting to convert")
+            try:
+                user_id = int(user_id)
+                logger.info(f"Successfully converted user ID to integer: {user_id}")
+            except (ValueError, TypeError) as e:
+                logger.error(f"Failed to convert user ID {user_id} to integer: {str(e)}")
+                return False
+        
+        r = TARGET_CLIENT.get(f"/user/{user_id}")
+        r.raise_for_status()
+        user_data = r.json()
+        
+        # Log detailed user information
+        email = user_data.get('email', 'unknown')
+        username = user_data.get('username', 'unknown')
+        display_name = user_data.get('displayName', 'unknown')
+        user_type = user_data.get('userType', 'unknown')
+        created_at = user_data.get('createdAt', 'unknown')
+        
+        logger.info(f"User verified - ID: {user_id}, Email: {email}, Username: {username}, Display Name: {display_name}, Type: {user_type}")
+        logger.debug("Full user data: %s", LazyJson(user_data))
+        
+        # Check if the user has the necessary permissions to make requests
+        permissions = user_data.get('permissions', 0)
+        logger.debug("User permissions: %s", permissions)
+        
+        # Check if user has request permissions (bit 1)
+        can_request = (permissions & 1) == 1
+        if not can_request:
+            logger.warning(f"User ID {user_id} does not have request permissions (permissions={permissions})")
+        
+        return True
+    except Exception as e:
+        logger.error(f"Failed to verify user ID {user_id}: {str(e)}")
+        return False
 
-# Add command-line arguments
-def parse_args():
-    parser = argparse.ArgumentParser()
+def normalize_user_key(value: Optional[str]) -> str:
+    """Normalize an email or username for index lookups.
     
-    # Add source argument
-    parser.add_argument('-s', '--source', help='The URL source from which to retrieve data (Overseerr)')
-
-    # Add source API key argument
-    parser.add_argument('-k', '--source_api_key', help='The API Key for the source (Overseerr)')
+    Args:
+        value: Email or username, possibly None
+        
+    Returns:
+        str: Lowercased value without surrounding whitespace, empty if missing
+    """
+    return value.strip().lower() if value else ""
 
-    # Add target argument
-    parser.add_argument('-t', '--target', help='The URL target where to send data (Jellyseerr)')
+def index_target_user(user: Dict[str, Any]) -> None:
+    """Add a Jellyseerr user to the in-memory lookup index.
     
-    # Add target API key argument
-    parser.add_argument('-a', '--target_api_key', help='The API Key for the target (Jellyseerr)')
+    Args:
+        user: User data from Jellyseerr
+    """
+    email = normalize_user_key(user.get("email"))
+    with INDEX_LOCK:
+        if email:
+            TARGET_USERS_BY_EMAIL[email] = user
+        
+        for name in (user.get("username"), user.get("jellyfinUsername")):
+            username = normalize_user_key(name)
+            if username:
+                TARGET_USERS_BY_USERNAME.setdefault(username, user)
 
-    # Add TMDB API key argument (optional)
-    parser.add_argument('-m', '--tmdb_api_key', help='The API Key for TMDB (optional)', required=False)
+def build_target_user_index(users: Iterable[Dict[str, Any]]) -> None:
+    """Build the email and username lookup index for Jellyseerr users.
     
-    # Add debug flag
-    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug logging')
-
-    args = parser.parse_args()
+    Args:
+        users: Stream of all users from Jellyseerr
+    """
+    global TARGET_USERS_BY_EMAIL, TARGET_USERS_BY_USERNAME
+    TARGET_USERS_BY_EMAIL = {}
+    TARGET_USERS_BY_USERNAME = {}
     
-    # Set logging level based on debug flag
-    if args.debug:
-        logger.setLevel(logging.DEBUG)
-        logger.debug("Debug logging enabled")
+    for user in users:
+        index_target_user(user)
     
-    return args
+    logger.debug("Indexed %s Jellyseerr users by email and %s by username", len(TARGET_USERS_BY_EMAIL), len(TARGET_USERS_BY_USERNAME))
 
-def main() -> int:
-    """Main entry point for the migration script.
+def find_target_user(email: Optional[str] = None, username: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Look up a Jellyseerr user in the in-memory index.
     
+    Args:
+        email: The email of the user to find
+        username: Username to match when no email matches
+        
     Returns:
-        int: Exit code (0 for success, 1 for failure)
+        Optional[Dict[str, Any]]: User data if found, None otherwise
     """
-    try:
-        args = parse_args()
-
-        if not all([args.source, args.source_api_key, args.target, args.target_api_key]):
-            logger.error("All arguments must be provided and cannot be empty.")
-            return 1
-
-        global SOURCE_URL
-        global SOURCE_APIKEY
-        global TARGET_URL
-        global TARGET_APIKEY
-        global TMDB_APIKEY
-
-        SOURCE_URL = f"{args.source.rstrip('/')}/api/v1"
-        SOURCE_APIKEY = args.source_api_key
-        TARGET_URL = f"{args.target.rstrip('/')}/api/v1"
-        TARGET_APIKEY = args.target_api_key
-        TMDB_APIKEY = args.tmdb_api_key or ''
-        
-        logger.info("Starting migration process...")
-        success = migration()
-        
-        if success:
-            logger.info("Migration completed successfully!")
-            return 0
-        else:
-            logger.warning("Migration completed with errors. Check the logs for details.")
-            return 1
-        
-    except KeyboardInterrupt:
-        logger.info("\nMigration interrupted by user")
-        return 1
-    except Exception as e:
-        logger.error(f"Migration failed: {str(e)}", exc_info=True)
-        return 1
+    user = TARGET_USERS_BY_EMAIL.get(normalize_user_key(email))
+    if user is None and username:
+        user = TARGET_USERS_BY_USERNAME.get(normalize_user_key(username))
+    
+    if user:
+        logger.debug("Found user with email '%s': ID %s, Type: %s", email, user.get('id'), user.get('userType', 'unknown'))
+    else:
+        logger.debug("No user found with email '%s'", email)
+    return user
 
-def fetch_data(url: str, api_key: str, endpoint: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Fetch data from API endpoint with error handling.
+def fetch_user_requests(user_id: int) -> List[Dict[str, Any]]:
+    """Fetch all requests for a specific user from Jellyseerr.
     
     Args:
-        url: Base URL for the API
-        api_key: API key for authentication
-        endpoint: API endpoint to fetch from
-        params: Query parameters
+        user_id: The ID of the user to fetch requests for
         
     Returns:
-        List of results from the API
-        
-    Raises:
-        RequestException: If the API request fails
+        List[Dict[str, Any]]: List of requests for the user
     """
-    # Initialize response variable before try block
-    r = None
     try:
-        r = requests.get(
-            url=f"{url}{endpoint}",
-            headers={"X-Api-Key": api_key},
-            params=params,
-            timeout=30
-        )
-        r.raise_for_status()
-        response_data = r.json()
+        logger.debug("Fetching requests for user ID %s from Jellyseerr", user_id)
+        requests_data = list(fetch_data(TARGET_CLIENT, "/request", {"requestedBy": user_id}))
+        logger.debug("Found %s requests for user ID %s", len(requests_data), user_id)
         
-        # Check if the response has a 'results' field
-        if 'results' not in response_data:
-            logger.error(f"Response from {endpoint} does not contain 'results' field. Response: {json.dumps(response_data)}")
-            return []
+        if logger.isEnabledFor(logging.DEBUG):
+            for req in requests_data:
+                media_type = req["media"]["mediaType"]
+                tmdb_id = req["media"]["tmdbId"]
+                title = req["media"].get("title", req["media"].get("name", "Unknown"))
+                logger.debug("Request: %s '%s' (tmdbId:%s)", media_type, title, tmdb_id)
             
-        return response_data["results"]
-    except RequestException as e:
-        # Get the response content if available
-        response_text = ""
-        if r and hasattr(r, 'text'):
-            try:
-                response_text = f" Response: {r.text}"
-            except:
-                pass
-                
-        logger.error(f"Failed to fetch data from {endpoint}: {str(e)}{response_text}")
-        raise
+        return requests_data
+    except Exception as e:
+        logger.error(f"Failed to fetch requests for user ID {user_id}: {str(e)}")
+        return []
 
-def migration() -> bool:
-    """Main migration function to transfer users and requests.
+def migrateRequests(userOldID: int, userNewID: int) -> bool:
+    """Migrate requests from Overseerr to Jellyseerr for a specific user.
     
+    Args:
+        userOldID: Source user ID in Overseerr
+        userNewID: Target user ID in Jellyseerr
+        
     Returns:
-        bool: True if migration was successful, False if there were any errors
+        bool: True if all requests were migrated successfully, False if there were any failures
     """
     try:
-        if not testConnections():
-            logger.error("Connection test failed")
-            return False
-
-        # Get list of current users and requests
-        global SOURCE_USERS, TARGET_USERS, SOURCE_REQUESTS, TARGET_REQUESTS
+        logger.info(f"Migrating requests from Overseerr user ID {userOldID} to Jellyseerr user ID {userNewID}")
         
-        logger.info("Fetching users and requests from both systems...")
-        try:
-            SOURCE_USERS = fetch_data(SOURCE_URL, SOURCE_APIKEY, "/user", {"take": 500})
-            TARGET_USERS = fetch_data(TARGET_URL, TARGET_APIKEY, "/user", {"take": 500})
-            SOURCE_REQUESTS = fetch_data(SOURCE_URL, SOURCE_APIKEY, "/request", {"take": 1000, "filter": "unavailable"})
-            TARGET_REQUESTS = fetch_data(TARGET_URL, TARGET_APIKEY, "/request", {"take": 1000, "filter": "unavailable"})
-        except Exception as e:
-            logger.error(f"Failed to fetch initial data: {str(e)}")
+        # Verify the user exists in Jellyseerr
+        if VERIFY == "inline" and not verify_user_exists(userNewID):
+            logger.error(f"User ID {userNewID} does not exist in Jellyseerr or could not be verified")
             return False
-
-        # Migrate users
-        logger.info(f"Starting migration of {len(SOURCE_USERS)} users...")
+        
+        # Get all requests for this user
+        user_requests = SOURCE_REQUESTS_BY_USER.get(userOldID, [])
+        total_requests = len(user_requests)
+        logger.info(f"Found {total_requests} requests for user ID {userOldID}")
+        
+        if not user_requests:
+            return True  # No requests to migrate is considered success
+            
+        # Pre-filter requests that already exist
+        new_requests = []
+        existing_count = 0
+        duplicate_count = 0
+        
+        for request in user_requests:
+            if not is_request_migrated(request):
+                new_requests.append(request)
+            elif created_this_run(request):
+                duplicate_count += 1
+                logger.info(f"Request for {request.media_type} (tmdbId:{request.tmdb_id}) was already created during this migration, skipping")
+            else:
+                existing_count += 1
+                logger.info(f"Request for {request.media_type} (tmdbId:{request.tmdb_id}) already exists in Jellyseerr, skipping")
+                
+        logger.info(f"Found {existing_count} existing requests, {duplicate_count} created earlier this run, {len(new_requests)} new requests to migrate")
+        
+        if not new_requests:
+            logger.info("All requests already exist in Jellyseerr, skipping migration")
+            count_requests(existing=existing_count, duplicate=duplicate_count)
+            return True
+            
+        # Migrate only new requests
         success_count = 0
         failure_count = 0
         
-        for user in SOURCE_USERS:
+        for request in new_requests:
+            # Hold the media's lock so concurrent users can't create the same request twice
+            lock = request_lock(request)
+            lock.acquire()
             try:
-                if migrateUser(user):
-                    success_count += 1
-                else:
+                tmdb_id = request.tmdb_id
+                media_type = request.media_type
+                
+                # An earlier request in this run may already have created it
+                if is_request_exists(request, TARGET_REQUEST_INDEX):
+                    logger.info(f"Request for {media_type} (tmdbId:{tmdb_id}) was already created during this migration, skipping")
+                    duplicate_count += 1
+                    continue
+                
+                media_name = media_title(request)
+                
+                # Log user ID information before creating payload
+                logger.info(f"Creating request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) with user ID {userNewID} (type: {type(userNewID).__name__})")
+                
+                payload = create_request_payload(request, userNewID)
+                
+                # Log the payload for debugging
+                logger.debug("Sending request payload: %s", LazyJson(payload))
+                
+                r = TARGET_CLIENT.post(
+                    "/request",
+                    json=payload
+                )
+                
+                # Capture and log the full response, even if it's an error
+                try:
+                    r.raise_for_status()
+                    
+                    # Check the response content
+                    response_data = r.json()
+                    if 'id' in response_data:
+                        request_id = response_data['id']
+                        index_created_request(request)
+                        if JOURNAL:
+                            JOURNAL.record_request(request.uid, request_id)
+                        logger.info(f"Added request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) to Jellyseerr - Request ID: {request_id}")
+                        record_created_request(request_id, userNewID, request)
+                        
+                        if VERIFY != "inline":
+                            success_count += 1
+                        # Verify the request was created by fetching it back
+                        elif verify_request_created(request_id):
+                            logger.info(f"Verified request ID {request_id} exists in Jellyseerr")
+                            success_count += 1
+                        else:
+                            logger.warning(f"Could not verify request ID {request_id} exists in Jellyseerr")
+                            failure_count += 1
+                    else:
+                        logger.warning(f"Request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) may not have been created properly. Response: {json.dumps(response_data)}")
+                        failure_count += 1
+                except requests.exceptions.HTTPError as e:
+                    # For TV shows, include specific seasons in the error log
+                    seasons_str = ""
+                    if media_type == 'tv':
+                        seasons = list(request.seasons)
+                        seasons_str = f", seasons:{seasons}"
+                    
+                    # Get the response content if available
+                    response_text = ""
+                    try:
+                        response_text = f" Response: {r.text}"
+                    except:
+                        pass
+                    
+                    logger.error(f"Failed to migrate request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)}{response_text}")
                     failure_count += 1
+                
+            except RequestException as e:
+                # For TV shows, include specific seasons in the error log
+                seasons_str = ""
+                if media_type == 'tv':
+                    seasons = list(request.seasons)
+                    seasons_str = f", seasons:{seasons}"
+                
+                # Get the response content if available
+                response_text = ""
+                if hasattr(e, 'response') and e.response:
+                    try:
+                        response_text = f" Response: {e.response.text}"
+                    except:
+                        pass
+                
+                logger.error(f"Failed to migrate request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)}{response_text}")
+                failure_count += 1
+                continue
             except Exception as e:
-                logger.error(f"Unexpected error migrating user: {str(e)}")
+                # For TV shows, include specific seasons in the error log
+                seasons_str = ""
+                if media_type == 'tv':
+                    seasons = list(request.seasons)
+                    seasons_str = f", seasons:{seasons}"
+                
+                logger.error(f"Unexpected error processing request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)}")
                 failure_count += 1
-                continue  # Continue with next user
+                continue
+            finally:
+                lock.release()
                 
-        total = len(SOURCE_USERS)
-        logger.info(f"Migration completed. Success: {success_count}/{total} ({success_count/total*100:.1f}%), Failures: {failure_count}/{total} ({failure_count/total*100:.1f}%)")
+        logger.info(f"Request migration completed. {count_requests(created=success_count, failed=failure_count, existing=existing_count, duplicate=duplicate_count)}")
         return failure_count == 0
-            
+                
     except Exception as e:
-        logger.error(f"Migration failed: {str(e)}", exc_info=True)
+        logger.error(f"Failed to migrate requests for user {userOldID}: {str(e)}")
         return False
 
-def testConnections() -> bool:
-    """Test connections to both Overseerr and Jellyseerr servers.
+class AsyncApiClient:
+    """aiohttp based client for a single API host, used by the asyncio engine.
     
-    Returns:
-        bool: True if both connections succeed, False otherwise
+    Concurrent requests are capped by a semaphore, and aiohttp errors are
+    raised as the matching requests exceptions so both engines share their
+    error handling. Pacing and retries work as in ApiClient.
     """
-    # Test Overseerr connection
-    status = "Testing Overseerr connection ... "
-    print(status, end="", flush=True)
-    r = None
-    try:
-        r = requests.get(
-            url=SOURCE_URL+"/settings/main",
-            headers={"X-Api-Key": SOURCE_APIKEY},
-            timeout=10
-        )
-        r.raise_for_status()
-        print("OK")
-    except requests.exceptions.RequestException as e:
-        # Get the response content if available
-        response_text = ""
-        if r and hasattr(r, 'text'):
-            try:
-                response_text = f" Response: {r.text}"
-            except:
-                pass
-                
-        logger.error(f"Couldn't connect to Overseerr! {str(e)}{response_text}")
-        return False
-
-    # Test Jellyseerr connection
-    status = "Testing Jellyseerr connection ... "
-    print(status, end="", flush=True)
-    r = None
-    try:
-        r = requests.get(
-            url=TARGET_URL+"/settings/main",
-            headers={"X-Api-Key": TARGET_APIKEY},
-            timeout=10
+    
+    def __init__(self, base_url: str, api_key: Optional[str] = None, params: Optional[Dict[str, Any]] = None,
+                 timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT), max_in_flight: int = ASYNC_MAX_IN_FLIGHT,
+                 retries: int = RETRIES, rate_limit: Optional[float] = RATE_LIMIT, response_cache: Optional[ResponseCache] = None):
+        """Create a client for one host. The session is opened inside the event loop by open().
+        
+        Args:
+            base_url: Base URL that endpoints are appended to
+            api_key: Value sent in the X-Api-Key header, if any
+            params: Query parameters sent with every request (e.g. TMDB api_key)
+            timeout: Default (connect, read) timeouts in seconds
+            max_in_flight: Maximum number of concurrent requests to the host
+            retries: Number of times a failed call is retried
+            rate_limit: Maximum requests per second, None or 0 for no limit until the host throttles
+            response_cache: Conditional GET cache of the host's responses, if any
+        """
+        self.base_url = base_url.rstrip('/')
+        self.host = urlparse(self.base_url).netloc
+        self.timeout = timeout
+        self.params = params or {}
+        self.retries = retries
+        self.limiter = RateLimiter(self.base_url, rate_limit)
+        self.response_cache = response_cache
+        self.headers = {"Accept-Encoding": ACCEPT_ENCODING, **({"X-Api-Key": api_key} if api_key else {})}
+        self.max_in_flight = max_in_flight
+        self.session = None
+        self.in_flight = None
+    
+    async def open(self) -> None:
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+        # Bodies are decompressed by send(), so the bytes transferred can be measured
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+            auto_decompress=False
         )
-        r.raise_for_status()
-        print("OK")
-    except requests.exceptions.RequestException as e:
-        # Get the response content if available
-        response_text = ""
-        if r and hasattr(r, 'text'):
+    
+    async def request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                      json: Any = None, timeout: Optional[float] = None) -> BufferedResponse:
+        """Send a request to the host, retrying transient failures like ApiClient.request.
+        
+        Args:
+            method: HTTP method
+            endpoint: API endpoint, appended to the base URL
+            params: Query parameters
+            json: JSON body
+            timeout: Total timeout in seconds, defaults to the client's connect/read timeouts
+            
+        Returns:
+            BufferedResponse: The buffered response of the last attempt, status is not checked
+            
+        Raises:
+            RequestException: If the request could not be completed
+        """
+        if self.response_cache:
+            # SQLite calls are kept off the event loop
+            cache_key, cached = await asyncio.get_running_loop().run_in_executor(
+                None, self.response_cache.prepare, self.base_url, method, endpoint, {**self.params, **(params or {})}, json)
+        else:
+            cache_key, cached = None, None
+        headers = cached[0] if cached else None
+        attempt = 0
+        while True:
+            wait_time = self.limiter.reserve()
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            
             try:
-                response_text = f" Response: {r.text}"
-            except:
-                pass
-                
-        logger.error(f"Couldn't connect to Jellyseerr! {str(e)}{response_text}")
-        return False
+                r = await self.send(method, endpoint, params, json, timeout, headers)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not should_retry(method, attempt, self.retries):
+                    raise
+                delay = retry_delay(attempt)
+                logger.warning(f"{method} {endpoint} failed: {str(e)}, retrying in {delay:.1f}s ({attempt + 1}/{self.retries})")
+            else:
+                retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                self.limiter.feedback(r.status_code, retry_after)
+                if r.status_code == 304 and not cached:
+                    # A 304 to a GET sent without validators (e.g. by a caching proxy) has no body to reuse
+                    if attempt >= self.retries:
+                        raise RequestException(f"{method} {endpoint} returned 304 Not Modified without a cached response")
+                    headers = {"Cache-Control": "no-cache"}
+                    delay = retry_delay(attempt)
+                elif not should_retry(method, attempt, self.retries, r.status_code):
+                    if cache_key:
+                        return await asyncio.get_running_loop().run_in_executor(None, self.response_cache.complete, cache_key, cached, r)
+                    return r
+                else:
+                    delay = retry_delay(attempt, retry_after)
+                logger.warning(f"{method} {endpoint} returned {r.status_code}, retrying in {delay:.1f}s ({attempt + 1}/{self.retries})")
+            
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def send(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], json: Any, timeout: Optional[float],
+                   headers: Optional[Dict[str, str]] = None) -> BufferedResponse:
+        """Send a single attempt of a request. See request()."""
+        url = f"{self.base_url}{endpoint}"
+        query = {**self.params, **(params or {})}
+        if timeout:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout[0], sock_read=self.timeout[1])
+        # Encoded here rather than by aiohttp so the bytes sent can be measured
+        body = encode_json(json) if json is not None else None
+        if body is not None:
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+        try:
+            async with self.in_flight:
+                # Timed once a connection slot is free, like the sync client
+                start = time.perf_counter()
+                async with self.session.request(method, url, params=query or None, data=body, headers=headers, timeout=client_timeout) as r:
+                    wire_content = await r.read()
+            try:
+                content = decompress(wire_content, r.headers.get("Content-Encoding"))
+            except ValueError as e:
+                if METRICS:
+                    METRICS.record(self.host, method, endpoint, r.status, len(body or b""), 0, time.perf_counter() - start, len(wire_content))
+                raise requests.exceptions.ContentDecodingError(f"{method} {url}: {str(e)}") from e
+            if METRICS:
+                METRICS.record(self.host, method, endpoint, r.status, len(body or b""), len(content), time.perf_counter() - start, len(wire_content))
+            return BufferedResponse(method, str(r.url), r.status, r.reason, content, r.headers)
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            if METRICS:
+                METRICS.record(self.host, method, endpoint, None, 0, 0, time.perf_counter() - start)
+            if isinstance(e, asyncio.TimeoutError):
+                raise requests.exceptions.Timeout(f"{method} {url} timed out") from e
+            raise requests.exceptions.ConnectionError(f"{method} {url} failed: {str(e)}") from e
+    
+    async def get(self, endpoint: str, **kwargs) -> BufferedResponse:
+        return await self.request("GET", endpoint, **kwargs)
+    
+    async def post(self, endpoint: str, **kwargs) -> BufferedResponse:
+        return await self.request("POST", endpoint, **kwargs)
+    
+    async def put(self, endpoint: str, **kwargs) -> BufferedResponse:
+        return await self.request("PUT", endpoint, **kwargs)
+    
+    async def close(self) -> None:
+        if self.session:
+            await self.session.close()
+
+class AsyncHttp2ApiClient(AsyncApiClient):
+    """AsyncApiClient sending its calls with httpx, over HTTP/2 when the host supports it. See Http2ApiClient."""
+    
+    async def open(self) -> None:
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.http_version = None
+        self.session = httpx.AsyncClient(http2=True, headers=self.headers, limits=httpx.Limits(max_connections=self.max_in_flight))
+    
+    async def send(self, method: str, endpoint: str, params: Optional[Dict[str, Any]], json: Any, timeout: Optional[float],
+                   headers: Optional[Dict[str, str]] = None) -> BufferedResponse:
+        """Send a single attempt of a request. See request()."""
+        url = f"{self.base_url}{endpoint}"
+        query = {**self.params, **(params or {})}
+        client_timeout = httpx.Timeout(timeout) if timeout else httpx.Timeout(self.timeout[1], connect=self.timeout[0])
+        body = encode_json(json) if json is not None else None
+        if body is not None:
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+        try:
+            async with self.in_flight:
+                # Timed once a connection slot is free, like the sync client
+                start = time.perf_counter()
+                r = await self.session.request(method, url, params=query or None, content=body, headers=headers, timeout=client_timeout)
+        except httpx.DecodingError as e:
+            if METRICS:
+                METRICS.record(self.host, method, endpoint, None, 0, 0, time.perf_counter() - start)
+            raise requests.exceptions.ContentDecodingError(f"{method} {url}: {str(e)}") from e
+        except httpx.TransportError as e:
+            if METRICS:
+                METRICS.record(self.host, method, endpoint, None, 0, 0, time.perf_counter() - start)
+            if isinstance(e, httpx.TimeoutException):
+                raise requests.exceptions.Timeout(f"{method} {url} timed out") from e
+            raise requests.exceptions.ConnectionError(f"{method} {url} failed: {str(e)}") from e
+        if METRICS:
+            METRICS.record(self.host, method, endpoint, r.status_code, len(body or b""), len(r.content), time.perf_counter() - start, r.num_bytes_downloaded)
+        note_http_version(self, r.http_version)
+        return BufferedResponse(method, str(r.url), r.status_code, r.reason_phrase, r.content, r.headers)
+    
+    async def close(self) -> None:
+        if self.session:
+            await self.session.aclose()
+
+async def async_fetch_pages(client: AsyncApiClient, endpoint: str, params: Dict[str, Any], page_size: Optional[int] = None,
+                            fields: Optional[Dict[str, Any]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Async version of fetch_pages.
+    
+    Args:
+        client: Async API client for the host to fetch from
+        endpoint: API endpoint to fetch from
+        params: Query parameters (take/skip are managed by this function)
+        page_size: Number of records per page, defaults to PAGE_SIZE
+        fields: Fields kept in each result, as for project(), None to keep them whole
         
-    return True
+    Yields:
+        List of results for each page
+        
+    Raises:
+        RequestException: If the API request fails
+    """
+    take = page_size or PAGE_SIZE
+    skip = 0
+    
+    while True:
+        r = None
+        try:
+            r = await client.get(endpoint, params={**params, "take": take, "skip": skip})
+            r.raise_for_status()
+            response_data = decode_page(r.content, fields)
+        except (RequestException, ValueError) as e:
+            response_text = f" Response: {r.text}" if r is not None else ""
+            logger.error(f"Failed to fetch data from {endpoint} (skip={skip}): {str(e)}{response_text}")
+            if isinstance(e, RequestException):
+                raise
+            raise RequestException(f"Invalid JSON from {endpoint}: {str(e)}") from e
+        
+        if not isinstance(response_data, dict) or 'results' not in response_data:
+            logger.error(f"Response from {endpoint} does not contain 'results' field. Response: {json.dumps(response_data)}")
+            return
         
-def migrateUser(user: Dict[str, Any]) -> bool:
-    """Migrate a single user from Overseerr to Jellyseerr.
+        results = response_data["results"]
+        if not results:
+            return
+        
+        logger.debug("Fetched %s records from %s (skip=%s)", len(results), endpoint, skip)
+        yield results
+        
+        skip += len(results)
+        total = response_data.get("pageInfo", {}).get("results")
+        if len(results) < take or (total is not None and skip >= total):
+            return
+
+async def async_fetch_data(client: AsyncApiClient, endpoint: str, params: Dict[str, Any], fields: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Async version of fetch_data.
     
     Args:
-        user: User data dictionary from Overseerr
+        client: Async API client for the host to fetch from
+        endpoint: API endpoint to fetch from
+        params: Query parameters
+        fields: Fields kept in each record, as for project(), None to keep them whole
         
-    Returns:
-        bool: True if migration was successful, False otherwise
+    Yields:
+        Individual results from the API
     """
-    try:
-        email = user.get("email")
-        if not email:
-            logger.error("User data missing email field")
-            return False
+    async for page in async_fetch_pages(client, endpoint, params, fields=fields):
+        for item in page:
+            yield item
 
-        logger.info(f"Processing user: {email}")
+async def async_collect(stream: AsyncIterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [item async for item in stream]
 
-        # Check if user already exists - use the new function to get detailed user info
-        existing_user = fetch_user_by_email(email)
+async def async_modified_since(requests_list: AsyncIterator[Dict[str, Any]], since: Optional[datetime], watermarks: Dict[str, str], key: str) -> AsyncIterator[Dict[str, Any]]:
+    """Async version of modified_since.
+    
+    Args:
+        requests_list: Requests sorted by modification date, newest first
+        since: Cutoff date, None to stream every request
+        watermarks: Receives the most recent modification date seen, under key
+        key: Name of the watermark (a source's watermark_key or 'target')
         
-        if existing_user:
-            userNewID = existing_user["id"]
-            user_source = existing_user.get("userType", "unknown")
-            display_name = existing_user.get("displayName", "unknown")
-            
-            logger.info(f"User '{email}' already exists in Jellyseerr with ID {userNewID}, source: {user_source}, display name: {display_name}")
-            logger.debug(f"Existing user details: {json.dumps(existing_user)}")
-            
-            # Check if user has request permissions
-            permissions = existing_user.get("permissions", 0)
-            if (permissions & 1) != 1:
-                logger.info(f"Adding request permission to existing user '{email}'")
-                permissions |= 1  # Set bit 1 (request permission)
-                
-                # Update permissions
-                r = requests.put(
-                    url=f"{TARGET_URL}/user/{userNewID}",
-                    headers={"X-Api-Key": TARGET_APIKEY},
-                    json={"permissions": permissions},
-                    timeout=30
-                )
-                r.raise_for_status()
-                logger.info(f"Updated permissions for user '{email}' to {permissions}")
-            else:
-                logger.info(f"User '{email}' already has request permissions")
+    Yields:
+        Requests modified at or after since
+    """
+    latest = None
+    async for request in requests_list:
+        updated_at = request.get("updatedAt") or request["createdAt"]
+        updated = parse_timestamp(updated_at)
+        if since is not None and updated < since:
+            return
+        if latest is None or updated > latest:
+            latest = updated
+            watermarks[key] = updated_at
+        yield request
+
+async def async_users_in_scope(source: Source) -> List[Dict[str, Any]]:
+    """Async version of Source.users_in_scope."""
+    if source.scope_users is not None or source.snapshot:
+        return source.users_in_scope()
+    
+    async def fetch_user(user_id: int) -> Optional[Dict[str, Any]]:
+        r = await source.client.get(f"/user/{user_id}")
+        if r.status_code == 404:
+            logger.warning(f"User ID {user_id} not found in {source.label}")
+            return None
+        r.raise_for_status()
+        return r.json()
+    
+    users = {user["id"]: user for user in await asyncio.gather(*(fetch_user(user_id) for user_id in SCOPE.user_ids(source))) if user}
+    emails = set(SCOPE.emails)
+    if emails:
+        async for page in async_fetch_pages(source.client, "/user", {}):
+            for user in page:
+                email = normalize_user_key(user.get("email"))
+                if email in emails:
+                    users[user["id"]] = user
+                    emails.discard(email)
+            if not emails:
+                break
+    for email in emails:
+        logger.info(f"No user with email '{email}' in {source.label}")
+    source.scope_users = list(users.values())
+    logger.info(f"Found {len(source.scope_users)} users in scope in {source.label}")
+    return source.scope_users
+
+async def async_scope_requests(source: Source) -> AsyncIterator[Dict[str, Any]]:
+    """Async version of Source.requests with a SCOPE, for sources read from the API."""
+    if SCOPE.users:
+        listings = await asyncio.gather(*(async_collect(async_fetch_data(source.client, "/request", {**SCOPE.request_params(), "requestedBy": user["id"]}, REQUEST_FIELDS))
+                                          for user in await async_users_in_scope(source)))
+        for request in SCOPE.requests(heapq.merge(*listings, key=modified_at, reverse=True), source):
+            yield request
+        return
+    
+    async for request in async_fetch_data(source.client, "/request", SCOPE.request_params(), REQUEST_FIELDS):
+        if SCOPE.created_after and modified_at(request) < SCOPE.created_after:
+            return
+        if SCOPE.matches_request(request, source):
+            yield request
+
+async def async_source_user_pages() -> AsyncIterator[List[SourceUser]]:
+    """Async version of the user pages read by iter_source_users, from the snapshots or the APIs."""
+    for source in SOURCES:
+        if SCOPE and SCOPE.users:
+            yield register_source_users([SourceUser.from_json(user, source) for user in await async_users_in_scope(source)])
+        elif source.snapshot:
+            for page in source.snapshot.user_pages(PAGE_SIZE):
+                yield register_source_users([SourceUser.from_json(user, source) for user in page])
         else:
-            # Before creating a new user, check if there's a Jellyfin user with the same email
-            # This requires fetching all users and checking their details
-            logger.info(f"No exact match found for user '{email}', checking for Jellyfin users with the same email")
-            
-            # Get all users
-            all_users = fetch_data(TARGET_URL, TARGET_APIKEY, "/user", {"take": 500})
-            
-            # Check for any user with the same email, regardless of source
-            jellyfin_user = None
-            for u in all_users:
-                if u.get("email") == email:
-                    # Get detailed user info
-                    user_detail = fetch_user_by_email(email)
-                    if user_detail and user_detail.get("userType") == "jellyfin":
-                        jellyfin_user = user_detail
-                        break
-            
-            if jellyfin_user:
-                userNewID = jellyfin_user["id"]
-                logger.info(f"Found Jellyfin user with email '{email}', ID: {userNewID}. Using this user instead of creating a new one.")
-                
-                # Update permissions if needed
-                permissions = jellyfin_user.get("permissions", 0)
-                if (permissions & 1) != 1:
-                    logger.info(f"Adding request permission to Jellyfin user '{email}'")
-                    permissions |= 1  # Set bit 1 (request permission)
-                    
-                    # Update permissions
-                    r = requests.put(
-                        url=f"{TARGET_URL}/user/{userNewID}",
-                        headers={"X-Api-Key": TARGET_APIKEY},
-                        json={"permissions": permissions},
-                        timeout=30
-                    )
-                    r.raise_for_status()
-                    logger.info(f"Updated permissions for Jellyfin user '{email}' to {permissions}")
-            else:
-                # Create new user
-                try:
-                    newUsername = user.get("username") or user.get("plexUsername")
-                    if not newUsername:
-                        logger.error(f"User '{email}' missing both username and plexUsername")
-                        return False
-                        
-                    payload = {
-                        "email": email,
-                        "username": newUsername,
-                        "permissions": user.get("permissions", 0)  # Default to 0 permissions if not specified
-                    }
-                    
-                    r = None
-                    try:
-                        r = requests.post(
-                            url=f"{TARGET_URL}/user",
-                            headers={"X-Api-Key": TARGET_APIKEY},
-                            json=payload,
-                            timeout=30
-                        )
-                        r.raise_for_status()
-                        userNewID = r.json()["id"]
-                        
-                        # Update permissions - ensure user has request permissions (bit 1)
-                        permissions = user.get("permissions", 0)
-                        # Set bit 1 (request permission) if not already set
-                        if (permissions & 1) != 1:
-                            logger.info(f"Adding request permission to user '{email}'")
-                            permissions |= 1  # Set bit 1 (request permission)
-                        
-                        r = requests.put(
-                            url=f"{TARGET_URL}/user/{userNewID}",
-                            headers={"X-Api-Key": TARGET_APIKEY},
-                            json={"permissions": permissions},
-                            timeout=30
-                        )
-                        r.raise_for_status()
-                        logger.info(f"User '{email}' created in Jellyseerr with permissions: {permissions}")
-                        
-                    except RequestException as e:
-                        logger.error(f"Failed to create/update user '{email}': {str(e)} - Response: {r.text if r and hasattr(r, 'text') else 'No response text'}")
-                        return False
-                        
-                except Exception as e:
-                    logger.error(f"Failed to prepare user data for '{email}': {str(e)}")
-                    return False
-
-        # Get source user ID
-        userOldID = next(
-            (u["id"] for u in SOURCE_USERS if u["email"] == email),
-            None
-        )
-        if not userOldID:
-            logger.error(f"Could not find source user ID for email: {email}")
-            return False
+            async for page in async_fetch_pages(source.client, "/user", {}):
+                yield register_source_users([SourceUser.from_json(user, source) for user in page])
+
+async def async_group_requests_by_user(source_requests: AsyncIterator[Dict[str, Any]], source: Optional[Source] = None) -> Dict[Any, List[SourceRequest]]:
+    """Async version of group_requests_by_user."""
+    requests_by_user: Dict[Any, List[SourceRequest]] = {}
+    users: Dict[int, SourceUser] = {}
+    count = 0
+    async for data in source_requests:
+        request = SourceRequest.from_json(data, users, source)
+        requests_by_user.setdefault(request.user.uid, []).append(request)
+        count += 1
+    
+    logger.debug("Grouped %s Overseerr requests for %s users", count, len(requests_by_user))
+    return requests_by_user
+
+async def async_group_source_requests(watermarks: Dict[str, str]) -> Dict[Any, List[SourceRequest]]:
+    """Async version of group_source_requests."""
+    async def group(source: Source) -> Dict[Any, List[SourceRequest]]:
+        if source.snapshot:
+            return group_requests_by_user(modified_since(source.requests(), source.since, watermarks, source.watermark_key), source)
+        requests_list = async_scope_requests(source) if SCOPE else async_fetch_data(source.client, "/request", REQUEST_LIST_PARAMS, REQUEST_FIELDS)
+        return await async_group_requests_by_user(async_modified_since(requests_list, source.since, watermarks, source.watermark_key), source)
+    
+    requests_by_user: Dict[Any, List[SourceRequest]] = {}
+    for source_requests in await asyncio.gather(*(group(source) for source in SOURCES)):
+        requests_by_user.update(source_requests)
+    return requests_by_user
 
-        # Handle notifications and requests
+async def async_test_connections() -> bool:
+    """Async version of testConnections.
+    
+    Returns:
+        bool: True if both connections succeed, False otherwise
+    """
+    for name, client in [(source.label, source.client) for source in SOURCES] + [("Jellyseerr", TARGET_CLIENT)]:
+        if client is None:
+            continue
+        print(f"Testing {name} connection ... ", end="", flush=True)
+        r = None
         try:
-            # Handle notifications and requests
-            notifications_disabled = change_jellyseerr_user_notifications(TARGET_URL, TARGET_APIKEY, userNewID, "disable")
-            if not notifications_disabled:
-                logger.warning(f"Failed to disable notifications for user '{email}', continuing anyway")
-            
-            requests_success = migrateRequests(userOldID, userNewID)
-            
-            notifications_enabled = change_jellyseerr_user_notifications(TARGET_URL, TARGET_APIKEY, userNewID, "enable")
-            if not notifications_enabled:
-                logger.warning(f"Failed to enable notifications for user '{email}', continuing anyway")
-                
-            # Verify all requests for this user after migration
-            logger.info(f"Verifying all requests for user '{email}' (ID: {userNewID}) in Jellyseerr after migration")
-            jellyseerr_requests = fetch_user_requests(userNewID)
-            if jellyseerr_requests:
-                logger.info(f"Found {len(jellyseerr_requests)} requests for user '{email}' in Jellyseerr")
-                for req in jellyseerr_requests:
-                    media_type = req["media"]["mediaType"]
-                    tmdb_id = req["media"]["tmdbId"]
-                    title = req["media"].get("title", req["media"].get("name", "Unknown"))
-                    logger.info(f"Request: {media_type} '{title}' (tmdbId:{tmdb_id})")
-            else:
-                logger.warning(f"No requests found for user '{email}' in Jellyseerr after migration")
-            
-            # Consider migration successful if requests were migrated successfully
-            # Notification failures are treated as warnings only
-            return requests_success
-            
-        except Exception as e:
-            logger.error(f"Failed to handle notifications/requests for user '{email}': {str(e)}")
+            r = await client.get("/settings/main", timeout=10)
+            r.raise_for_status()
+            print("OK")
+        except RequestException as e:
+            response_text = f" Response: {r.text}" if r is not None else ""
+            logger.error(f"Couldn't connect to {name}! {str(e)}{response_text}")
             return False
-        
-    except Exception as e:
-        logger.error(f"Failed to migrate user '{user.get('email', 'unknown')}': {str(e)}")
-        return False
+    return True
 
-def change_jellyseerr_user_notifications(jellyseerr_url: str, jellyseerr_api_key: str, user_id: int, change_type: str) -> Optional[Dict[str, Any]]:
-    """Change notification settings for a Jellyseerr user.
+async def async_get_notification_settings(user_id: int) -> Optional[Dict[str, Any]]:
+    """Async version of get_notification_settings.
     
     Args:
-        jellyseerr_url: Base URL for Jellyseerr API
-        jellyseerr_api_key: API key for authentication
-        user_id: ID of the user to modify
-        change_type: Either 'enable' or 'disable'
+        user_id: ID of the Jellyseerr user
         
     Returns:
-        Optional[Dict[str, Any]]: Response from the API if successful, None if failed
-        
-    Raises:
-        ValueError: If change_type is invalid
-        RequestException: If the API request fails
+        Optional[Dict[str, Any]]: The settings, None if they couldn't be fetched
     """
-    if change_type not in ["enable", "disable"]:
-        raise ValueError(f"Invalid change_type: {change_type}")
+    try:
+        r = await TARGET_CLIENT.get(f"/user/{user_id}/settings/notifications")
+        r.raise_for_status()
+        return r.json()
+    except RequestException as e:
+        logger.warning(f"Failed to fetch notification settings of user {user_id}, notifications stay enabled: {str(e)}")
+        return None
 
-    headers = {
-        "X-Api-Key": jellyseerr_api_key,
-        "Content-Type": "application/json"
-    }
-    url = f"{jellyseerr_url}/user/{user_id}/settings/notifications"
-
-    notification_payload_value = 3661 if change_type == "enable" else 0
-
-    notification_payload = {
-        "notificationTypes": {
-            "discord": notification_payload_value,
-            "email": notification_payload_value,
-            "pushbullet": notification_payload_value,
-            "pushover": notification_payload_value,
-            "slack": notification_payload_value,
-            "telegram": notification_payload_value,
-            "webhook": notification_payload_value,
-            "webpush": notification_payload_value
-        }
-    }
+async def async_set_notification_settings(user_id: int, settings: Dict[str, Any]) -> bool:
+    """Async version of set_notification_settings.
     
-    # Initialize response variable before try block
-    response = None
-    try:
-        logger.debug(f"Sending {change_type} notifications request for user {user_id} to {url}")
-        logger.debug(f"Notification payload: {json.dumps(notification_payload)}")
-        
-        response = requests.post(
-            url,
-            headers=headers,
-            json=notification_payload,
-            timeout=30
-        )
-        response.raise_for_status()
+    Args:
+        user_id: ID of the Jellyseerr user
+        settings: Complete notification settings to send
         
-        response_data = response.json()
-        logger.debug(f"Notification {change_type} response: {json.dumps(response_data)}")
-        return response_data
+    Returns:
+        bool: True if the settings were saved, False otherwise
+    """
+    try:
+        r = await TARGET_CLIENT.post(f"/user/{user_id}/settings/notifications", json=settings)
+        r.raise_for_status()
+        return True
     except RequestException as e:
-        logger.error(f"Failed to {change_type} notifications for user {user_id}: {str(e)} - Response: {response.text if response and hasattr(response, 'text') else 'No response text'}")
-        raise
+        logger.error(f"Failed to update notification settings of user {user_id}: {str(e)}")
+        return False
 
-def create_request_payload(request: Dict[str, Any], user_id: int) -> Dict[str, Any]:
-    """Create a request payload for Jellyseerr API.
+async def async_silence_notifications(user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Async version of silence_notifications.
     
     Args:
-        request: Source request data from Overseerr
-        user_id: Target user ID in Jellyseerr
+        user_ids: Jellyseerr user IDs
         
     Returns:
-        Dict[str, Any]: Request payload for Jellyseerr API
+        Dict[int, Dict[str, Any]]: Settings to restore with async_restore_notifications, keyed by user ID
     """
-    is4k = request["is4k"]
-    media_type = request["media"]["mediaType"]
-    tmdb_id = request["media"]["tmdbId"]
-    
-    logger.debug(f"Creating request payload for {media_type} (tmdbId:{tmdb_id}) with user ID {user_id}")
-    
-    # Ensure user_id is an integer
-    if not isinstance(user_id, int):
-        logger.warning(f"User ID {user_id} is not an integer, converting to int")
-        try:
-            user_id = int(user_id)
-        except (ValueError, TypeError):
-            logger.error(f"Failed to convert user ID {user_id} to integer")
-            # Raise an exception instead of defaulting to admin user
-            raise ValueError(f"Invalid user ID: {user_id}")
+    if not user_ids:
+        return settings_to_restore({})[0]
     
-    logger.debug(f"Using user ID {user_id} for request")
+    logger.info(f"Saving the notification settings of {len(user_ids)} Jellyseerr users...")
+    results = await asyncio.gather(*(async_get_notification_settings(user_id) for user_id in user_ids))
+    current = {user_id: settings for user_id, settings in zip(user_ids, results) if settings is not None}
+    saved, to_silence = settings_to_restore(current)
     
-    payload = {
-        "mediaType": media_type,
-        "mediaId": tmdb_id,
-        "tmdbId": tmdb_id,
-        "is4k": is4k,
-        "userId": user_id,
-        "sendNotification": False
-    }
+    logger.info(f"Disabling notifications of {len(to_silence)} Jellyseerr users...")
+    await asyncio.gather(*(async_set_notification_settings(user_id, silenced_notification_settings(current[user_id])) for user_id in to_silence))
+    return saved
+
+async def async_restore_notifications(saved: Dict[int, Dict[str, Any]]) -> bool:
+    """Async version of restore_notifications.
     
-    if media_type == "tv":
-        payload["seasons"] = [season["seasonNumber"] for season in request["seasons"]]
-        logger.debug(f"Adding seasons to request: {payload['seasons']}")
+    Args:
+        saved: Settings keyed by Jellyseerr user ID
+        
+    Returns:
+        bool: True if every user was restored, False otherwise
+    """
+    if not saved:
+        return True
     
-    logger.debug(f"Final request payload: {json.dumps(payload)}")
-    return payload
+    logger.info(f"Restoring the notification settings of {len(saved)} Jellyseerr users...")
+    results = await asyncio.gather(*(async_set_notification_settings(user_id, settings) for user_id, settings in saved.items()))
+    return forget_restored_notifications(saved, results)
 
-def fetch_tmdb_media_details(tmdb_id: int, media_type: str) -> Dict[str, Any]:
-    """Fetch media details from TMDB API.
+async def async_fetch_tmdb_media_details(tmdb_id: int, media_type: str) -> Dict[str, Any]:
+    """Async version of fetch_tmdb_media_details.
     
     Args:
         tmdb_id: TMDB ID of the media
         media_type: Type of media ('movie' or 'tv')
         
     Returns:
-        Dict containing media details
+        Dict containing media details, empty if the lookup failed
     """
+    if not TMDB_APIKEY:
+        return {}
+    
+    # The cache is a SQLite file, read and written off the event loop
+    loop = asyncio.get_running_loop()
+    cached = await loop.run_in_executor(None, TMDB_CACHE.get, media_type, tmdb_id)
+    if cached is not None:
+        return cached
+    
     try:
         endpoint = 'movie' if media_type == 'movie' else 'tv'
-        r = requests.get(
-            f"https://api.themoviedb.org/3/{endpoint}/{tmdb_id}",
-            params={"api_key": TMDB_APIKEY}
-        )
+        r = await TMDB_CLIENT.get(f"/{endpoint}/{tmdb_id}")
         r.raise_for_status()
-        return r.json()
+        return await loop.run_in_executor(None, cache_tmdb_media_details, tmdb_id, media_type, r.json())
     except RequestException as e:
         logger.error(f"Failed to fetch TMDB details for {media_type} with ID {tmdb_id}: {str(e)}")
         return {}
 
-def is_request_exists(request: Dict[str, Any], target_requests: List[Dict[str, Any]]) -> bool:
-    """Check if a request already exists in Jellyseerr.
+async def async_prefetch_tmdb_titles(concurrency: int) -> None:
+    """Async version of prefetch_tmdb_titles.
     
     Args:
-        request: Source request from Overseerr
-        target_requests: List of existing requests in Jellyseerr
-        
-    Returns:
-        bool: True if request exists, False otherwise
+        concurrency: Number of TMDB lookups run concurrently
     """
-    for target_request in target_requests:
-        if (request["media"]["tmdbId"] == target_request["media"]["tmdbId"] and
-            request["is4k"] == target_request["is4k"]):
-            
-            if request["media"]["mediaType"] == "tv":
-                requested_seasons = set(season["seasonNumber"] for season in request["seasons"])
-                target_seasons = set(season["seasonNumber"] for season in target_request["seasons"])
-                if requested_seasons & target_seasons:  # Check for any common seasons
-                    return True
-            else:
-                return True
-    return False
+    if not TMDB_APIKEY:
+        return
+    
+    pairs = titles_to_prefetch()
+    logger.info(f"Prefetching {len(pairs)} TMDB titles with concurrency {concurrency}...")
+    slots = asyncio.Semaphore(concurrency)
+    
+    async def resolve(pair: Tuple[str, int]) -> None:
+        async with slots:
+            details = await async_fetch_tmdb_media_details(pair[1], pair[0])
+        title = details.get('title', details.get('name'))
+        if title:
+            MEDIA_TITLES[pair] = title
+    
+    await asyncio.gather(*(resolve(pair) for pair in pairs))
+    logger.info(f"Resolved {len(MEDIA_TITLES)}/{len(pairs)} TMDB titles")
 
-def verify_request_created(request_id: int) -> bool:
-    """Verify that a request was actually created in Jellyseerr by fetching it.
+async def async_verify_request_created(request_id: int) -> bool:
+    """Async version of verify_request_created.
     
     Args:
         request_id: The ID of the request to verify
@@ -582,181 +4462,280 @@ def verify_request_created(request_id: int) -> bool:
         bool: True if the request exists, False otherwise
     """
     try:
-        logger.debug(f"Verifying request ID {request_id} exists in Jellyseerr")
-        r = requests.get(
-            url=f"{TARGET_URL}/request/{request_id}",
-            headers={"X-Api-Key": TARGET_APIKEY},
-            timeout=30
-        )
+        r = await TARGET_CLIENT.get(f"/request/{request_id}")
+        r.raise_for_status()
+        return True
+    except RequestException as e:
+        logger.error(f"Failed to verify request ID {request_id}: {str(e)}")
+        return False
+
+async def async_reconcile_requests(target_requests: AsyncIterator[Dict[str, Any]]) -> bool:
+    """Async version of reconcile_requests.
+    
+    Args:
+        target_requests: Jellyseerr requests, newest first
+        
+    Returns:
+        bool: True if every created request was found for the right user
+    """
+    logger.info(f"Verifying {len(CREATED_REQUESTS)} created requests in Jellyseerr...")
+    missing = dict(CREATED_REQUESTS)
+    misattributed = {}
+    async for target_request in target_requests:
+        created = missing.pop(target_request["id"], None)
+        if created and target_request.get("requestedBy", {}).get("id") != created[0]:
+            misattributed[target_request["id"]] = target_request.get("requestedBy", {}).get("id")
+        if not missing:
+            break
+    return report_verification(missing, misattributed)
+
+async def async_verify_user_exists(user_id: int) -> bool:
+    """Async version of verify_user_exists.
+    
+    Args:
+        user_id: The ID of the user to verify
+        
+    Returns:
+        bool: True if the user exists, False otherwise
+    """
+    try:
+        r = await TARGET_CLIENT.get(f"/user/{int(user_id)}")
+        r.raise_for_status()
+        permissions = r.json().get('permissions', 0)
+        if (permissions & 1) != 1:
+            logger.warning(f"User ID {user_id} does not have request permissions (permissions={permissions})")
+        return True
+    except (RequestException, ValueError, TypeError) as e:
+        logger.error(f"Failed to verify user ID {user_id}: {str(e)}")
+        return False
+
+async def async_fetch_user_requests(user_id: int) -> List[Dict[str, Any]]:
+    """Async version of fetch_user_requests.
+    
+    Args:
+        user_id: The ID of the user to fetch requests for
         
+    Returns:
+        List[Dict[str, Any]]: List of requests for the user
+    """
+    try:
+        return await async_collect(async_fetch_data(TARGET_CLIENT, "/request", {"requestedBy": user_id}))
+    except RequestException as e:
+        logger.error(f"Failed to fetch requests for user ID {user_id}: {str(e)}")
+        return []
+
+async def async_load_media_server_users() -> Dict[str, str]:
+    """Async version of load_media_server_users.
+    
+    Returns:
+        Dict[str, str]: Jellyfin/Emby user ID by normalized username and email, empty if they can't be listed
+    """
+    global MEDIA_SERVER_USERS
+    
+    if MEDIA_SERVER_USERS is None:
         try:
+            r = await TARGET_CLIENT.get("/settings/jellyfin/users")
             r.raise_for_status()
-            
-            # Log details about the request
-            request_data = r.json()
-            media_type = request_data.get("media", {}).get("mediaType", "unknown")
-            tmdb_id = request_data.get("media", {}).get("tmdbId", "unknown")
-            title = request_data.get("media", {}).get("title", request_data.get("media", {}).get("name", "Unknown"))
-            user_id = request_data.get("requestedBy", {}).get("id", "unknown")
-            status = request_data.get("status", "unknown")
-            
-            logger.debug(f"Request details - ID: {request_id}, Type: {media_type}, Title: '{title}', TMDB ID: {tmdb_id}, User ID: {user_id}, Status: {status}")
-            return True
-        except requests.exceptions.HTTPError as e:
-            # Get the response content if available
-            response_text = ""
-            try:
-                response_text = f" Response: {r.text}"
-            except:
-                pass
-            
-            logger.error(f"Failed to verify request ID {request_id}: {str(e)}{response_text}")
-            return False
-    except Exception as e:
-        # Get the response content if available
-        response_text = ""
-        if hasattr(e, 'response') and e.response:
-            try:
-                response_text = f" Response: {e.response.text}"
-            except:
-                pass
+            MEDIA_SERVER_USERS = media_server_user_ids(r.json())
+            logger.info(f"Found {len(MEDIA_SERVER_USERS)} Jellyfin/Emby account names Jellyseerr can import")
+        except (RequestException, ValueError) as e:
+            logger.info(f"Jellyfin/Emby accounts can't be listed, creating local users instead: {str(e)}")
+            MEDIA_SERVER_USERS = {}
+    return MEDIA_SERVER_USERS
+
+async def async_import_media_server_users(users: List[SourceUser]) -> Dict[Any, Dict[str, Any]]:
+    """Async version of import_media_server_users.
+    
+    Args:
+        users: Users to create in Jellyseerr
         
-        logger.error(f"Failed to verify request ID {request_id}: {str(e)}{response_text}")
-        return False
+    Returns:
+        Dict[Any, Dict[str, Any]]: Imported Jellyseerr user by source user uid
+    """
+    if not MEDIA_SERVER_IMPORT:
+        return {}
+    matches = match_media_server_users(users, await async_load_media_server_users())
+    if not matches:
+        return {}
+    
+    try:
+        r = await TARGET_CLIENT.post("/user/import-from-jellyfin", json={"jellyfinUserIds": list(matches)})
+        r.raise_for_status()
+        return imported_media_server_users(r.json(), matches)
+    except (RequestException, ValueError) as e:
+        logger.warning(f"Failed to import {len(matches)} Jellyfin/Emby users, creating local users instead: {str(e)}")
+        return {}
 
-def verify_user_exists(user_id: int) -> bool:
-    """Verify that a user exists in Jellyseerr by fetching their details.
+async def async_create_target_user(user: SourceUser) -> Optional[Dict[str, Any]]:
+    """Async version of create_target_user.
     
     Args:
-        user_id: The ID of the user to verify
+        user: User from Overseerr
         
     Returns:
-        bool: True if the user exists, False otherwise
+        Optional[Dict[str, Any]]: The new Jellyseerr user, None if it couldn't be created
     """
+    r = None
     try:
-        logger.info(f"Verifying user ID {user_id} (type: {type(user_id).__name__}) exists in Jellyseerr")
-        
-        # Ensure user_id is an integer
-        if not isinstance(user_id, int):
-            logger.warning(f"User ID {user_id} is not an integer, attempting to convert")
-            try:
-                user_id = int(user_id)
-                logger.info(f"Successfully converted user ID to integer: {user_id}")
-            except (ValueError, TypeError) as e:
-                logger.error(f"Failed to convert user ID {user_id} to integer: {str(e)}")
-                return False
-        
-        r = requests.get(
-            url=f"{TARGET_URL}/user/{user_id}",
-            headers={"X-Api-Key": TARGET_APIKEY},
-            timeout=30
+        r = await TARGET_CLIENT.post(
+            "/user",
+            json={"email": user.email, "username": user.username}
         )
         r.raise_for_status()
-        user_data = r.json()
-        
-        # Log detailed user information
-        email = user_data.get('email', 'unknown')
-        username = user_data.get('username', 'unknown')
-        display_name = user_data.get('displayName', 'unknown')
-        user_type = user_data.get('userType', 'unknown')
-        created_at = user_data.get('createdAt', 'unknown')
-        
-        logger.info(f"User verified - ID: {user_id}, Email: {email}, Username: {username}, Display Name: {display_name}, Type: {user_type}")
-        logger.debug(f"Full user data: {json.dumps(user_data)}")
-        
-        # Check if the user has the necessary permissions to make requests
-        permissions = user_data.get('permissions', 0)
-        logger.debug(f"User permissions: {permissions}")
-        
-        # Check if user has request permissions (bit 1)
-        can_request = (permissions & 1) == 1
-        if not can_request:
-            logger.warning(f"User ID {user_id} does not have request permissions (permissions={permissions})")
-        
-        return True
-    except Exception as e:
-        logger.error(f"Failed to verify user ID {user_id}: {str(e)}")
-        return False
+        new_user = {**r.json(), "email": user.email}
+        index_target_user(new_user)
+        logger.info(f"User '{user.email}' created in Jellyseerr with ID {new_user['id']}")
+        return new_user
+    except RequestException as e:
+        logger.error(f"Failed to create user '{user.email}': {str(e)} - Response: {r.text if r is not None else 'No response text'}")
+        return None
 
-def fetch_user_by_email(email: str) -> Optional[Dict[str, Any]]:
-    """Fetch a user by email from Jellyseerr.
+async def async_update_permissions(permissions: int, users: List[Tuple[SourceUser, Dict[str, Any]]]) -> bool:
+    """Async version of update_permissions.
     
     Args:
-        email: The email of the user to fetch
+        permissions: Permissions given to every user
+        users: Source users and their Jellyseerr users
         
     Returns:
-        Optional[Dict[str, Any]]: User data if found, None otherwise
+        bool: True if the users were updated, False otherwise
     """
     try:
-        logger.debug(f"Fetching user with email '{email}' from Jellyseerr")
-        # First, get all users
-        r = requests.get(
-            url=f"{TARGET_URL}/user",
-            headers={"X-Api-Key": TARGET_APIKEY},
-            params={"take": 500},
-            timeout=30
-        )
+        r = await TARGET_CLIENT.put("/user", json={"ids": [target_user["id"] for _, target_user in users], "permissions": permissions})
         r.raise_for_status()
-        users_data = r.json()["results"]
-        
-        # Find user with matching email
-        for user in users_data:
-            if user.get("email") == email:
-                user_id = user.get("id")
-                user_type = user.get("userType", "unknown")
-                logger.debug(f"Found user with email '{email}': ID {user_id}, Type: {user_type}")
-                
-                # Get detailed user info
-                r = requests.get(
-                    url=f"{TARGET_URL}/user/{user_id}",
-                    headers={"X-Api-Key": TARGET_APIKEY},
-                    timeout=30
-                )
-                r.raise_for_status()
-                user_data = r.json()
-                logger.debug(f"User details: {json.dumps(user_data)}")
-                return user_data
-                
-        logger.debug(f"No user found with email '{email}'")
-        return None
-    except Exception as e:
-        logger.error(f"Failed to fetch user with email '{email}': {str(e)}")
-        return None
+    except RequestException as e:
+        logger.error(f"Failed to update permissions of {', '.join(user.email for user, _ in users)} to {permissions}: {str(e)}")
+        return False
+    
+    for user, target_user in users:
+        target_user["permissions"] = permissions
+    logger.info(f"Updated permissions of {len(users)} users to {permissions}")
+    return True
 
-def fetch_user_requests(user_id: int) -> List[Dict[str, Any]]:
-    """Fetch all requests for a specific user from Jellyseerr.
+async def async_provision_batch(users: List[SourceUser]) -> Tuple[int, int]:
+    """Async version of provision_batch. At most WORKERS users are created at once.
     
     Args:
-        user_id: The ID of the user to fetch requests for
+        users: Page of users from Overseerr
         
     Returns:
-        List[Dict[str, Any]]: List of requests for the user
+        Tuple[int, int]: Number of successful and failed users
+    """
+    matched, to_create, success_count, failure_count = plan_users(users)
+    matched_count = len(matched)
+    
+    imported = await async_import_media_server_users(to_create) if to_create else {}
+    matched.extend((user, imported[user.uid], user.permissions | 1) for user in to_create if user.uid in imported)
+    to_create = [user for user in to_create if user.uid not in imported]
+    slots = asyncio.Semaphore(WORKERS)
+    
+    async def create(user: SourceUser) -> Optional[Dict[str, Any]]:
+        async with slots:
+            return await async_create_target_user(user)
+    
+    for user, new_user in zip(to_create, await asyncio.gather(*(create(user) for user in to_create))):
+        if new_user is None:
+            failure_count += 1
+        else:
+            matched.append((user, new_user, user.permissions | 1))
+    
+    updates = permission_updates(matched, {user.uid for user, _, _ in matched[matched_count:]})
+    failed_uids = set()
+    results = await asyncio.gather(*(async_update_permissions(permissions, update) for permissions, update in updates.items()))
+    for update, updated in zip(updates.values(), results):
+        if not updated:
+            failed_uids.update(user.uid for user, _ in update)
+    
+    for user, target_user, _ in matched:
+        if user.uid not in failed_uids and provision_user(user, target_user["id"]):
+            success_count += 1
+        else:
+            failure_count += 1
+    return success_count, failure_count
+
+async def async_migrate_user_requests(provisioned_user: Tuple[SourceUser, int, int]) -> bool:
+    """Async version of migrate_user_requests.
+    
+    Args:
+        provisioned_user: Source user, Overseerr user ID and Jellyseerr user ID
+        
+    Returns:
+        bool: True if all requests were migrated successfully, False otherwise
     """
+    user, userOldID, userNewID = provisioned_user
     try:
-        logger.debug(f"Fetching requests for user ID {user_id} from Jellyseerr")
-        r = requests.get(
-            url=f"{TARGET_URL}/request",
-            headers={"X-Api-Key": TARGET_APIKEY},
-            params={"take": 100, "requestedBy": user_id},
-            timeout=30
-        )
-        r.raise_for_status()
-        requests_data = r.json()["results"]
-        logger.debug(f"Found {len(requests_data)} requests for user ID {user_id}")
+        requests_success = await async_migrate_requests(userOldID, userNewID)
+    except Exception as e:
+        logger.error(f"Failed to migrate requests for user '{user.email}': {str(e)}")
+        return False
+    
+    if requests_success and JOURNAL:
+        # Journal lines are synced to disk, off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, JOURNAL.record_user, user.uid, userNewID, user.email)
+    return requests_success
+
+async def async_migrate_request(request: SourceRequest, userNewID: int) -> str:
+    """Create a single Overseerr request in Jellyseerr.
+    
+    Args:
+        request: Source request from Overseerr
+        userNewID: Target user ID in Jellyseerr
         
-        for req in requests_data:
-            media_type = req["media"]["mediaType"]
-            tmdb_id = req["media"]["tmdbId"]
-            title = req["media"].get("title", req["media"].get("name", "Unknown"))
-            logger.debug(f"Request: {media_type} '{title}' (tmdbId:{tmdb_id})")
+    Returns:
+        str: created, duplicate if an earlier request of this run already created it, or failed
+    """
+    tmdb_id = request.tmdb_id
+    media_type = request.media_type
+    media_name = "Unknown"
+    seasons_str = ""
+    if media_type == 'tv':
+        seasons_str = f", seasons:{list(request.seasons)}"
+    
+    async with ASYNC_REQUEST_LOCKS[hash(request.key) % len(ASYNC_REQUEST_LOCKS)]:
+        try:
+            # An earlier request in this run may already have created it
+            if is_request_exists(request, TARGET_REQUEST_INDEX):
+                logger.info(f"Request for {media_type} (tmdbId:{tmdb_id}) was already created during this migration, skipping")
+                return "duplicate"
             
-        return requests_data
-    except Exception as e:
-        logger.error(f"Failed to fetch requests for user ID {user_id}: {str(e)}")
-        return []
+            media_name = media_title(request)
+            
+            logger.info(f"Creating request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) with user ID {userNewID}")
+            r = await TARGET_CLIENT.post("/request", json=create_request_payload(request, userNewID))
+            try:
+                r.raise_for_status()
+            except RequestException as e:
+                logger.error(f"Failed to migrate request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)} Response: {r.text}")
+                return "failed"
+            
+            response_data = r.json()
+            if 'id' not in response_data:
+                logger.warning(f"Request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) may not have been created properly. Response: {r.text}")
+                return "failed"
+            
+            request_id = response_data['id']
+            index_created_request(request)
+            if JOURNAL:
+                await asyncio.get_running_loop().run_in_executor(None, JOURNAL.record_request, request.uid, request_id)
+            logger.info(f"Added request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) to Jellyseerr - Request ID: {request_id}")
+            record_created_request(request_id, userNewID, request)
+        except RequestException as e:
+            logger.error(f"Failed to migrate request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)}")
+            return "failed"
+        except Exception as e:
+            logger.error(f"Unexpected error processing request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)}")
+            return "failed"
+    
+    if VERIFY != "inline":
+        return "created"
+    if await async_verify_request_created(request_id):
+        logger.info(f"Verified request ID {request_id} exists in Jellyseerr")
+        return "created"
+    logger.warning(f"Could not verify request ID {request_id} exists in Jellyseerr")
+    return "failed"
 
-def migrateRequests(userOldID: int, userNewID: int) -> bool:
-    """Migrate requests from Overseerr to Jellyseerr for a specific user.
+async def async_migrate_requests(userOldID: int, userNewID: int) -> bool:
+    """Async version of migrateRequests. A user's new requests are created concurrently.
     
     Args:
         userOldID: Source user ID in Overseerr
@@ -765,148 +4744,205 @@ def migrateRequests(userOldID: int, userNewID: int) -> bool:
     Returns:
         bool: True if all requests were migrated successfully, False if there were any failures
     """
-    try:
-        logger.info(f"Migrating requests from Overseerr user ID {userOldID} to Jellyseerr user ID {userNewID}")
+    logger.info(f"Migrating requests from Overseerr user ID {userOldID} to Jellyseerr user ID {userNewID}")
+    
+    if VERIFY == "inline" and not await async_verify_user_exists(userNewID):
+        logger.error(f"User ID {userNewID} does not exist in Jellyseerr or could not be verified")
+        return False
+    
+    user_requests = SOURCE_REQUESTS_BY_USER.get(userOldID, [])
+    total_requests = len(user_requests)
+    logger.info(f"Found {total_requests} requests for user ID {userOldID}")
+    if not user_requests:
+        return True
+    
+    new_requests = []
+    existing_count = 0
+    duplicate_count = 0
+    for request in user_requests:
+        if not is_request_migrated(request):
+            new_requests.append(request)
+        elif created_this_run(request):
+            duplicate_count += 1
+        else:
+            existing_count += 1
+    logger.info(f"Found {existing_count} existing requests, {duplicate_count} created earlier this run, {len(new_requests)} new requests to migrate")
+    if not new_requests:
+        logger.info("All requests already exist in Jellyseerr, skipping migration")
+        count_requests(existing=existing_count, duplicate=duplicate_count)
+        return True
+    
+    results = Counter(await asyncio.gather(*(async_migrate_request(request, userNewID) for request in new_requests)))
+    failure_count = results["failed"]
+    logger.info(f"Request migration completed. {count_requests(created=results['created'], failed=failure_count, existing=existing_count, duplicate=duplicate_count + results['duplicate'])}")
+    
+    if VERIFY == "inline":
+        jellyseerr_requests = await async_fetch_user_requests(userNewID)
+        if jellyseerr_requests:
+            logger.info(f"Found {len(jellyseerr_requests)} requests for user ID {userNewID} in Jellyseerr")
+        else:
+            logger.warning(f"No requests found for user ID {userNewID} in Jellyseerr")
+    
+    return failure_count == 0
+
+async def async_migration(delta: bool = False) -> bool:
+    """Main migration function of the asyncio engine.
+    
+    Up to WORKERS users are migrated at once; the number of concurrent HTTP
+    calls is capped per host by each client's semaphore. On cancellation
+    (Ctrl-C) running users are cancelled and waited for, and notification
+    settings are restored before the engine exits.
+    
+    Args:
+        delta: Only migrate the users with requests modified since each source's since date (delta sync)
         
-        # Verify the user exists in Jellyseerr
-        if not verify_user_exists(userNewID):
-            logger.error(f"User ID {userNewID} does not exist in Jellyseerr or could not be verified")
+    Returns:
+        bool: True if migration was successful, False if there were any errors
+    """
+    global ASYNC_REQUEST_LOCKS, SOURCE_REQUESTS_BY_USER, SOURCE_USER_IDS, SOURCE_USERS, MEDIA_SERVER_USERS
+    
+    clients = [client for client in [source.client for source in SOURCES] + [TARGET_CLIENT, TMDB_CLIENT] if client]
+    for client in clients:
+        await client.open()
+    ASYNC_REQUEST_LOCKS = [asyncio.Lock() for _ in range(len(REQUEST_LOCKS))]
+    
+    try:
+        start_phase("connection_test")
+        if not await async_test_connections():
+            logger.error("Connection test failed")
             return False
         
-        # Get all requests for this user
-        user_requests = [r for r in SOURCE_REQUESTS if r["requestedBy"]["id"] == userOldID]
-        total_requests = len(user_requests)
-        logger.info(f"Found {total_requests} requests for user ID {userOldID}")
+        start_phase("initial_fetch")
+        logger.info("Fetching users and requests from both systems...")
+        watermarks: Dict[str, str] = {}
+        # Delta syncs and runs scoped to some requests only migrate the users who made them
+        requests_only = delta or (SCOPE is not None and not SCOPE.users)
+        target_since, base_index = saved_target_requests() if delta else (None, {})
+        listed_at = datetime.now(timezone.utc).isoformat() if target_since is None else None
         
-        if not user_requests:
-            return True  # No requests to migrate is considered success
-            
-        # Pre-filter requests that already exist
-        new_requests = []
-        existing_count = 0
+        async def index_target_users() -> None:
+            async for user in async_fetch_data(TARGET_CLIENT, "/user", {}, TARGET_USER_FIELDS):
+                index_target_user(user)
         
-        for request in user_requests:
-            if is_request_exists(request, TARGET_REQUESTS):
-                existing_count += 1
-                logger.info(f"Request for {request['media']['mediaType']} (tmdbId:{request['media']['tmdbId']}) already exists in Jellyseerr, skipping")
+        async def index_target_requests() -> None:
+            async for request in async_modified_since(async_fetch_data(TARGET_CLIENT, "/request", target_request_params(), REQUEST_FIELDS), target_since, watermarks, "target"):
+                index_target_request(request)
+        
+        def fetch_target_data():
+            # Listings are indexed as their pages arrive, only the indexes are kept
+            build_target_user_index([])
+            build_target_request_index([], base_index)
+            return index_target_users(), index_target_requests()
+        
+        try:
+            if requests_only:
+                # Nothing is needed from Jellyseerr when there is no delta, so check it first
+                SOURCE_REQUESTS_BY_USER = await async_group_source_requests(watermarks)
+                if not SOURCE_REQUESTS_BY_USER:
+                    logger.info("No requests created or updated in Overseerr since the last sync" if delta else "No Overseerr requests in scope")
+                    return True
+                await asyncio.gather(*fetch_target_data())
             else:
-                new_requests.append(request)
-                
-        logger.info(f"Found {existing_count} existing requests, {len(new_requests)} new requests to migrate")
+                SOURCE_REQUESTS_BY_USER, _, _ = await asyncio.gather(async_group_source_requests(watermarks), *fetch_target_data())
+        except Exception as e:
+            logger.error(f"Failed to fetch initial data: {str(e)}")
+            return False
         
-        if not new_requests:
-            logger.info("All requests already exist in Jellyseerr, skipping migration")
-            return True
-            
-        # Migrate only new requests
-        success_count = existing_count  # Start with existing requests as successes
+        start_phase("tmdb_prefetch")
+        await async_prefetch_tmdb_titles(TMDB_CONCURRENCY)
+        
+        start_phase("user_migration")
+        SOURCE_USER_IDS = {}
+        CREATED_REQUESTS.clear()
+        RUN_REQUEST_INDEX.clear()
+        REQUEST_COUNTS.clear()
+        PROVISIONED_USERS.clear()
+        MEDIA_SERVER_USERS = None
+        success_count = 0
         failure_count = 0
+        request_failures = 0
+        user_slots = asyncio.Semaphore(WORKERS)
+        tasks = set()
         
-        for request in new_requests:
+        def tally(task: asyncio.Task) -> None:
+            nonlocal request_failures
+            tasks.discard(task)
+            if task.cancelled() or not task.result():
+                request_failures += 1
+        
+        async def run_user(migrate: Callable[[Any], Awaitable[bool]], user: Any) -> bool:
             try:
-                tmdb_id = request["media"]["tmdbId"]
-                media_type = request["media"]["mediaType"]
-                
-                # Fetch media details from TMDB
-                tmdb_details = fetch_tmdb_media_details(tmdb_id, media_type)
-                media_name = tmdb_details.get('title', tmdb_details.get('name', 'Unknown'))
-                
-                # Log user ID information before creating payload
-                logger.info(f"Creating request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) with user ID {userNewID} (type: {type(userNewID).__name__})")
-                
-                payload = create_request_payload(request, userNewID)
-                
-                # Log the payload for debugging
-                logger.debug(f"Sending request payload: {json.dumps(payload)}")
-                
-                r = requests.post(
-                    url=f"{TARGET_URL}/request",
-                    headers={"X-Api-Key": TARGET_APIKEY},
-                    json=payload,
-                    timeout=30
-                )
-                
-                # Capture and log the full response, even if it's an error
-                try:
-                    r.raise_for_status()
-                    
-                    # Check the response content
-                    response_data = r.json()
-                    if 'id' in response_data:
-                        request_id = response_data['id']
-                        logger.info(f"Added request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) to Jellyseerr - Request ID: {request_id}")
-                        
-                        # Verify the request was created by fetching it back
-                        if verify_request_created(request_id):
-                            logger.info(f"Verified request ID {request_id} exists in Jellyseerr")
-                            success_count += 1
-                        else:
-                            logger.warning(f"Could not verify request ID {request_id} exists in Jellyseerr")
-                            failure_count += 1
-                    else:
-                        logger.warning(f"Request for {media_type} '{media_name}' (tmdbId:{tmdb_id}) may not have been created properly. Response: {json.dumps(response_data)}")
-                        failure_count += 1
-                except requests.exceptions.HTTPError as e:
-                    # For TV shows, include specific seasons in the error log
-                    seasons_str = ""
-                    if media_type == 'tv':
-                        seasons = [season["seasonNumber"] for season in request.get("seasons", [])]
-                        seasons_str = f", seasons:{seasons}"
-                    
-                    # Get the response content if available
-                    response_text = ""
-                    try:
-                        response_text = f" Response: {r.text}"
-                    except:
-                        pass
-                    
-                    logger.error(f"Failed to migrate request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)}{response_text}")
-                    failure_count += 1
-                
+                return await migrate(user)
+            finally:
+                user_slots.release()
+        
+        async def start_users(migrate: Callable[[Any], Awaitable[bool]], users: Iterable[Any]) -> None:
+            for user in users:
+                await user_slots.acquire()
+                task = asyncio.ensure_future(run_user(migrate, user))
+                tasks.add(task)
+                task.add_done_callback(tally)
+        
+        async def cancel_users() -> None:
+            logger.warning(f"Migration cancelled, waiting for {len(tasks)} running users")
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        try:
+            if requests_only:
+                for batch in chunks(delta_source_users(), PAGE_SIZE):
+                    logger.info(f"Provisioning {len(batch)} users...")
+                    succeeded, failed = await async_provision_batch(batch)
+                    success_count += succeeded
+                    failure_count += failed
+            else:
+                async for SOURCE_USERS in async_source_user_pages():
+                    logger.info(f"Provisioning {len(SOURCE_USERS)} users...")
+                    succeeded, failed = await async_provision_batch(SOURCE_USERS)
+                    success_count += succeeded
+                    failure_count += failed
+        except RequestException as e:
+            logger.error(f"Failed to fetch source users: {str(e)}")
+            failure_count += 1
+        
+        # Requests are created with the users' notifications silenced; their
+        # settings are restored even if the run is cancelled
+        start_phase("request_migration")
+        saved_notifications = await async_silence_notifications(users_with_new_requests())
+        try:
+            await start_users(async_migrate_user_requests, PROVISIONED_USERS)
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            await cancel_users()
+            raise
+        finally:
+            # Its own task so a repeated cancel can't abort it before the clients are closed
+            restore = asyncio.ensure_future(async_restore_notifications(saved_notifications))
+            try:
+                await asyncio.shield(restore)
+            except asyncio.CancelledError:
+                await restore
+                raise
+        success_count, failure_count = tally_users(success_count, failure_count, request_failures)
+        
+        verified = True
+        if VERIFY == "deferred" and CREATED_REQUESTS:
+            start_phase("verification")
+            try:
+                verified = await async_reconcile_requests(async_fetch_data(TARGET_CLIENT, "/request", {"sort": "modified"}))
             except RequestException as e:
-                # For TV shows, include specific seasons in the error log
-                seasons_str = ""
-                if media_type == 'tv':
-                    seasons = [season["seasonNumber"] for season in request.get("seasons", [])]
-                    seasons_str = f", seasons:{seasons}"
-                
-                # Get the response content if available
-                response_text = ""
-                if hasattr(e, 'response') and e.response:
-                    try:
-                        response_text = f" Response: {e.response.text}"
-                    except:
-                        pass
-                
-                logger.error(f"Failed to migrate request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)}{response_text}")
-                failure_count += 1
-                continue
-            except Exception as e:
-                # For TV shows, include specific seasons in the error log
-                seasons_str = ""
-                if media_type == 'tv':
-                    seasons = [season["seasonNumber"] for season in request.get("seasons", [])]
-                    seasons_str = f", seasons:{seasons}"
-                
-                logger.error(f"Unexpected error processing request for {media_type} '{media_name}' (tmdbId:{tmdb_id}{seasons_str}): {str(e)}")
-                failure_count += 1
-                continue
-                
-        logger.info(f"Request migration completed. Success: {success_count}/{total_requests} ({success_count/total_requests*100:.1f}%), Failures: {failure_count}/{total_requests} ({failure_count/total_requests*100:.1f}%)")
+                logger.error(f"Failed to verify created requests: {str(e)}")
+                verified = False
         
-        # Verify all requests were created by fetching them from Jellyseerr
-        logger.info(f"Verifying all requests for user ID {userNewID} in Jellyseerr")
-        jellyseerr_requests = fetch_user_requests(userNewID)
-        if jellyseerr_requests:
-            logger.info(f"Found {len(jellyseerr_requests)} requests for user ID {userNewID} in Jellyseerr")
-        else:
-            logger.warning(f"No requests found for user ID {userNewID} in Jellyseerr")
-            
-        return failure_count == 0
-                
-    except Exception as e:
-        logger.error(f"Failed to migrate requests for user {userOldID}: {str(e)}")
-        return False
+        if failure_count == 0 and verified:
+            save_sync_state(watermarks, listed_at)
+        
+        log_migration_summary(success_count, failure_count)
+        return failure_count == 0 and verified
+    finally:
+        for client in clients:
+            await client.close()
 
 if __name__ == '__main__':
     main()
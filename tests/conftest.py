@@ -0,0 +1,36 @@
+# Fixtures shared by the tests of the migration script
+
+import os
+import importlib.util
+
+import pytest
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "overseerr-migration-script.py")
+
+@pytest.fixture
+def script():
+    """A fresh copy of the migration script, so no globals leak between tests.
+
+    The file name isn't a valid module name, so it's loaded from its path
+    like benchmark.py does.
+    """
+    spec = importlib.util.spec_from_file_location("overseerr_migration_script", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class Clock:
+    """Stand-in for time.monotonic, moved forward by the tests."""
+
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(script, monkeypatch):
+    """Replace the monotonic clock the script reads with a manual one."""
+    fake = Clock()
+    monkeypatch.setattr(script.time, "monotonic", fake)
+    return fake
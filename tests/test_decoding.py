@@ -0,0 +1,57 @@
+# Tests of the decoding and trimming of listed pages
+
+import json
+
+import pytest
+
+PAGE = {
+    "pageInfo": {"pages": 1, "pageSize": 2, "results": 2, "page": 1},
+    "results": [
+        {"id": 1, "is4k": False, "status": 2, "media": {"mediaType": "movie", "tmdbId": 603, "status": 3, "posterPath": "/a.jpg"},
+         "requestedBy": {"id": 7, "email": "neo@example.com", "avatar": "/avatar.png", "settings": {"locale": "en"}}},
+        {"id": 2, "is4k": True, "seasons": [{"id": 9, "seasonNumber": 1}, {"id": 10, "seasonNumber": 2}],
+         "media": {"mediaType": "tv", "tmdbId": 1399}, "requestedBy": {"id": 8, "email": "trinity@example.com"}},
+    ],
+}
+
+FIELDS = {"id": None, "is4k": None, "seasons": {"seasonNumber": None}, "media": {"mediaType": None, "tmdbId": None},
+          "requestedBy": {"id": None, "email": None}}
+
+EXPECTED = {
+    "pageInfo": PAGE["pageInfo"],
+    "results": [
+        {"id": 1, "is4k": False, "media": {"mediaType": "movie", "tmdbId": 603}, "requestedBy": {"id": 7, "email": "neo@example.com"}},
+        {"id": 2, "is4k": True, "seasons": [{"seasonNumber": 1}, {"seasonNumber": 2}],
+         "media": {"mediaType": "tv", "tmdbId": 1399}, "requestedBy": {"id": 8, "email": "trinity@example.com"}},
+    ],
+}
+
+def test_parse_page_keeps_only_the_fields(script):
+    assert script.parse_page(json.dumps(PAGE, indent=2), FIELDS) == EXPECTED
+    assert script.parse_page(json.dumps(PAGE, separators=(",", ":")), FIELDS) == EXPECTED
+
+def test_parse_page_edge_cases(script):
+    assert script.parse_page(" {} ", FIELDS) == {}
+    assert script.parse_page('{"results": [], "pageInfo": {"results": 0}}', FIELDS) == {"results": [], "pageInfo": {"results": 0}}
+    with pytest.raises(ValueError):
+        script.parse_page("[]", FIELDS)
+    with pytest.raises(ValueError):
+        script.parse_page('{"results": [{"id": 1} {"id": 2}]}', FIELDS)
+
+def test_decode_page_with_orjson(script):
+    pytest.importorskip("orjson")
+    assert script.orjson is not None
+    assert script.decode_page(json.dumps(PAGE).encode("utf-8"), FIELDS) == EXPECTED
+
+@pytest.mark.parametrize("incremental_size", [0, 1 << 20])
+def test_decode_page_without_orjson(script, monkeypatch, incremental_size):
+    # Pages at least INCREMENTAL_PARSE_SIZE long go through parse_page, smaller ones through json
+    monkeypatch.setattr(script, "orjson", None)
+    monkeypatch.setattr(script, "INCREMENTAL_PARSE_SIZE", incremental_size)
+    assert script.decode_page(json.dumps(PAGE).encode("utf-8"), FIELDS) == EXPECTED
+
+def test_decode_page_without_fields(script, monkeypatch):
+    content = json.dumps(PAGE).encode("utf-8")
+    assert script.decode_page(content) == PAGE
+    monkeypatch.setattr(script, "orjson", None)
+    assert script.decode_page(content) == PAGE
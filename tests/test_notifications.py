@@ -0,0 +1,49 @@
+# Tests of the saving and restoring of notification settings around a migration
+
+import json
+
+import pytest
+
+ENABLED = {"emailEnabled": True, "notificationTypes": {"email": 3661, "discord": 3661}}
+SILENCED = {"emailEnabled": True, "notificationTypes": {"email": 0, "discord": 0}}
+
+@pytest.fixture
+def target(script, tmp_path, monkeypatch):
+    """Notification settings of a stand-in Jellyseerr, silenced for users 1 and 2 by an interrupted run."""
+    monkeypatch.setattr(script, "NOTIFICATION_BACKUP_PATH", str(tmp_path / "notification_backup.json"))
+    script.save_notification_backup({1: ENABLED, 2: ENABLED})
+    settings = {1: dict(SILENCED), 2: dict(SILENCED), 3: dict(ENABLED)}
+    failing = set()
+    
+    def set_settings(user_id, value):
+        if user_id in failing:
+            return False
+        settings[user_id] = value
+        return True
+    
+    monkeypatch.setattr(script, "get_notification_settings", lambda user_id: settings[user_id])
+    monkeypatch.setattr(script, "set_notification_settings", set_settings)
+    return settings, failing
+
+def test_resumed_run_restores_users_it_does_not_silence(script, target):
+    settings, _ = target
+    # User 1 was journaled before the crash, so only users 2 and 3 get requests this run
+    saved = script.silence_notifications([2, 3])
+    assert settings[3] == SILENCED
+    
+    assert script.restore_notifications(saved) is True
+    assert settings == {1: ENABLED, 2: ENABLED, 3: ENABLED}
+    assert script.load_notification_backup() == {}
+
+def test_run_without_users_to_silence_restores_the_backup(script, target):
+    settings, _ = target
+    assert script.restore_notifications(script.silence_notifications([])) is True
+    assert settings[1] == ENABLED and settings[2] == ENABLED
+
+def test_failed_restore_keeps_the_user_in_the_backup(script, target):
+    settings, failing = target
+    failing.add(1)
+    assert script.restore_notifications(script.silence_notifications([2])) is False
+    assert settings[2] == ENABLED
+    with open(script.NOTIFICATION_BACKUP_PATH, encoding="utf-8") as f:
+        assert json.load(f) == {"1": ENABLED}
@@ -0,0 +1,78 @@
+# Tests of the adaptive rate limiter and Retry-After parsing
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+def test_throttle_burst_halves_the_rate_once(script, clock):
+    limiter = script.RateLimiter("jellyseerr", 10)
+    for _ in range(5):
+        limiter.feedback(429, 1.0)
+    assert limiter.rate == 5
+    assert limiter.reserve() >= 1.0
+
+def test_rate_recovers_after_the_pause_up_to_the_limit(script, clock):
+    limiter = script.RateLimiter("jellyseerr", 10)
+    limiter.feedback(429, 1.0)
+    
+    # Not raised while paused, nor right after the pause
+    clock.now += 1.0
+    limiter.feedback(200)
+    assert limiter.rate == 5
+    
+    clock.now += limiter.INCREASE_INTERVAL
+    limiter.feedback(200)
+    assert limiter.rate == 10
+    
+    clock.now += limiter.INCREASE_INTERVAL
+    limiter.feedback(200)
+    assert limiter.rate == 10
+
+def test_unlimited_rate_is_measured_then_lifted_again(script, clock):
+    limiter = script.RateLimiter("overseerr")
+    for _ in range(40):
+        assert limiter.reserve() == 0
+        clock.now += 0.05
+    
+    limiter.feedback(429)
+    throttled = limiter.ceiling
+    assert 15 < throttled < 25
+    assert limiter.rate == throttled / 2
+    
+    rates = []
+    while limiter.rate is not None and len(rates) < 10:
+        clock.now += limiter.INCREASE_INTERVAL
+        limiter.feedback(200)
+        rates.append(limiter.rate)
+    assert rates[0] == throttled
+    assert rates[-1] is None
+    assert rates[:-1] == sorted(rates[:-1])
+
+def test_unavailable_host_leaves_the_rate_alone(script, clock):
+    limiter = script.RateLimiter("jellyseerr", 10)
+    limiter.feedback(503, 2.0)
+    assert limiter.rate == 10
+    
+    limiter.feedback(429)
+    clock.now += 2.0
+    limiter.feedback(503)
+    assert limiter.rate == 5
+    limiter.feedback(200)
+    assert limiter.rate == 10
+
+def test_retry_after_in_seconds(script):
+    assert script.parse_retry_after("120") == 120
+    assert script.parse_retry_after("0.5") == 0.5
+    assert script.parse_retry_after("-3") == 0
+    assert script.parse_retry_after("86400") == script.RETRY_AFTER_MAX
+
+def test_retry_after_as_http_date(script):
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 <= script.parse_retry_after(format_datetime(later, usegmt=True)) <= 30
+    
+    earlier = datetime.now(timezone.utc) - timedelta(minutes=5)
+    assert script.parse_retry_after(format_datetime(earlier, usegmt=True)) == 0
+
+def test_retry_after_missing_or_invalid(script):
+    assert script.parse_retry_after(None) is None
+    assert script.parse_retry_after("") is None
+    assert script.parse_retry_after("soon") is None
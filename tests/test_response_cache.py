@@ -0,0 +1,94 @@
+# Tests of the conditional GET cache of listings
+
+import pytest
+
+BASE_URL = "http://jellyseerr:5055/api/v1"
+PARAMS = {"take": 50, "skip": 0, "sort": "modified"}
+BODY = b'{"pageInfo": {"results": 1}, "results": [{"id": 1}]}'
+ETAG = 'W/"34-1a2b3c4d"'
+
+@pytest.fixture
+def cache(script, tmp_path):
+    cache = script.ResponseCache(str(tmp_path / "http_cache.sqlite3"))
+    yield cache
+    cache.close()
+
+def response(script, status_code, content=b"", headers=None):
+    return script.BufferedResponse("GET", f"{BASE_URL}/request", status_code, None, content, headers)
+
+def store(script, cache, endpoint="/request", params=PARAMS):
+    key, cached = cache.prepare(BASE_URL, "GET", endpoint, params)
+    assert cached is None
+    cache.complete(key, cached, response(script, 200, BODY, {"ETag": ETAG}))
+
+def test_not_modified_reuses_the_stored_body(script, cache):
+    store(script, cache)
+    key, cached = cache.prepare(BASE_URL, "GET", "/request", PARAMS)
+    assert cached == ({"If-None-Match": ETAG}, BODY)
+    
+    r = cache.complete(key, cached, response(script, 304, headers={"ETag": ETAG}))
+    assert r.status_code == 200
+    assert r.content == BODY
+    assert cache.reused == 1
+    assert cache.bytes_reused == len(BODY)
+
+def test_not_modified_without_a_stored_body_is_returned_as_is(script, cache):
+    key, cached = cache.prepare(BASE_URL, "GET", "/request", PARAMS)
+    assert cached is None
+    
+    not_modified = response(script, 304, headers={"ETag": ETAG})
+    assert cache.complete(key, cached, not_modified) is not_modified
+    assert cache.reused == 0
+    assert cache.prepare(BASE_URL, "GET", "/request", PARAMS)[1] is None
+
+def test_only_listings_with_validators_are_stored(script, cache):
+    assert cache.prepare(BASE_URL, "GET", "/settings/main", {}) == (None, None)
+    
+    key, cached = cache.prepare(BASE_URL, "GET", "/user", PARAMS)
+    cache.complete(key, cached, response(script, 200, BODY))
+    assert cache.prepare(BASE_URL, "GET", "/user", PARAMS)[1] is None
+
+def test_pages_are_kept_per_base_url(script, cache):
+    store(script, cache)
+    assert cache.prepare("http://overseerr:5055/api/v1", "GET", "/request", PARAMS)[1] is None
+
+def test_writes_drop_only_the_listings_they_change(script, cache):
+    store(script, cache, "/user")
+    store(script, cache, "/request", {**PARAMS, "requestedBy": 7})
+    store(script, cache, "/request", {**PARAMS, "requestedBy": 8})
+    
+    # Per-user settings aren't part of a listing
+    cache.prepare(BASE_URL, "POST", "/user/7/settings/notifications", None, {"emailEnabled": False})
+    assert cache.prepare(BASE_URL, "GET", "/user", PARAMS)[1] is not None
+    
+    # A new request only changes the listings of its user
+    cache.prepare(BASE_URL, "POST", "/request", None, {"mediaType": "movie", "mediaId": 603, "userId": 7})
+    assert cache.prepare(BASE_URL, "GET", "/request", {**PARAMS, "requestedBy": 7})[1] is None
+    assert cache.prepare(BASE_URL, "GET", "/request", {**PARAMS, "requestedBy": 8})[1] is not None
+    assert cache.prepare(BASE_URL, "GET", "/user", PARAMS)[1] is not None
+    
+    cache.prepare(BASE_URL, "PUT", "/user/8", None, {"permissions": 33})
+    assert cache.prepare(BASE_URL, "GET", "/user", PARAMS)[1] is None
+
+def test_client_sends_a_bare_not_modified_again_without_caches(script, cache, monkeypatch):
+    client = script.ApiClient(BASE_URL, response_cache=cache, retries=2)
+    sent = []
+    
+    def send(method, endpoint, **kwargs):
+        sent.append(kwargs.get("headers") or {})
+        return response(script, 304) if len(sent) == 1 else response(script, 200, BODY, {"ETag": ETAG})
+    
+    monkeypatch.setattr(client, "send", send)
+    monkeypatch.setattr(script, "retry_delay", lambda attempt, retry_after=None: 0)
+    r = client.get("/request", params=PARAMS)
+    assert r.status_code == 200
+    assert r.content == BODY
+    assert sent[1]["Cache-Control"] == "no-cache"
+    assert cache.prepare(BASE_URL, "GET", "/request", PARAMS)[1] == ({"If-None-Match": ETAG}, BODY)
+
+def test_client_gives_up_on_repeated_bare_not_modified(script, cache, monkeypatch):
+    client = script.ApiClient(BASE_URL, response_cache=cache, retries=1)
+    monkeypatch.setattr(client, "send", lambda method, endpoint, **kwargs: response(script, 304))
+    monkeypatch.setattr(script, "retry_delay", lambda attempt, retry_after=None: 0)
+    with pytest.raises(script.RequestException):
+        client.get("/request", params=PARAMS)
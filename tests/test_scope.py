@@ -0,0 +1,35 @@
+# Tests of the request status filters of a scoped run
+
+import pytest
+
+def request(status, media_status):
+    return {"id": 1, "status": status, "is4k": False, "createdAt": "2024-01-01T00:00:00.000Z",
+            "media": {"mediaType": "movie", "tmdbId": 603, "status": media_status}, "requestedBy": {"id": 7}}
+
+@pytest.mark.parametrize("status, media_status, expected", [
+    (1, 2, {"pending", "unavailable", "all"}),
+    (2, 3, {"approved", "processing", "unavailable", "all"}),
+    (2, 5, {"approved", "available", "all"}),
+    (3, 1, {"all"}),
+    (4, 2, {"failed", "all"}),
+])
+def test_status_filters_match_the_api(script, status, media_status, expected):
+    matched = {name for name in script.REQUEST_FILTERS if script.MigrationScope(status=name).matches_request(request(status, media_status), None)}
+    assert matched == expected
+
+def test_default_scope_keeps_unavailable_requests(script):
+    scope = script.MigrationScope(media_type="movie")
+    assert scope.matches_request(request(2, 2), None)
+    assert not scope.matches_request(request(2, 5), None)
+
+@pytest.mark.parametrize("status, target_filter", [
+    (None, "unavailable"),
+    ("unavailable", "unavailable"),
+    ("processing", "unavailable"),
+    ("pending", "all"),
+    ("available", "all"),
+    ("all", "all"),
+])
+def test_target_index_lists_every_request_the_scope_can_clash_with(script, status, target_filter):
+    script.SCOPE = script.MigrationScope(status=status)
+    assert script.target_request_params()["filter"] == target_filter
@@ -0,0 +1,57 @@
+# Tests of the merging of users found in several Overseerr instances
+
+import pytest
+
+@pytest.fixture
+def journal(script, tmp_path):
+    # Neo was migrated from instance a by a previous run, with their request a:1
+    path = str(tmp_path / "migration.journal")
+    previous = script.MigrationJournal(path)
+    previous.record_request("a:1", 501)
+    previous.record_user("a:7", 42, "neo@example.com")
+    previous.close()
+    
+    script.JOURNAL = script.MigrationJournal(path, resume=True)
+    yield script.JOURNAL
+    script.JOURNAL.close()
+
+def user(script, uid):
+    return script.SourceUser(int(uid.split(":")[1]), uid, "Neo@example.com", "neo")
+
+def add_request(script, owner, uid, tmdb_id):
+    request = script.SourceRequest(int(uid.split(":")[1]), uid, "movie", tmdb_id, False, (), None, owner)
+    script.SOURCE_REQUESTS_BY_USER.setdefault(owner.uid, []).append(request)
+
+def test_duplicate_registered_after_the_first_user_was_skipped(script, journal):
+    first, second = user(script, "a:7"), user(script, "b:3")
+    add_request(script, first, "a:1", 603)
+    add_request(script, second, "b:1", 604)
+    
+    assert script.register_source_users([first]) == [first]
+    matched, to_create, skipped, invalid = script.plan_users([first])
+    assert (matched, to_create, skipped) == ([], [], 1)
+    assert script.PROVISIONED_USERS == []
+    
+    # The requests of b:3 are merged into a:7 and migrated to the Jellyseerr user the journal recorded
+    assert script.register_source_users([second]) == []
+    assert [request.uid for request in script.SOURCE_REQUESTS_BY_USER["a:7"]] == ["a:1", "b:1"]
+    assert script.PROVISIONED_USERS == [(second, "a:7", 42)]
+
+def test_duplicate_registered_before_the_first_user_is_planned(script, journal):
+    first, second = user(script, "a:7"), user(script, "b:3")
+    add_request(script, first, "a:1", 603)
+    add_request(script, second, "b:1", 604)
+    
+    assert script.register_source_users([first, second]) == [first]
+    assert script.plan_users([first])[2] == 1
+    assert script.PROVISIONED_USERS == [(second, "a:7", 42)]
+
+def test_user_without_pending_requests_stays_skipped(script, journal):
+    first, second = user(script, "a:7"), user(script, "b:3")
+    add_request(script, first, "a:1", 603)
+    add_request(script, second, "b:1", 604)
+    journal.record_request("b:1", 502)
+    
+    script.register_source_users([first, second])
+    assert script.plan_users([first])[2] == 1
+    assert script.PROVISIONED_USERS == []